@@ -0,0 +1,273 @@
+"""
+Tick-to-bar aggregation: OHLCV bars per symbol, as a stage between loading
+market data and Engine.run.
+
+    bars = resample(load_market_data_columnar('ticks.csv'), '1m')   # time bars
+    bars = resample(open_tick_store('ticks.store'), '500t')         # 500-tick bars
+    engine.run(bars, strategies)
+
+`time_bars` and `tick_bars` group every symbol's time-sorted ticks in one
+pass over the concatenated arrays: bar boundaries are where the symbol or
+the bucket (time interval, or tick count) changes, and open/high/low/close
+come from indexing and np.maximum/minimum.reduceat at those boundaries.
+The result, Bars, behaves like MarketDataColumns for the engine
+(by_symbol() returns SymbolBars views), and each Bar carries `price` =
+close, so strategies consume bars through the same generate_signals
+interface as ticks.
+
+Volume is the number of ticks in the bar, since ticks carry no size. A
+bar is stamped with the time of its last tick, the moment its close is
+known, so chronological runs over bars never look ahead.
+
+BarAggregator builds the same bars one tick at a time for live feeds
+(see aggregate_feed); after flush() it has emitted exactly the bars the
+batch functions return.
+"""
+import datetime
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ledger import to_epoch_ns
+from models import MarketDataColumns, SymbolTicks
+
+_UNITS = {'us': 'us', 'ms': 'ms', 's': 's', 'm': 'm', 'h': 'h', 'd': 'D'}
+
+
+@dataclass(frozen=True)
+class Bar:
+    timestamp: datetime.datetime  # time of the bar's last tick
+    symbol: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int  # ticks in the bar
+
+    @property
+    def price(self) -> float:
+        return self.close
+
+
+class SymbolBars(SymbolTicks):
+    """
+    One symbol's bars as columns. `prices` holds the closes, so code that
+    reads SymbolTicks (the engine's vectorized and cached paths) runs on
+    bars unchanged; iterating yields Bar instances a chunk at a time.
+    """
+    __slots__ = ('open', 'high', 'low', 'volume')
+
+    def __init__(self, symbol, timestamps, open, high, low, close, volume):
+        super().__init__(symbol, timestamps, close)
+        self.open = open
+        self.high = high
+        self.low = low
+        self.volume = volume
+
+    @property
+    def close(self):
+        return self.prices
+
+    def __iter__(self):
+        symbol = self.symbol
+        for start in range(0, len(self.prices), self.chunk_size):
+            stop = start + self.chunk_size
+            columns = [col[start:stop].tolist() for col in
+                       (self.timestamps, self.open, self.high, self.low, self.prices, self.volume)]
+            for ts, o, h, l, c, v in zip(*columns):
+                yield Bar(ts, symbol, o, h, l, c, v)
+
+
+class Bars:
+    """Bars of several symbols: {symbol: SymbolBars}, consumed by the engine like MarketDataColumns."""
+
+    def __init__(self, views: Dict[str, SymbolBars], spec: str = None):
+        self.views = views
+        self.spec = spec
+
+    @property
+    def symbols(self):
+        return list(self.views)
+
+    def __len__(self):
+        return sum(len(v) for v in self.views.values())
+
+    def by_symbol(self) -> Dict[str, SymbolBars]:
+        return dict(self.views)
+
+
+def parse_bar_spec(spec: str):
+    '''
+    ('ticks', n) for "<n>t", or ('time', numpy timedelta64) for
+    "<n><unit>" with unit us, ms, s, m, h or d.
+    '''
+    match = re.fullmatch(r'(\d+)\s*(t|us|ms|s|m|h|d)', spec.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Bad bar spec {spec!r}: use e.g. 100t (ticks) or 500ms, 1s, 5m, 1h, 1d")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == 't':
+        return 'ticks', n
+    return 'time', np.timedelta64(n, _UNITS[unit])
+
+
+def resample(data, spec: str) -> Bars:
+    '''Bars of `data` for a parse_bar_spec string ("100t", "1s", "5m", ...).'''
+    kind, size = parse_bar_spec(spec)
+    bars = tick_bars(data, size) if kind == 'ticks' else time_bars(data, size)
+    bars.spec = spec
+    return bars
+
+
+def time_bars(data, interval) -> Bars:
+    '''
+    Bars of every `interval` (timedelta, numpy timedelta64 or microseconds)
+    of each symbol, aligned to the Unix epoch; intervals without ticks have
+    no bar.
+    '''
+    step = _micros(interval)
+    if step <= 0:
+        raise ValueError("Bar interval must be positive.")
+    return _group(_symbol_views(data), lambda times, position: times // step)
+
+
+def tick_bars(data, size: int) -> Bars:
+    '''Bars of `size` consecutive ticks of each symbol; the last bar may be shorter.'''
+    if size <= 0:
+        raise ValueError("Bar size must be positive.")
+    return _group(_symbol_views(data), lambda times, position: position // size)
+
+
+def _micros(interval) -> int:
+    if isinstance(interval, datetime.timedelta):
+        return interval // datetime.timedelta(microseconds=1)
+    if isinstance(interval, np.timedelta64):
+        return int(interval.astype('m8[us]').astype(np.int64))
+    return int(interval)
+
+
+def _symbol_views(data) -> Dict[str, SymbolTicks]:
+    '''{symbol: time-sorted SymbolTicks} for columns, tick stores, {symbol: ticks} or a flat list of ticks.'''
+    if hasattr(data, 'by_symbol'):
+        return data.by_symbol()
+    if isinstance(data, dict):
+        return {sym: ticks if isinstance(ticks, SymbolTicks) else MarketDataColumns.from_ticks(ticks).by_symbol()[sym]
+                for sym, ticks in data.items() if len(ticks)}
+    return MarketDataColumns.from_ticks(data).by_symbol()
+
+
+def _group(views: Dict[str, SymbolTicks], bucket) -> Bars:
+    '''
+    One group-by over all symbols: concatenate the views, key every tick
+    by bucket(epoch microseconds, position within its symbol), and start a
+    bar wherever the symbol or the key changes.
+    '''
+    symbols = list(views)
+    lengths = np.array([len(v) for v in views.values()], dtype=np.int64)
+    n = int(lengths.sum())
+    if not n:
+        return Bars({})
+    times = np.concatenate([np.asarray(v.timestamps, dtype='datetime64[us]') for v in views.values()])
+    prices = np.concatenate([np.asarray(v.prices, dtype=np.float64) for v in views.values()])
+    symbol_ids = np.repeat(np.arange(len(symbols)), lengths)
+    position = np.arange(n) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    keys = bucket(times.view(np.int64), position)
+
+    new_bar = np.empty(n, dtype=bool)
+    new_bar[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=new_bar[1:])
+    new_bar[1:] |= symbol_ids[1:] != symbol_ids[:-1]
+    starts = np.flatnonzero(new_bar)
+    ends = np.append(starts[1:], n) - 1
+
+    columns = (times[ends], prices[starts], np.maximum.reduceat(prices, starts),
+               np.minimum.reduceat(prices, starts), prices[ends], ends - starts + 1)
+    per_symbol = np.bincount(symbol_ids[starts], minlength=len(symbols))
+    bounds = np.concatenate(([0], np.cumsum(per_symbol)))
+    views = {sym: SymbolBars(sym, *(col[bounds[i]:bounds[i + 1]] for col in columns))
+             for i, sym in enumerate(symbols) if per_symbol[i]}
+    return Bars(views)
+
+
+class BarAggregator:
+    """
+    Streaming bars for live feeds: `update(tick)` returns the bar the tick
+    completes, if any, and `flush()` the partial bars. Give either
+    `interval` (time bars; a bar completes when a tick of the same symbol
+    arrives in a later interval) or `ticks` (tick-count bars; a bar
+    completes on its last tick). Ticks of each symbol must arrive in time
+    order.
+    """
+
+    def __init__(self, interval=None, ticks: int = None):
+        if (interval is None) == (ticks is None):
+            raise ValueError("Give exactly one of interval or ticks.")
+        self.step = _micros(interval) if interval is not None else None
+        self.size = ticks
+        if (self.step if ticks is None else ticks) <= 0:
+            raise ValueError("Bar size must be positive.")
+        # symbol -> [bucket, timestamp, open, high, low, close, volume] of its open bar
+        self._open: Dict[str, list] = {}
+
+    @classmethod
+    def from_spec(cls, spec: str) -> 'BarAggregator':
+        kind, size = parse_bar_spec(spec)
+        return cls(ticks=size) if kind == 'ticks' else cls(interval=size)
+
+    def update(self, tick) -> Optional[Bar]:
+        symbol, price = tick.symbol, tick.price
+        state = self._open.get(symbol)
+        done = None
+        if self.step is not None:
+            key = (to_epoch_ns(tick.timestamp) // 1_000) // self.step
+            if state is not None and state[0] != key:
+                done = _bar(symbol, state)
+                state = None
+        else:
+            key = 0
+        if state is None:
+            self._open[symbol] = [key, tick.timestamp, price, price, price, price, 1]
+        else:
+            state[1] = tick.timestamp
+            if price > state[3]:
+                state[3] = price
+            if price < state[4]:
+                state[4] = price
+            state[5] = price
+            state[6] += 1
+            if state[6] == self.size:
+                del self._open[symbol]
+                return _bar(symbol, state)
+        if self.size == 1:
+            return _bar(symbol, self._open.pop(symbol))
+        return done
+
+    def flush(self) -> List[Bar]:
+        '''The partial bar of every symbol, in order of their first tick; resets the aggregator.'''
+        bars = [_bar(sym, state) for sym, state in self._open.items()]
+        self._open.clear()
+        return bars
+
+
+def _bar(symbol, state) -> Bar:
+    _, ts, o, h, l, c, v = state
+    return Bar(ts, symbol, o, h, l, c, v)
+
+
+async def aggregate_feed(feed, aggregator: BarAggregator):
+    '''
+    Async generator of the bars of an async tick feed (e.g.
+    data_generator.fan_in), for Engine.run_async. Partial bars are
+    flushed when the feed ends; the feed is closed when this generator is.
+    '''
+    try:
+        async for tick in feed:
+            bar = aggregator.update(tick)
+            if bar is not None:
+                yield bar
+        for bar in aggregator.flush():
+            yield bar
+    finally:
+        if hasattr(feed, 'aclose'):
+            await feed.aclose()
@@ -0,0 +1,885 @@
+"""
+Runtime benchmarks for the backtester.
+
+Run `python benchmark.py loader --rows 1000000` to compare the list-based
+and columnar CSV loaders. Each measurement runs in a fresh process so that
+peak RSS reflects only the code being measured.
+
+Run `python benchmark.py parallel --symbols 500` to time Engine.run's
+isolated per-symbol mode as the worker count grows.
+
+Run `python benchmark.py ticks --rows 1000000` for bytes per tick and
+construction / sort throughput of the MarketDataPoint dataclass against
+the interned, epoch-ns models.Tick.
+
+Run `python benchmark.py indicators` for per-tick cost of the incremental
+indicators against a list-copy moving average as the window grows.
+
+Run `python benchmark.py equity` for per-tick equity cost, incremental vs
+full recomputation, as the number of held symbols grows.
+
+Run `python benchmark.py live --symbols 1000` to soak-test the async engine
+against simulated concurrent feeds and report per-tick latency.
+
+Run `python benchmark.py ledger` for bytes per trade and appends/fills per
+second of the columnar TradeLedger against the old list-of-dicts ledger.
+
+Run `python benchmark.py metrics --points 10000000` to time the vectorized
+metrics against the original per-point loops on one equity curve.
+
+Run `python benchmark.py streaming --rows 2000000` for peak RSS and time of
+an in-memory chronological run against run_streaming on the same CSV.
+
+Run `python benchmark.py fills --orders 1000000` for orders per second of
+an execution model chain filled one order at a time against one batch call.
+
+Run `python benchmark.py montecarlo --paths 10000` to time the blocked
+Monte Carlo evaluation against the tick-by-tick engine run once per path.
+
+Run `python benchmark.py bars --rows 1000000` for aggregation time, event
+count and Engine.run throughput on raw ticks and on tick and time bars.
+
+Run `python benchmark.py checkpoint --days 20` to time a full
+chronological replay against restoring a checkpoint of the earlier days
+and running only the last day.
+
+Run `python benchmark.py startup` for wall and import time of main.py runs
+in fresh interpreters: importing main alone, a full first run, and a rerun
+on reused data without plots or report.
+
+Run `python benchmark.py report` for save_report and plot decimation time as
+the equity curves grow.
+
+Run `python benchmark.py suite --out bench.json` for the reproducible suite
+(loader, per-strategy tick cost, engine throughput vs symbol count,
+performance_metrics, save_report and try_plot_equity). Every case runs in
+a fresh process on seeded data and records wall time, throughput and peak
+RSS. `--baseline old.json` compares against an earlier run and exits 1 if
+any case slowed down by more than `--threshold`.
+"""
+import argparse
+import json
+import platform
+import contextlib
+import csv
+import datetime
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+
+def make_columns(n_symbols, ticks_per_symbol, seed=0):
+    '''Deterministic random-walk MarketDataColumns, ticks interleaved round-robin across symbols.'''
+    import numpy as np
+    from models import MarketDataColumns
+    rng = np.random.default_rng(seed)
+    n = n_symbols * ticks_per_symbol
+    returns = rng.normal(0.0, 0.01, size=(ticks_per_symbol, n_symbols))
+    prices = np.round(100.0 * np.cumprod(1.0 + returns, axis=0), 2).ravel()
+    timestamps = np.datetime64('2025-01-01T09:30:00', 'us') + np.arange(n).astype('m8[us]')
+    symbol_ids = np.tile(np.arange(n_symbols, dtype=np.int32), ticks_per_symbol)
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    return MarketDataColumns(timestamps, symbol_ids, symbols, prices)
+
+
+def build_strategies(symbols):
+    from collections import defaultdict
+    from strategies import MovingAverageStrategy, MomentumStrategy
+    from indicators import IndicatorSet
+    strategies = defaultdict(list)
+    for s in symbols:
+        indicators = IndicatorSet()
+        strategies[s].append(MovingAverageStrategy(symbol=s, indicators=indicators))
+        strategies[s].append(MomentumStrategy(symbol=s, indicators=indicators))
+    return strategies
+
+
+def bench_parallel(n_symbols, ticks_per_symbol, worker_counts):
+    '''Wall time of Engine.run(workers=w) for each w; speedup is relative to workers=1.'''
+    from engine import Engine
+    data = make_columns(n_symbols, ticks_per_symbol)
+    rows = []
+    for w in worker_counts:
+        engine = Engine(seed=0)
+        t0 = time.perf_counter()
+        engine.run(data, build_strategies(data.symbols), workers=w)
+        elapsed = time.perf_counter() - t0
+        rows.append({'workers': w, 'symbols': n_symbols, 'seconds': elapsed,
+                     'ticks_per_sec': len(data) / elapsed})
+    for r in rows:
+        r['speedup'] = rows[0]['seconds'] / r['seconds']
+    return rows
+
+
+def _peak_rss_mb():
+    '''
+    Peak resident set size of the current process in MB. On Linux this is
+    VmHWM, since ru_maxrss survives exec and so would include the parent's
+    peak in a spawned child; elsewhere ru_maxrss (KB on Linux, bytes on macOS).
+    '''
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _in_fresh_process(fn, *args):
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def write_benchmark_csv(path, rows, symbols=('AAPL', 'MSFT', 'NVDA', 'META', 'AMC')):
+    '''Write a deterministic timestamp,symbol,price CSV with `rows` rows.'''
+    start = datetime.datetime(2025, 1, 1, 9, 30)
+    step = datetime.timedelta(microseconds=1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'symbol', 'price'])
+        for i in range(rows):
+            writer.writerow([(start + i * step).isoformat(), symbols[i % len(symbols)], f"{100 + (i % 997) / 100:.2f}"])
+
+
+def _measure_loader(name, path):
+    base_rss = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if name == 'load_market_data':
+        from models import load_market_data
+        data = load_market_data(path)
+    elif name == 'load_ticks':
+        from models import load_ticks
+        data = load_ticks(path)
+    else:
+        from models import load_market_data_columnar
+        data = load_market_data_columnar(path)
+    elapsed = time.perf_counter() - t0
+    rows = len(data)
+    return {
+        'loader': name,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_growth_mb': _peak_rss_mb() - base_rss,
+    }
+
+
+def bench_loader(path):
+    '''Compare load_market_data, load_ticks and load_market_data_columnar on `path`.'''
+    return [_in_fresh_process(_measure_loader, name, path)
+            for name in ('load_market_data', 'load_ticks', 'load_market_data_columnar')]
+
+
+def bench_ticks(n_rows):
+    '''Bytes per tick as loaded from CSV, and construction and sort rates, MarketDataPoint vs Tick.'''
+    import random
+    import tracemalloc
+    from data_generator import MarketDataPoint
+    from models import Tick, load_market_data, load_ticks, time_key
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ticks.csv')
+        write_benchmark_csv(path, n_rows)
+        for name, load in (('MarketDataPoint', load_market_data), ('Tick', load_ticks)):
+            tracemalloc.start()
+            ticks = load(path)
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            # construction from already-parsed values, timed without tracemalloc
+            values = [(t.timestamp, t.symbol, t.price) for t in ticks]
+            if name == 'Tick':
+                values = [(t.timestamp_ns, s, p) for t, (_, s, p) in zip(ticks, values)]
+            t0 = time.perf_counter()
+            if name == 'Tick':
+                built = [Tick(ts, s, p) for ts, s, p in values]
+            else:
+                built = [MarketDataPoint(ts, s, p) for ts, s, p in values]
+            construct = time.perf_counter() - t0
+            # the same shuffle for both, so the sort has real work to do
+            random.Random(0).shuffle(built)
+            key = time_key(built) if name == 'Tick' else (lambda x: x.timestamp)
+            t0 = time.perf_counter()
+            built.sort(key=key)
+            sort = time.perf_counter() - t0
+            rows.append({'tick': name, 'rows': len(ticks), 'bytes_per_tick': current / len(ticks),
+                         'constructed_per_sec': len(values) / construct, 'sorted_per_sec': len(built) / sort})
+            del ticks, values, built
+    return rows
+
+
+def bench_indicators(windows, ticks=200_000):
+    '''Nanoseconds per update for each indicator at each window length.'''
+    import random
+    from collections import deque
+    from indicators import SMA, EMA, RollingMax, RollingMin, RunLength
+
+    class ListCopySMA:
+        # the pre-indicators approach: average a fresh list copy on every tick
+        def __init__(self, window):
+            self.window = window
+            self.prices = deque(maxlen=window)
+
+        def update(self, price):
+            self.prices.append(price)
+            return sum(list(self.prices)[-self.window:]) / self.window
+
+    rng = random.Random(0)
+    prices = [100 + rng.gauss(0, 1) for _ in range(ticks)]
+    factories = {'list_copy_sma': ListCopySMA, 'sma': SMA, 'ema': EMA,
+                 'rolling_max': RollingMax, 'rolling_min': RollingMin,
+                 'run_length': lambda w: RunLength()}
+    rows = []
+    for w in windows:
+        row = {'window': w}
+        for name, factory in factories.items():
+            update = factory(w).update
+            t0 = time.perf_counter_ns()
+            for p in prices:
+                update(p)
+            row[f'{name}_ns'] = (time.perf_counter_ns() - t0) / ticks
+        rows.append(row)
+    return rows
+
+
+def bench_equity(symbol_counts, ticks=20_000):
+    '''Microseconds per tick to mark one price and read equity, for each number of held symbols.'''
+    import random
+    from engine import Engine
+    rng = random.Random(0)
+    rows = []
+    for n in symbol_counts:
+        engine = Engine(initial_cash=1e9)
+        symbols = [f"S{i:05d}" for i in range(n)]
+        for sym in symbols:
+            engine.positions.set(sym, 10, 100.0)
+            engine._mark(sym, 100.0)
+        updates = [(rng.choice(symbols), 100 + rng.random()) for _ in range(ticks)]
+        row = {'symbols': n}
+        for name, equity in (('full_recompute', engine._compute_equity), ('incremental', engine._equity)):
+            t0 = time.perf_counter()
+            for sym, price in updates:
+                engine._mark(sym, price)
+                equity()
+            row[f'{name}_us'] = (time.perf_counter() - t0) / ticks * 1e6
+        row['speedup'] = row['full_recompute_us'] / row['incremental_us']
+        rows.append(row)
+    return rows
+
+
+def bench_live(n_symbols, ticks_per_feed, interval, queue_size):
+    '''Drive Engine.run_async from n_symbols async feeds fanned into one bounded queue.'''
+    import asyncio
+    import random
+    from data_generator import async_market_data_generator, fan_in
+    from engine import Engine
+
+    async def soak():
+        symbols = [f"S{i:04d}" for i in range(n_symbols)]
+        feeds = [async_market_data_generator(sym, 100.0, interval=interval, rng=random.Random(i))
+                 for i, sym in enumerate(symbols)]
+        engine = Engine(seed=0)
+        t0 = time.perf_counter()
+        result = await engine.run_async(fan_in(feeds, maxsize=queue_size, max_ticks_per_feed=ticks_per_feed),
+                                        build_strategies(symbols))
+        elapsed = time.perf_counter() - t0
+        return dict(symbols=n_symbols, seconds=elapsed, ticks_per_sec=result['latency']['ticks'] / elapsed,
+                    **result['latency'])
+
+    return [asyncio.run(soak())]
+
+
+def bench_ledger(n_trades):
+    '''Memory and throughput of recording n_trades fills, list-of-dicts vs TradeLedger.'''
+    import tracemalloc
+    from engine import Engine
+    from ledger import BUY, TradeLedger
+    from models import ExecutionError, Order, OrderError
+    ts = datetime.datetime(2025, 1, 1, 9, 30)
+    symbols = [f"S{i:03d}" for i in range(100)]
+
+    def dict_ledger():
+        trades = []
+        for i in range(n_trades):
+            trades.append({'timestamp': ts, 'action': 'BUY', 'symbol': symbols[i % 100],
+                           'quantity': 10, 'price': 100.0 + i, 'cash_after': 1e6 - i})
+        return trades
+
+    def array_ledger():
+        trades = TradeLedger()
+        for i in range(n_trades):
+            trades.append(ts, symbols[i % 100], BUY, 10, 100.0 + i, 1e6 - i)
+        return trades
+
+    rows = []
+    for name, fn in (('list_of_dicts', dict_ledger), ('trade_ledger', array_ledger)):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        # measured separately: tracemalloc slows allocation-heavy code unevenly
+        tracemalloc.start()
+        ledger = fn()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append({'ledger': name, 'trades': len(ledger), 'bytes_per_trade': current / n_trades,
+                     'appends_per_sec': n_trades / elapsed})
+        del ledger
+
+    # end-to-end fills through execute_orders (BUY then SELL of the same lot);
+    # simulated execution failures, and sells of lots whose buy failed, are
+    # rejected and counted, anything else propagates
+    engine = Engine(initial_cash=1e12, seed=0)
+    for sym in symbols:
+        engine._mark(sym, 100.0)
+    rejected = 0
+    t0 = time.perf_counter()
+    for i in range(n_trades):
+        order = Order(symbols[i % 100], 10, 100.0, 'BUY' if (i // 100) % 2 == 0 else 'SELL')
+        try:
+            engine.execute_orders(order, ts)
+        except (OrderError, ExecutionError):
+            rejected += 1
+    elapsed = time.perf_counter() - t0
+    rows.append({'ledger': 'engine_execute_orders', 'trades': len(engine.trades), 'rejected': rejected,
+                 'fills_per_sec': len(engine.trades) / elapsed})
+    return rows
+
+
+def _loop_metrics(eq_val):
+    '''The original per-point return / Sharpe / drawdown loops, for comparison.'''
+    import numpy as np
+    period_returns = []
+    for i in range(1, len(eq_val)):
+        prev = eq_val[i - 1]
+        period_returns.append(0.0 if prev == 0 else eq_val[i] / prev - 1.0)
+    avg_ret = sum(period_returns) / len(period_returns)
+    std_ret = np.std(period_returns)
+    sharpe = (avg_ret / std_ret) * np.sqrt(252) if std_ret > 0 else 0.0
+    peak, max_dd = eq_val[0], 0.0
+    for v in eq_val:
+        if v > peak:
+            peak = v
+        dd = (peak - v) / peak if peak > 0 else 0.0
+        if dd > max_dd:
+            max_dd = dd
+    return sharpe, max_dd
+
+
+def bench_metrics(n_points, window=1_000):
+    '''Seconds to compute summary (and rolling) metrics on one n_points equity curve.'''
+    import numpy as np
+    import metrics
+    rng = np.random.default_rng(0)
+    values = 100_000 * np.cumprod(1 + rng.normal(0, 0.001, n_points))
+    rows = []
+    as_list = values.tolist()
+    t0 = time.perf_counter()
+    sharpe, max_dd = _loop_metrics(as_list)
+    rows.append({'metrics': 'python_loops', 'points': n_points, 'seconds': time.perf_counter() - t0})
+    t0 = time.perf_counter()
+    m = metrics.curve_metrics(values)
+    rows.append({'metrics': 'vectorized', 'points': n_points, 'seconds': time.perf_counter() - t0,
+                 'sharpe_diff': abs(m['sharpe'] - sharpe), 'max_dd_diff': abs(m['max_drawdown'] - max_dd)})
+    t0 = time.perf_counter()
+    metrics.rolling_sharpe(values, window)
+    metrics.rolling_max_drawdown(values, window)
+    rows.append({'metrics': f'rolling_w{window}', 'points': n_points, 'seconds': time.perf_counter() - t0})
+    streaming = metrics.StreamingMetrics()
+    update = streaming.update
+    t0 = time.perf_counter()
+    for v in as_list:
+        update(v)
+    elapsed = time.perf_counter() - t0
+    rows.append({'metrics': 'streaming', 'points': n_points, 'us_per_update': elapsed / n_points * 1e6})
+    return rows
+
+
+def bench_fills(n_orders):
+    '''Orders per second through a full execution model chain, per order vs batched.'''
+    import numpy as np
+    from execution import (Chain, Latency, PartialFill, RandomFailure, Slippage, Spread, UniformStream,
+                           simulate_fills, symbol_rng)
+    model = Chain(RandomFailure(0.01), Spread(2.0), Slippage(1.0, 0.01), Latency(0.0005, 2), PartialFill(0.5, 0.2))
+    rng = np.random.default_rng(0)
+    sides = rng.choice(np.array([-1, 1]), n_orders)
+    qtys = rng.integers(1, 100, n_orders)
+    prices = rng.uniform(50, 150, n_orders)
+
+    uniforms = UniformStream(symbol_rng(0, 'S'))
+    fill, nxt, draws = model.fill, uniforms.next, range(model.draws)
+    t0 = time.perf_counter()
+    scalar = [fill(s, q, p, [nxt() for _ in draws])
+              for s, q, p in zip(sides.tolist(), qtys.tolist(), prices.tolist())]
+    per_order = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    filled, fill_prices = simulate_fills(model, UniformStream(symbol_rng(0, 'S')), sides, qtys, prices)
+    batch = time.perf_counter() - t0
+    identical = scalar == list(zip(filled.tolist(), fill_prices.tolist()))
+    return [{'mode': 'per_order', 'orders': n_orders, 'orders_per_sec': n_orders / per_order},
+            {'mode': 'batch', 'orders': n_orders, 'orders_per_sec': n_orders / batch, 'identical': identical}]
+
+
+def bench_montecarlo(n_paths, n_ticks=500, engine_paths=20):
+    '''Seconds for n_paths Monte Carlo paths, against the engine's per-path time extrapolated from engine_paths.'''
+    import numpy as np
+    from engine import Engine
+    from models import MarketDataColumns
+    from montecarlo import run_monte_carlo, simulate_prices
+    symbols = ['AAPL', 'MSFT', 'NVDA', 'META', 'AMC']
+    t0 = time.perf_counter()
+    run_monte_carlo(build_strategies(symbols), 150.0, 0.02, n_ticks, n_paths)
+    batch = time.perf_counter() - t0
+
+    times = np.datetime64('2025-01-01T09:30', 'us') + np.arange(n_ticks * len(symbols)).astype('m8[us]')
+    symbol_ids = np.tile(np.arange(len(symbols), dtype=np.int32), n_ticks)
+    t0 = time.perf_counter()
+    for path in range(engine_paths):
+        prices = simulate_prices([path], len(symbols), [150.0] * len(symbols), [0.02] * len(symbols), n_ticks)
+        columns = MarketDataColumns(times, symbol_ids, symbols, prices[:, 0].T.ravel())
+        Engine(failure_rate=0.0).run_chronological(columns, build_strategies(symbols))
+    per_path = (time.perf_counter() - t0) / engine_paths
+    return [{'mode': 'engine_per_path', 'paths': n_paths, 'ticks': n_ticks, 'seconds': per_path * n_paths},
+            {'mode': 'monte_carlo', 'paths': n_paths, 'ticks': n_ticks, 'seconds': batch,
+             'peak_rss_mb': _peak_rss_mb()}]
+
+
+def bench_bars(n_rows, specs, n_symbols=5):
+    '''
+    Engine.run on raw ticks and on each bar spec: seconds to aggregate and
+    to backtest, events the strategies saw, and raw ticks covered per second.
+    '''
+    from bars import resample
+    from engine import Engine
+    data = make_columns(n_symbols, n_rows // n_symbols)
+    rows = []
+    for spec in [None] + list(specs):
+        t0 = time.perf_counter()
+        events = data if spec is None else resample(data, spec)
+        aggregate = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        Engine(seed=0).run(events, build_strategies(data.symbols))
+        run = time.perf_counter() - t0
+        rows.append({'bars': spec or 'ticks', 'events': len(events), 'aggregate_s': aggregate, 'engine_s': run,
+                     'events_per_sec': len(events) / run, 'ticks_per_sec': len(data) / (aggregate + run)})
+    return rows
+
+
+def bench_checkpoint(n_days, ticks_per_day=50_000, n_symbols=5):
+    '''Seconds to replay n_days of ticks from scratch vs load a checkpoint, run the last day and save.'''
+    from checkpoint import load_checkpoint, save_checkpoint
+    from engine import Engine
+    from models import MarketDataColumns
+    data = make_columns(n_symbols, n_days * ticks_per_day // n_symbols)
+    history = len(data) - ticks_per_day
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.ckpt')
+        engine, strategies = Engine(seed=0), build_strategies(data.symbols)
+        engine.run_chronological(MarketDataColumns(data.timestamps[:history], data.symbol_ids[:history],
+                                                   data.symbols, data.prices[:history]), strategies)
+        save_checkpoint(path, engine, strategies)
+        size = os.path.getsize(path)
+
+        t0 = time.perf_counter()
+        Engine(seed=0).run_chronological(data, build_strategies(data.symbols))
+        replay = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        engine, strategies = load_checkpoint(path)
+        engine.run_chronological(data, strategies)
+        save_checkpoint(path, engine, strategies)
+        resume = time.perf_counter() - t0
+    return [{'mode': 'full_replay', 'ticks': len(data), 'seconds': replay},
+            {'mode': 'resume_last_day', 'ticks': ticks_per_day, 'seconds': resume,
+             'checkpoint_mb': size / 1e6, 'speedup': replay / resume}]
+
+
+STARTUP_RUNS = (
+    ('import_main', ['-c', 'import main']),
+    ('first_run', ['{main}', '--ticks', '{ticks}']),
+    ('reuse_no_plot_no_report', ['{main}', '--reuse-data', '--no-plot', '--no-report']),
+)
+
+
+def bench_startup(ticks=500, repeat=3):
+    '''
+    Best-of-`repeat` wall time of each STARTUP_RUNS command in a fresh
+    interpreter (in a scratch directory, so generated data and the cache are
+    the run's own), with the import time and module count -X importtime reports.
+    '''
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, args in STARTUP_RUNS:
+            cmd = [sys.executable, '-X', 'importtime']
+            cmd += [a.format(main=os.path.join(here, 'main.py'), ticks=ticks) for a in args]
+            best = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                proc = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True, check=True)
+                elapsed = time.perf_counter() - t0
+                # "import time: self [us] | cumulative | imported package", one line per module
+                self_us = [int(line.split('|')[0].split(':')[1]) for line in proc.stderr.splitlines()
+                           if line.startswith('import time:') and line.split('|')[0].split(':')[1].strip().isdigit()]
+                if best is None or elapsed < best['seconds']:
+                    best = {'run': name, 'seconds': elapsed, 'import_ms': sum(self_us) / 1000,
+                            'modules': len(self_us)}
+            rows.append(best)
+    return rows
+
+
+def _measure_streaming(mode, path, symbols, spill_dir):
+    from engine import Engine
+    from models import load_market_data
+    logging.disable(logging.CRITICAL)
+    engine = Engine(seed=0)
+    t0 = time.perf_counter()
+    if mode == 'in_memory':
+        engine.run_chronological(load_market_data(path), build_strategies(symbols))
+        sharpe = engine.performance_metrics()['sharpe']
+    else:
+        sharpe = engine.run_streaming(path, build_strategies(symbols), spill_dir=spill_dir,
+                                      chunk_rows=100_000)['metrics']['sharpe']
+    return {'mode': mode, 'seconds': time.perf_counter() - t0, 'peak_rss_mb': _peak_rss_mb(), 'sharpe': sharpe}
+
+
+def bench_streaming(n_rows):
+    '''Peak RSS of run_chronological on a loaded CSV vs run_streaming with a spill directory.'''
+    from data_generator import generate_bulk_market_data
+    symbols = list(SUITE_SYMBOLS)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stream.csv')
+        generate_bulk_market_data(path, symbols, 100.0, 0.01, n_rows // len(symbols), seed=16)
+        rows = [_in_fresh_process(_measure_streaming, mode, path, symbols, os.path.join(tmp, 'spill'))
+                for mode in ('in_memory', 'streaming')]
+    for r in rows:
+        r['rows'] = n_rows
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Reproducible suite
+
+SUITE_SYMBOLS = ('AAPL', 'MSFT', 'NVDA', 'META', 'AMC')
+LOADER_ROWS = {'quick': (10_000,), 'default': (10_000, 1_000_000), 'full': (10_000, 1_000_000, 10_000_000)}
+ENGINE_SYMBOLS = {'quick': (1, 10), 'default': (1, 10, 100), 'full': (1, 10, 100, 1_000)}
+
+
+def suite_dataset(data_dir, rows):
+    '''Seeded CSV of `rows` rows (round-robin over SUITE_SYMBOLS), generated once per data_dir.'''
+    from data_generator import generate_bulk_market_data
+    path = os.path.join(data_dir, f"suite_{rows}.csv")
+    if not os.path.exists(path):
+        per_symbol = -(-rows // len(SUITE_SYMBOLS))
+        generate_bulk_market_data(path + '.tmp', SUITE_SYMBOLS, 100.0, 0.01, per_symbol, seed=15)
+        with open(path + '.tmp') as src, open(path, 'w') as dst:
+            # trim the last round to exactly `rows` data rows
+            for i, line in enumerate(src):
+                if i > rows:
+                    break
+                dst.write(line)
+        os.unlink(path + '.tmp')
+    return path
+
+
+def suite_cases(scale):
+    '''(name, case function, kwargs) for every case at this scale.'''
+    cases = [(f"loader/load_market_data/{rows}", _case_loader, {'rows': rows}) for rows in LOADER_ROWS[scale]]
+    cases += [(f"strategy/{name}", _case_strategy, {'strategy': name, 'ticks': 200_000})
+              for name in ('MovingAverageStrategy', 'MomentumStrategy')]
+    cases += [(f"engine/run/symbols={n}", _case_engine, {'n_symbols': n, 'ticks': 100_000})
+              for n in ENGINE_SYMBOLS[scale]]
+    cases += [("metrics/performance_metrics", _case_metrics, {'points': 1_000_000}),
+              ("report/save_report", _case_report, {'points': 100_000}),
+              ("report/try_plot_equity", _case_plot, {'points': 100_000})]
+    return cases
+
+
+def _case_loader(data_dir, rows):
+    from models import load_market_data
+    path = suite_dataset(data_dir, rows)
+    t0 = time.perf_counter()
+    data = load_market_data(path)
+    return time.perf_counter() - t0, len(data)
+
+
+def _case_strategy(data_dir, strategy, ticks):
+    import strategies
+    from models import MarketDataPoint
+    start = datetime.datetime(2025, 1, 1, 9, 30)
+    prices = make_columns(1, ticks, seed=15).prices.tolist()
+    stream = [MarketDataPoint(start + datetime.timedelta(microseconds=i), 'S0000', p) for i, p in enumerate(prices)]
+    strat = getattr(strategies, strategy)('S0000')
+    generate = strat.generate_signals
+    t0 = time.perf_counter()
+    for tick in stream:
+        generate(tick)
+    return time.perf_counter() - t0, ticks
+
+
+def _case_engine(data_dir, n_symbols, ticks):
+    from engine import Engine
+    data = make_columns(n_symbols, ticks // n_symbols, seed=15)
+    strategies = build_strategies(data.symbols)
+    t0 = time.perf_counter()
+    Engine(seed=0).run(data, strategies)
+    return time.perf_counter() - t0, len(data)
+
+
+def _synthetic_engine(points, n_symbols=5):
+    '''An Engine holding seeded equity curves, as if a run had just finished.'''
+    import numpy as np
+    from engine import Engine
+    engine = Engine()
+    rng = np.random.default_rng(15)
+    start = datetime.datetime(2025, 1, 1, 9, 30)
+    per_symbol = points // n_symbols
+    times = [start + datetime.timedelta(microseconds=i) for i in range(per_symbol)]
+    for k in range(n_symbols):
+        values = 100_000 * np.cumprod(1 + rng.normal(0, 0.001, per_symbol))
+        engine.equity_by_symbol[f"S{k:04d}"] = list(zip(times, values.tolist()))
+    return engine
+
+
+def bench_report(lengths, n_symbols=5):
+    '''save_report time and min/max decimation time per symbol for each total curve length.'''
+    from reporting import decimate_curve, save_report
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for points in lengths:
+            engine = _synthetic_engine(points, n_symbols)
+            metrics = engine.performance_metrics()
+            t0 = time.perf_counter()
+            save_report(os.path.join(tmp, 'report.md'), metrics, engine.equity_by_symbol)
+            report_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for curve in engine.equity_by_symbol.values():
+                decimate_curve(curve)
+            rows.append({'points': points, 'save_report_s': report_s,
+                         'decimate_per_symbol_s': (time.perf_counter() - t0) / n_symbols,
+                         'report_bytes': os.path.getsize(os.path.join(tmp, 'report.md'))})
+    return rows
+
+
+def _case_metrics(data_dir, points):
+    engine = _synthetic_engine(points)
+    t0 = time.perf_counter()
+    engine.performance_metrics()
+    return time.perf_counter() - t0, points
+
+
+def _case_report(data_dir, points):
+    from reporting import save_report
+    engine = _synthetic_engine(points)
+    metrics = engine.performance_metrics()
+    t0 = time.perf_counter()
+    save_report(os.path.join(data_dir, 'suite_report.md'), metrics, engine.equity_by_symbol)
+    return time.perf_counter() - t0, points
+
+
+def _case_plot(data_dir, points):
+    from main import try_plot_equity
+    engine = _synthetic_engine(points)
+    t0 = time.perf_counter()
+    if try_plot_equity(engine.equity_by_symbol, os.path.join(data_dir, 'suite_equity.png')) is None:
+        raise ImportError("matplotlib is not available")
+    return time.perf_counter() - t0, points
+
+
+def _run_case(fn, kwargs, data_dir, repeat):
+    '''Run one case `repeat` times in this (fresh) process; keep the fastest.'''
+    logging.disable(logging.CRITICAL)
+    base_rss = _peak_rss_mb()
+    try:
+        timings = [fn(data_dir, **kwargs) for _ in range(repeat)]
+    except ImportError as e:
+        return {'skipped': str(e)}
+    seconds, items = min(timings)
+    return {
+        'seconds': seconds,
+        'items': items,
+        'items_per_sec': items / seconds if seconds > 0 else float('inf'),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_growth_mb': _peak_rss_mb() - base_rss,
+    }
+
+
+def run_suite(scale='default', repeat=3, data_dir=None, only=None):
+    '''Run every suite case in its own spawned process and return the JSON-ready results.'''
+    import numpy as np
+    results = {}
+    with contextlib.ExitStack() as stack:
+        if data_dir is None:
+            data_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        for name, fn, kwargs in suite_cases(scale):
+            if only and not any(part in name for part in only):
+                continue
+            results[name] = _in_fresh_process(_run_case, fn, kwargs, data_dir, repeat)
+    return {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'scale': scale,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def compare_to_baseline(current, baseline, threshold):
+    '''
+    Rows comparing each case's seconds against the baseline run; a case
+    regresses when it is more than `threshold` (a fraction) slower.
+    '''
+    rows = []
+    for name, res in current['results'].items():
+        base = baseline['results'].get(name)
+        if 'seconds' not in res or not base or 'seconds' not in base:
+            continue
+        ratio = res['seconds'] / base['seconds'] if base['seconds'] > 0 else float('inf')
+        rows.append({'case': name, 'baseline_s': base['seconds'], 'current_s': res['seconds'],
+                     'ratio': ratio, 'regression': ratio > 1.0 + threshold})
+    return rows
+
+
+def _print_suite(report):
+    for name, res in report['results'].items():
+        if 'skipped' in res:
+            print(f"{name:<40} skipped ({res['skipped']})")
+        else:
+            print(f"{name:<40} {res['seconds']:9.4f}s  {res['items_per_sec']:>14,.0f}/s  "
+                  f"peak {res['peak_rss_mb']:8.1f} MB")
+
+
+def _print_rows(rows):
+    for r in rows:
+        print("  ".join(f"{k}={v:,.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in r.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='bench', required=True)
+    p = sub.add_parser('loader', help='CSV loader rows/sec and peak RSS')
+    p.add_argument('--rows', type=int, default=1_000_000)
+    p.add_argument('--csv', help='existing CSV to load instead of a generated one')
+    p = sub.add_parser('parallel', help='Engine.run isolated mode scaling with worker count')
+    p.add_argument('--symbols', type=int, default=500)
+    p.add_argument('--ticks', type=int, default=1_000, help='ticks per symbol')
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    p = sub.add_parser('ticks', help='bytes per tick and construction/sort rates, dataclass vs Tick')
+    p.add_argument('--rows', type=int, default=1_000_000)
+    p = sub.add_parser('indicators', help='per-tick cost of incremental indicators vs window length')
+    p.add_argument('--windows', type=int, nargs='+', default=[5, 20, 50, 200, 500])
+    p = sub.add_parser('equity', help='incremental vs full equity per tick as symbol count grows')
+    p.add_argument('--symbols', type=int, nargs='+', default=[5, 50, 500, 5_000])
+    p = sub.add_parser('live', help='async engine latency against simulated concurrent feeds')
+    p.add_argument('--symbols', type=int, default=1_000)
+    p.add_argument('--ticks', type=int, default=50, help='ticks per feed')
+    p.add_argument('--interval', type=float, default=0.05, help='seconds between ticks of one feed')
+    p.add_argument('--queue', type=int, default=1_024, help='fan-in queue capacity')
+    p = sub.add_parser('ledger', help='trade ledger bytes per trade and fills per second')
+    p.add_argument('--trades', type=int, default=500_000)
+    p = sub.add_parser('metrics', help='vectorized vs looped metrics on one long equity curve')
+    p.add_argument('--points', type=int, default=10_000_000)
+    p.add_argument('--window', type=int, default=1_000, help='rolling window length')
+    p = sub.add_parser('streaming', help='peak memory of in-memory vs streaming runs')
+    p.add_argument('--rows', type=int, default=2_000_000)
+    p = sub.add_parser('fills', help='execution model fills per second, per order vs batched')
+    p.add_argument('--orders', type=int, default=1_000_000)
+    p = sub.add_parser('montecarlo', help='blocked Monte Carlo paths vs one engine run per path')
+    p.add_argument('--paths', type=int, default=10_000)
+    p.add_argument('--ticks', type=int, default=500, help='ticks per symbol and path')
+    p = sub.add_parser('bars', help='engine throughput on raw ticks vs tick and time bars')
+    p.add_argument('--rows', type=int, default=1_000_000)
+    p.add_argument('--specs', nargs='+', default=['10t', '100t', '1000t', '1ms', '10ms'],
+                   help='bar specs: <n>t for tick bars, <n>us/ms/s/m/h/d for time bars')
+    p = sub.add_parser('checkpoint', help='full replay vs resuming from a checkpoint for one new day')
+    p.add_argument('--days', type=int, default=20)
+    p.add_argument('--ticks', type=int, default=50_000, help='ticks per day, across all symbols')
+    p = sub.add_parser('startup', help='main.py wall and import time in fresh interpreters')
+    p.add_argument('--ticks', type=int, default=500, help='ticks per symbol for the first run')
+    p.add_argument('--repeat', type=int, default=3, help='runs per command; the fastest is kept')
+    p = sub.add_parser('report', help='report and plot decimation time vs curve length')
+    p.add_argument('--points', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    p = sub.add_parser('suite', help='reproducible suite with JSON output and baseline comparison')
+    p.add_argument('--scale', choices=sorted(LOADER_ROWS), default='default',
+                   help='dataset sizes: quick (10k rows), default (up to 1M), full (up to 10M)')
+    p.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest is kept')
+    p.add_argument('--only', nargs='+', help='run only cases whose name contains one of these')
+    p.add_argument('--data-dir', help='keep generated datasets here between runs')
+    p.add_argument('--out', help='write results as JSON')
+    p.add_argument('--baseline', help='JSON from an earlier suite run to compare against')
+    p.add_argument('--threshold', type=float, default=0.2,
+                   help='flag cases more than this fraction slower than the baseline')
+    args = parser.parse_args(argv)
+    # engine rejections are logged per order; keep them out of the timings
+    logging.disable(logging.CRITICAL)
+
+    if args.bench == 'loader':
+        if args.csv:
+            _print_rows(bench_loader(args.csv))
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.csv')
+                write_benchmark_csv(path, args.rows)
+                _print_rows(bench_loader(path))
+    elif args.bench == 'parallel':
+        _print_rows(bench_parallel(args.symbols, args.ticks, args.workers))
+    elif args.bench == 'ticks':
+        _print_rows(bench_ticks(args.rows))
+    elif args.bench == 'indicators':
+        _print_rows(bench_indicators(args.windows))
+    elif args.bench == 'equity':
+        _print_rows(bench_equity(args.symbols))
+    elif args.bench == 'live':
+        _print_rows(bench_live(args.symbols, args.ticks, args.interval, args.queue))
+    elif args.bench == 'ledger':
+        _print_rows(bench_ledger(args.trades))
+    elif args.bench == 'metrics':
+        _print_rows(bench_metrics(args.points, args.window))
+    elif args.bench == 'streaming':
+        _print_rows(bench_streaming(args.rows))
+    elif args.bench == 'fills':
+        _print_rows(bench_fills(args.orders))
+    elif args.bench == 'montecarlo':
+        _print_rows(bench_montecarlo(args.paths, args.ticks))
+    elif args.bench == 'bars':
+        _print_rows(bench_bars(args.rows, args.specs))
+    elif args.bench == 'checkpoint':
+        _print_rows(bench_checkpoint(args.days, args.ticks))
+    elif args.bench == 'startup':
+        _print_rows(bench_startup(args.ticks, args.repeat))
+    elif args.bench == 'report':
+        _print_rows(bench_report(args.points))
+    elif args.bench == 'suite':
+        if args.data_dir:
+            os.makedirs(args.data_dir, exist_ok=True)
+        report = run_suite(args.scale, args.repeat, args.data_dir, args.only)
+        _print_suite(report)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(report, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                rows = compare_to_baseline(report, json.load(f), args.threshold)
+            _print_rows(rows)
+            regressions = [r['case'] for r in rows if r['regression']]
+            if regressions:
+                print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+On-disk cache of per-symbol backtest results.
+
+Each entry holds one symbol's isolated sub-portfolio run (cash, positions,
+last price, trades and equity curve), keyed by a SHA-256 over everything
+that determines it: the symbol's ticks, its strategies' classes and
+params(), and the engine settings (starting cash, execution model, seed).
+Changing one symbol's data or strategy therefore only invalidates that
+symbol. Entries are evicted least-recently-used once the directory grows
+past `max_bytes`.
+
+    engine.run(ticks, strategies, cache=ResultCache())
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from models import SymbolTicks
+
+# bump whenever a change to the engine or strategies alters results
+CACHE_VERSION = 5
+_SUFFIX = '.pkl'
+
+
+def data_fingerprint(ticks) -> str:
+    '''SHA-256 of one symbol's timestamps and prices (SymbolTicks or a list of ticks).'''
+    if isinstance(ticks, SymbolTicks):
+        times, prices = ticks.timestamps, ticks.prices
+    else:
+        times = [t.timestamp for t in ticks]
+        prices = [t.price for t in ticks]
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(np.asarray(times, dtype='datetime64[us]').astype('<i8')).tobytes())
+    h.update(np.ascontiguousarray(np.asarray(prices, dtype='<f8')).tobytes())
+    return h.hexdigest()
+
+
+def strategy_signature(strat) -> List[Any]:
+    '''Class path and params() of one strategy (or execution model) instance.'''
+    cls = type(strat)
+    return [f"{cls.__module__}.{cls.__qualname__}", strat.params()]
+
+
+def symbol_key(symbol: str, ticks, strat_list, initial_cash: float, execution, seed) -> str:
+    '''Cache key of one isolated per-symbol run.'''
+    spec = {
+        'version': CACHE_VERSION,
+        'symbol': symbol,
+        'data': data_fingerprint(ticks),
+        'strategies': [strategy_signature(s) for s in strat_list],
+        'initial_cash': repr(float(initial_cash)),
+        'execution': strategy_signature(execution),
+        'seed': str(seed),
+    }
+    blob = json.dumps(spec, sort_keys=True, default=repr).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of pickled per-symbol results, one file per key. A hit
+    refreshes the file's mtime, which is the LRU order used for eviction.
+    """
+    def __init__(self, directory: str = '.backtest_cache', max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                output = _unpack(pickle.load(f))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # truncated, corrupt or stale (pickled from a class or module
+            # since renamed): a miss, and the entry is dropped
+            self.misses += 1
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)
+        self.hits += 1
+        return output
+
+    def put(self, key: str, output: Dict[str, Any]) -> None:
+        # write-then-rename so a concurrent reader never sees a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(_pack(output), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIX):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, name))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def evict(self) -> None:
+        '''Delete least-recently-used entries until the cache fits in max_bytes.'''
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, name in self._entries():
+            os.unlink(os.path.join(self.directory, name))
+
+
+def _pack(output: Dict[str, Any]) -> Dict[str, Any]:
+    # the equity curve is stored as two arrays rather than a list of tuples
+    entry = dict(output)
+    curve = entry.pop('equity_curve')
+    entry['curve_times'] = np.array([t for t, _ in curve], dtype='datetime64[us]')
+    entry['curve_values'] = np.fromiter((v for _, v in curve), dtype=np.float64, count=len(curve))
+    return entry
+
+
+def _unpack(entry: Dict[str, Any]) -> Dict[str, Any]:
+    output = dict(entry)
+    times = output.pop('curve_times')
+    values = output.pop('curve_values')
+    output['equity_curve'] = list(zip(times.tolist(), values.tolist()))
+    return output
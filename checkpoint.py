@@ -0,0 +1,97 @@
+"""
+Checkpoints of a chronological run, for incremental backtests.
+
+A checkpoint holds everything a run_chronological replay has built up:
+the engine's cash, positions, last prices, running market value, trade
+ledger, execution model and per-symbol RNG streams, the portfolio equity
+curve, and the strategies with their indicator state. Restoring it and
+calling run_chronological processes only the ticks after the checkpoint,
+with results identical to replaying everything. Given only the new ticks
+(new_only=True), a resume costs O(new ticks) whatever the input format;
+given the full dataset, it skips as many ticks of each symbol as the
+checkpointed run consumed, which avoids touching the history only for a
+tick store (a CSV is still loaded and sorted whole).
+
+    engine.run_chronological(history, strategies)
+    save_checkpoint('book.ckpt', engine, strategies)
+    ...
+    engine, strategies = load_checkpoint('book.ckpt')
+    engine.run_chronological(load_market_data_columnar('today.csv'), strategies, new_only=True)
+    save_checkpoint('book.ckpt', engine, strategies)
+
+The file is one pickle; the equity curve is stored as two arrays and the
+ledger and position book as their column arrays, so saving and loading
+are array copies rather than per-tick Python work.
+"""
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from engine import PORTFOLIO, Engine
+from metrics import curve_times, curve_values
+
+# bump whenever the engine or strategy state layout changes
+CHECKPOINT_VERSION = 5
+
+# Engine attributes that make up its state between ticks
+ENGINE_STATE = ('cash', 'failure_rate', 'execution', 'seed', '_seed', '_rngs', 'last_price', 'symbols',
+                'positions', '_mv_partials', '_mv_by_symbol', 'trades', 'order_counts', 'ticks_consumed')
+
+
+def save_checkpoint(path, engine: Engine, strategies) -> None:
+    '''
+    Write the state of `engine` after a run_chronological call, and of its
+    {symbol: [Strategy, ...]} `strategies`, to `path` (atomically).
+    '''
+    curve = engine.equity_by_symbol.get(PORTFOLIO)
+    if not curve:
+        raise ValueError("Checkpoints cover run_chronological runs; this engine has no portfolio curve")
+    state = {
+        'version': CHECKPOINT_VERSION,
+        'engine': {name: getattr(engine, name) for name in ENGINE_STATE},
+        'curve_times': _extend(getattr(engine, '_restored_curve', None), curve, 0, curve_times),
+        'curve_values': _extend(getattr(engine, '_restored_curve', None), curve, 1, curve_values),
+        # pickled together with the engine so shared IndicatorSets stay shared
+        'strategies': dict(strategies),
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_checkpoint(path):
+    '''
+    (engine, strategies) restored from `path`. The engine's next
+    run_chronological extends the restored equity curve, skipping the ticks
+    of each symbol the checkpoint already consumed unless new_only.
+    '''
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is a version {state.get('version')} checkpoint; "
+                         f"expected version {CHECKPOINT_VERSION}")
+    engine = Engine()
+    for name, value in state['engine'].items():
+        setattr(engine, name, value)
+    engine.equity_curve = list(zip(state['curve_times'].tolist(), state['curve_values'].tolist()))
+    engine.equity_by_symbol = {PORTFOLIO: engine.equity_curve}
+    engine.resume_from = dict(engine.ticks_consumed)
+    # the curve as loaded, so the next save converts only the points added since
+    engine._restored_curve = (engine.equity_curve, state['curve_times'], state['curve_values'])
+    return engine, state['strategies']
+
+
+def _extend(restored, curve, column, convert):
+    '''`convert`(curve), reusing the restored array for the prefix of a curve that was only appended to.'''
+    if restored is not None and restored[0] is curve and len(curve) >= len(restored[column + 1]):
+        loaded = restored[column + 1]
+        return np.concatenate((loaded, convert(curve[len(loaded):])))
+    return convert(curve)
@@ -5,8 +5,13 @@ import datetime
 import random
 import time
 import csv
+import numpy as np
+
+# shared stream of the market_data_generator feeds that are given no rng,
+# seeded as the global `random` once was so their paths stay reproducible
+_LEGACY_RNG = random.Random(42)
+
 
-random.seed(42)
 @dataclass(frozen=True)
 class MarketDataPoint:
     timestamp: datetime.datetime
@@ -17,7 +22,8 @@ def market_data_generator(
     symbol: str,
     start_price: float,
     volatility: float = 0.01,
-    interval: float = 0.1
+    interval: float = 0.1,
+    rng: random.Random = None
 ):
     """
     Simulates a live market data feed for a given symbol using a
@@ -27,11 +33,13 @@ def market_data_generator(
     :param start_price: Initial price.
     :param volatility: Std dev of returns per tick.
     :param interval: Pause in seconds between ticks.
+    :param rng: Optional random.Random (defaults to a stream seeded with 42 shared by all such feeds).
     :yield: MarketDataPoint(timestamp, symbol, price)
     """
+    gauss = (rng or _LEGACY_RNG).gauss
     price = start_price
     while True:
-        delta = random.gauss(0, volatility)
+        delta = gauss(0, volatility)
         price *= 1 + delta
         price = round(price, 2)
 
@@ -44,13 +52,103 @@ def market_data_generator(
         time.sleep(interval)
 
 
+async def async_market_data_generator(
+    symbol: str,
+    start_price: float,
+    volatility: float = 0.01,
+    interval: float = 0.1,
+    rng: random.Random = None
+):
+    """
+    Async variant of market_data_generator: awaits asyncio.sleep between
+    ticks so many feeds can run concurrently on one event loop.
+
+    :param symbol: Ticker symbol (e.g., "AAPL").
+    :param start_price: Initial price.
+    :param volatility: Std dev of returns per tick.
+    :param interval: Pause in seconds between ticks.
+    :param rng: Optional random.Random (defaults to a private one per feed, seeded from 42 and the symbol).
+    :yield: MarketDataPoint(timestamp, symbol, price)
+    """
+    import asyncio
+    # str seeds hash with SHA-512, so the default path is the same in every process
+    gauss = (rng or random.Random(f"42:{symbol}")).gauss
+    price = start_price
+    while True:
+        delta = gauss(0, volatility)
+        price *= 1 + delta
+        price = round(price, 2)
+
+        yield MarketDataPoint(
+            timestamp=datetime.datetime.now(),
+            symbol=symbol,
+            price=price
+        )
+
+        await asyncio.sleep(interval)
+
+
+async def fan_in(feeds, maxsize: int = 1024, max_ticks_per_feed: int = None):
+    """
+    Merge several async tick feeds into one async iterator through a bounded
+    asyncio.Queue. Producers block on a full queue, so a slow consumer
+    applies backpressure to every feed instead of buffering without limit.
+    Every feed is closed when it ends, fails, or the merged iterator is
+    closed.
+
+    :param feeds: Async iterators of MarketDataPoint (e.g. async_market_data_generator).
+    :param maxsize: Queue capacity.
+    :param max_ticks_per_feed: Stop each feed after this many ticks (None = run until the consumer stops).
+    :yield: MarketDataPoint in arrival order.
+    """
+    import asyncio
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    done = object()
+
+    async def produce(feed):
+        count = 0
+        try:
+            async for tick in feed:
+                await queue.put(tick)
+                count += 1
+                if max_ticks_per_feed is not None and count >= max_ticks_per_feed:
+                    break
+        except Exception as e:
+            # hand feed failures to the consumer instead of stalling it
+            await queue.put(e)
+        else:
+            await queue.put(done)
+        finally:
+            # a producer cancelled while blocked on a full queue has left its
+            # feed suspended; close it so the feed's cleanup runs now
+            if hasattr(feed, 'aclose'):
+                await feed.aclose()
+
+    producers = [asyncio.create_task(produce(feed)) for feed in feeds]
+    remaining = len(producers)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        for task in producers:
+            task.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+
 def generate_market_csv(
     symbol: str,
     start_price: float,
     filename: str,
     num_ticks: int = 100,
     volatility: float = 0.01,
-    interval: float = 0.0
+    interval: float = 0.0,
+    store_filename: str = None
 ):
     """
     Generates `num_ticks` of market data and writes them to a CSV file.
@@ -61,6 +159,7 @@ def generate_market_csv(
     :param num_ticks: Number of ticks to generate.
     :param volatility: Std dev of returns per tick.
     :param interval: Pause in seconds between ticks (set to 0 for fast generation).
+    :param store_filename: Optional path to also write the ticks as a binary tick store.
     """
     gen = market_data_generator(
         symbol=symbol,
@@ -69,6 +168,7 @@ def generate_market_csv(
         interval=interval
     )
 
+    ticks = []
     with open(filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
         # Header
@@ -78,6 +178,128 @@ def generate_market_csv(
             tick = next(gen)
             # Write ISO-formatted timestamp for easy parsing later
             writer.writerow([tick.timestamp.isoformat(), tick.symbol, tick.price])
+            if store_filename:
+                ticks.append(tick)
+
+    if store_filename:
+        # imported here: tickstore -> models -> data_generator
+        from models import MarketDataColumns
+        from tickstore import write_tick_store
+        write_tick_store(store_filename, MarketDataColumns.from_ticks(ticks))
+
+
+def _symbol_rngs(seed: int, n_symbols: int):
+    '''One independent Generator per symbol, so a symbol's path never depends on the others.'''
+    return [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(n_symbols)]
+
+
+def _price_chunks(rng, start_price: float, volatility: float, num_ticks: int, chunk_size: int):
+    '''
+    Yield a symbol's price path in chunks: Gaussian returns drawn in bulk and
+    compounded with a cumulative product carried across chunks. The path is
+    the same for any chunk size. Prices are rounded to cents on output only.
+    '''
+    last = float(start_price)
+    for start in range(0, num_ticks, chunk_size):
+        returns = rng.normal(0.0, volatility, size=min(chunk_size, num_ticks - start))
+        path = np.cumprod(np.concatenate(([last], 1.0 + returns)))[1:]
+        last = path[-1]
+        yield np.round(path, 2)
+
+
+def _bulk_timestamps(start: datetime.datetime, tick_interval_us: int, lo: int, hi: int):
+    '''Deterministic synthetic timestamps for tick numbers [lo, hi).'''
+    return np.datetime64(start, 'us') + (np.arange(lo, hi, dtype=np.int64) * tick_interval_us).astype('m8[us]')
+
+
+def _fill_store_prices(args):
+    '''Worker: write one symbol's price column slice into a preallocated tick store.'''
+    filename, offset, seed, index, n_symbols, start_price, volatility, num_ticks, chunk_size = args
+    rng = _symbol_rngs(seed, n_symbols)[index]
+    column = np.memmap(filename, dtype='<f8', mode='r+', offset=offset, shape=(num_ticks,))
+    pos = 0
+    for chunk in _price_chunks(rng, start_price, volatility, num_ticks, chunk_size):
+        column[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+    column.flush()
+
+
+def generate_bulk_market_data(
+    filename: str,
+    symbols,
+    start_prices,
+    volatilities,
+    num_ticks: int,
+    seed: int = 42,
+    fmt: str = 'csv',
+    start: datetime.datetime = datetime.datetime(2025, 1, 1, 9, 30),
+    tick_interval_us: int = 1_000,
+    chunk_size: int = 1_000_000,
+    workers: int = 1
+):
+    """
+    NumPy bulk generator for large synthetic datasets, reproducible from `seed`.
+
+    Each symbol draws its returns from its own child of SeedSequence(seed),
+    so output is identical for any chunk size and any number of workers.
+    Tick i of every symbol is stamped start + i * tick_interval_us. Memory
+    is bounded by `chunk_size` ticks per symbol.
+
+    :param filename: Output path.
+    :param symbols: Ticker symbols.
+    :param start_prices: Initial price per symbol (or one price for all).
+    :param volatilities: Std dev of returns per tick, per symbol (or one for all).
+    :param num_ticks: Ticks per symbol.
+    :param seed: Seed for the whole dataset.
+    :param fmt: 'csv' (round-robin rows like generate_merged_market_csv) or 'store' (binary tick store).
+    :param start: Timestamp of the first tick.
+    :param tick_interval_us: Microseconds between consecutive ticks of a symbol.
+    :param chunk_size: Ticks per symbol generated at a time.
+    :param workers: Processes used to fill price columns ('store' only).
+    """
+    symbols = list(symbols)
+    n = len(symbols)
+    start_prices = list(start_prices) if np.ndim(start_prices) else [start_prices] * n
+    volatilities = list(volatilities) if np.ndim(volatilities) else [volatilities] * n
+
+    if fmt == 'store':
+        # imported here: tickstore -> models -> data_generator
+        from tickstore import write_header
+        with open(filename, 'wb') as f:
+            data_offset = write_header(f, {sym: num_ticks for sym in symbols})
+            # the timestamp column repeats the same per-symbol clock for every symbol
+            for _ in symbols:
+                for lo in range(0, num_ticks, chunk_size):
+                    _bulk_timestamps(start, tick_interval_us, lo, min(lo + chunk_size, num_ticks)).view('<i8').tofile(f)
+            # reserve the price column; workers fill it in place
+            f.truncate(data_offset + 16 * n * num_ticks)
+
+        prices_offset = data_offset + 8 * n * num_ticks
+        jobs = [(filename, prices_offset + 8 * i * num_ticks, seed, i, n, start_prices[i], volatilities[i],
+                 num_ticks, chunk_size) for i in range(n)]
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_fill_store_prices, jobs))
+        else:
+            for job in jobs:
+                _fill_store_prices(job)
+    elif fmt == 'csv':
+        rngs = _symbol_rngs(seed, n)
+        streams = [_price_chunks(rngs[i], start_prices[i], volatilities[i], num_ticks, chunk_size) for i in range(n)]
+        with open(filename, 'w', newline='') as f:
+            f.write('timestamp,symbol,price\n')
+            for lo in range(0, num_ticks, chunk_size):
+                hi = min(lo + chunk_size, num_ticks)
+                times = np.datetime_as_string(_bulk_timestamps(start, tick_interval_us, lo, hi), unit='us')
+                # ticks x symbols, flattened row-major into round-robin order
+                prices = np.stack([next(s) for s in streams], axis=1)
+                f.writelines(f"{t},{sym},{p:.2f}\n"
+                             for t, row in zip(times.tolist(), prices.tolist())
+                             for sym, p in zip(symbols, row))
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; use 'csv' or 'store'.")
+    return filename
 
 
 if __name__ == "__main__":
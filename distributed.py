@@ -0,0 +1,448 @@
+"""
+Sharded backtests over a work queue in a shared directory, for runs larger
+than one machine.
+
+A coordinator splits a job into shards and publishes them to a queue
+directory that every node can see (NFS, SMB, or a local directory on one
+machine). Workers on any node claim shards, run them and write one result
+file per shard; the coordinator merges the results. No service is needed
+beyond the file system.
+
+    python distributed.py submit --queue /shared/q --data /shared/ticks.store --shard-size 50
+    python distributed.py worker --queue /shared/q        # on every node, as many as wanted
+    python distributed.py collect --queue /shared/q --report performance.md
+
+    python distributed.py local --queue q --data market_data.ticks --workers 4   # one machine
+
+Jobs come in two kinds:
+
+    backtest  shards are ranges of symbols, each symbol run as one of
+              Engine.run's isolated sub-portfolios; collect_backtest merges
+              them with Engine.merge_isolated, giving the engine and results
+              of Engine.run(..., workers=n) for performance_metrics and
+              save_report.
+    sweep     shards are blocks of sweep configurations; collect_sweep ranks
+              the rows as run_sweep does.
+
+The queue directory holds job.pkl and pending/, claimed/, done/ and
+failed/. A worker claims a shard by renaming pending/<id>.json into
+claimed/. The rename is atomic, so exactly one worker gets the shard, and
+a heartbeat thread keeps the claimed file's mtime fresh while the shard
+runs. Results go to done/<id>.pkl by write-then-rename. A claim older than
+the lease belongs to a crashed worker: any worker, or the coordinator,
+moves it back to pending/, up to `max_attempts` times. A shard that raises
+goes to failed/ with its traceback. Shards are deterministic, so a shard
+that ends up running twice writes the same result.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from engine import DEFAULT_SEED, Engine, _run_symbol_shard
+from execution import RandomFailure
+from indicators import IndicatorSet
+from metrics import curve_metrics, curve_values, traded_notional
+from strategies import MomentumStrategy, MovingAverageStrategy
+
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 3
+DEFAULT_STRATEGIES = ((MovingAverageStrategy, {}), (MomentumStrategy, {}))
+_STATES = ('pending', 'claimed', 'done', 'failed')
+
+
+class WorkQueue:
+    """The shards of one job in `directory`; see the module docstring for the layout."""
+
+    def __init__(self, directory, lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _path(self, state, name=''):
+        return os.path.join(self.directory, state, name)
+
+    def publish(self, job: Dict[str, Any], shards: List[Dict[str, Any]]) -> None:
+        '''Write the job, then one pending file per shard ({'id': ..., ...}, JSON-serializable).'''
+        job_path = os.path.join(self.directory, 'job.pkl')
+        if os.path.exists(job_path):
+            raise FileExistsError(f"{self.directory} already holds a job")
+        for state in _STATES:
+            os.makedirs(self._path(state), exist_ok=True)
+        _write_atomic(job_path, pickle.dumps(dict(job, shards=len(shards)), protocol=pickle.HIGHEST_PROTOCOL))
+        for shard in shards:
+            _write_atomic(self._path('pending', f"{shard['id']}.json"), json.dumps(dict(shard, attempts=0)).encode())
+
+    def job(self) -> Dict[str, Any]:
+        with open(os.path.join(self.directory, 'job.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    def _names(self, state, suffix):
+        try:
+            return sorted(name for name in os.listdir(self._path(state)) if name.endswith(suffix))
+        except FileNotFoundError:
+            return []
+
+    def counts(self) -> Dict[str, int]:
+        '''Shards in each state.'''
+        return {state: len(self._names(state, '.pkl' if state == 'done' else '.json')) for state in _STATES}
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        '''Take one pending shard for this process, or None if none is pending.'''
+        for name in self._names('pending', '.json'):
+            source, target = self._path('pending', name), self._path('claimed', name)
+            try:
+                # a rename keeps the mtime, and a requeued shard's is stale;
+                # refresh it first so the claim never appears expired
+                os.utime(source)
+                os.rename(source, target)
+            except FileNotFoundError:
+                continue  # another worker got it first
+            with open(target) as f:
+                return json.load(f)
+        return None
+
+    def is_done(self, shard_id) -> bool:
+        return os.path.exists(self._path('done', f"{shard_id}.pkl"))
+
+    @contextlib.contextmanager
+    def heartbeat(self, shard_id):
+        '''Keep the claim on `shard_id` fresh, every quarter lease, while the block runs.'''
+        path = self._path('claimed', f"{shard_id}.json")
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 4):
+                with contextlib.suppress(FileNotFoundError):
+                    os.utime(path)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, shard, result) -> None:
+        _write_atomic(self._path('done', f"{shard['id']}.pkl"), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        _unlink(self._path('claimed', f"{shard['id']}.json"))
+
+    def release(self, shard) -> None:
+        '''Drop a claim without a result (the shard is already done).'''
+        _unlink(self._path('claimed', f"{shard['id']}.json"))
+
+    def fail(self, shard, error: str) -> None:
+        _write_atomic(self._path('failed', f"{shard['id']}.json"), json.dumps(dict(shard, error=error)).encode())
+        _unlink(self._path('claimed', f"{shard['id']}.json"))
+
+    def requeue_expired(self) -> List[str]:
+        '''
+        Move claims not refreshed within the lease back to pending/ (or to
+        failed/ once a shard has expired max_attempts times); returns their ids.
+        '''
+        requeued = []
+        now = time.time()
+        for name in self._names('claimed', '.json'):
+            path = self._path('claimed', name)
+            try:
+                if now - os.stat(path).st_mtime <= self.lease_seconds:
+                    continue
+                # take the stale claim over atomically, so only one process requeues it
+                stale = f"{path}.{socket.gethostname()}-{os.getpid()}.stale"
+                os.rename(path, stale)
+            except FileNotFoundError:
+                continue
+            with open(stale) as f:
+                shard = json.load(f)
+            if not self.is_done(shard['id']):
+                shard['attempts'] += 1
+                if shard['attempts'] >= self.max_attempts:
+                    shard['error'] = f"claim expired {shard['attempts']} times"
+                    _write_atomic(self._path('failed', name), json.dumps(shard).encode())
+                else:
+                    _write_atomic(self._path('pending', name), json.dumps(shard).encode())
+                    requeued.append(shard['id'])
+            _unlink(stale)
+        return requeued
+
+    def failures(self) -> List[Dict[str, Any]]:
+        out = []
+        for name in self._names('failed', '.json'):
+            with open(self._path('failed', name)) as f:
+                out.append(json.load(f))
+        return out
+
+    def results(self) -> List[Any]:
+        '''Every shard result, in shard id order.'''
+        out = []
+        for name in self._names('done', '.pkl'):
+            with open(self._path('done', name), 'rb') as f:
+                out.append(pickle.load(f))
+        return out
+
+
+def _write_atomic(path, data: bytes) -> None:
+    # write-then-rename so a reader on any node never sees a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _unlink(path) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+def load_views(data):
+    '''{symbol: SymbolTicks} of a tick store (memory-mapped) or CSV path.'''
+    from models import load_market_data_columnar
+    from tickstore import is_tick_store, open_tick_store
+    return (open_tick_store(data) if is_tick_store(data) else load_market_data_columnar(data)).by_symbol()
+
+
+def build_strategies(symbol, spec=DEFAULT_STRATEGIES):
+    '''One instance of every (class, params) in `spec` for `symbol`, sharing one IndicatorSet.'''
+    indicators = IndicatorSet()
+    return [cls(symbol, indicators=indicators, **params) for cls, params in spec]
+
+
+def _shards(items, size, key):
+    return [{'id': f"{i:06d}", key: items[lo:lo + size]} for i, lo in enumerate(range(0, len(items), size))]
+
+
+def submit_backtest(directory, data, strategies=DEFAULT_STRATEGIES, shard_size: int = 50,
+                    initial_cash: float = 100_000, seed=None, execution=None, failure_rate: float = 0.01,
+                    vectorized: bool = False, symbols: List[str] = None) -> int:
+    '''
+    Publish an isolated per-symbol backtest of `data` (a tick store or CSV
+    path readable by every worker) in shards of `shard_size` symbols.
+    Settings mean what they do for Engine(...).run(..., workers=n):
+    each symbol gets initial_cash / len(symbols). `strategies` is a
+    sequence of (class, params) run on every symbol. Returns the number of
+    shards.
+    '''
+    if symbols is None:
+        symbols = list(load_views(data))
+    if not symbols:
+        raise ValueError(f"{data} holds no ticks")
+    job = {
+        'kind': 'backtest',
+        'data': os.path.abspath(data),
+        'symbols': list(symbols),
+        'strategies': tuple(strategies),
+        'initial_cash': initial_cash,
+        'allocation': initial_cash / len(symbols),
+        'seed': DEFAULT_SEED if seed is None else seed,
+        'execution': execution if execution is not None else RandomFailure(failure_rate),
+        'vectorized': vectorized,
+    }
+    shards = _shards(list(symbols), shard_size, 'symbols')
+    WorkQueue(directory).publish(job, shards)
+    return len(shards)
+
+
+def submit_sweep(directory, data, grids, block_size: int = 8, initial_cash: float = 100_000,
+                 seed: int = 0, execution=None) -> int:
+    '''
+    Publish a run_sweep over `grids` ({StrategyClass: {param: [values]}})
+    in blocks of `block_size` configurations. Returns the number of shards.
+    '''
+    from sweep import expand_configurations
+    n_configs = len(expand_configurations(grids))
+    job = {'kind': 'sweep', 'data': os.path.abspath(data), 'grids': grids, 'initial_cash': initial_cash,
+           'seed': seed, 'execution': execution}
+    shards = _shards(list(range(n_configs)), block_size, 'configs')
+    WorkQueue(directory).publish(job, shards)
+    return len(shards)
+
+
+def run_shard(job, shard, views) -> Dict[str, Any]:
+    '''Result of one shard: per-symbol outputs and metrics (backtest) or sweep rows.'''
+    t0 = time.perf_counter()
+    result = {'id': shard['id'], 'worker': f"{socket.gethostname()}:{os.getpid()}"}
+    if job['kind'] == 'backtest':
+        jobs = [(sym, views[sym], build_strategies(sym, job['strategies']), job['allocation'], job['seed'],
+                 job['execution'], job['vectorized']) for sym in shard['symbols']]
+        outputs = _run_symbol_shard(jobs)
+        result['outputs'] = outputs
+        result['metrics'] = {out['symbol']: curve_metrics(curve_values(out['equity_curve']),
+                                                          traded_notional(out['trades']))
+                             for out in outputs if out['equity_curve']}
+    else:
+        from sweep import evaluate_configs, expand_configurations
+        configs = expand_configurations(job['grids'])
+        result['rows'] = evaluate_configs(views, [(i, configs[i]) for i in shard['configs']],
+                                          job['initial_cash'], job['seed'], job['execution'])
+    result['seconds'] = time.perf_counter() - t0
+    return result
+
+
+def run_worker(directory, lease_seconds: float = LEASE_SECONDS, poll_seconds: float = 0.5,
+               max_attempts: int = MAX_ATTEMPTS) -> int:
+    '''
+    Claim and run shards from the queue in `directory` until nothing is
+    pending or claimed, recovering expired claims on the way. Returns the
+    number of shards this worker completed.
+    '''
+    queue = WorkQueue(directory, lease_seconds, max_attempts)
+    job = views = None
+    ran = 0
+    while True:
+        queue.requeue_expired()
+        shard = queue.claim()
+        if shard is None:
+            counts = queue.counts()
+            if not counts['pending'] and not counts['claimed']:
+                return ran
+            # others hold claims; wait in case one of them expires
+            time.sleep(poll_seconds)
+            continue
+        if queue.is_done(shard['id']):
+            queue.release(shard)
+            continue
+        if job is None:
+            job = queue.job()
+            views = load_views(job['data'])
+        try:
+            with queue.heartbeat(shard['id']):
+                result = run_shard(job, shard, views)
+        except Exception:
+            queue.fail(shard, traceback.format_exc())
+            continue
+        queue.complete(shard, result)
+        ran += 1
+
+
+def start_local_workers(directory, workers: int, **kwargs) -> List[multiprocessing.Process]:
+    '''Start `workers` run_worker processes on this machine (the single-node stand-in for a cluster).'''
+    procs = [multiprocessing.Process(target=run_worker, args=(directory,), kwargs=kwargs, daemon=True)
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    return procs
+
+
+def wait_for_results(directory, timeout: float = None, poll_seconds: float = 0.5,
+                     lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+    '''
+    (job, shard results) once every shard is done, requeueing expired
+    claims while waiting. Raises RuntimeError if a shard failed and
+    TimeoutError after `timeout` seconds.
+    '''
+    queue = WorkQueue(directory, lease_seconds, max_attempts)
+    job = queue.job()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        failures = queue.failures()
+        if failures:
+            raise RuntimeError(f"{len(failures)} shard(s) failed; first ({failures[0]['id']}):\n"
+                               f"{failures[0]['error']}")
+        if queue.counts()['done'] >= job['shards']:
+            return job, queue.results()
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"{queue.counts()} after {timeout}s")
+        queue.requeue_expired()
+        time.sleep(poll_seconds)
+
+
+def collect_backtest(directory, **kwargs):
+    '''
+    (engine, results) of a finished backtest job: the shards merged in
+    symbol order into one Engine, as Engine.run(..., workers=n) returns
+    them. results also carries 'shards' ({id: worker, seconds}) and
+    'symbol_metrics' (each shard's per-symbol metrics). Raises
+    RuntimeError, naming them, if any symbol of the job has no result.
+    '''
+    job, results = wait_for_results(directory, **kwargs)
+    outputs = {out['symbol']: out for r in results for out in r['outputs']}
+    missing = [sym for sym in job['symbols'] if sym not in outputs]
+    if missing:
+        raise RuntimeError(f"No shard result for {len(missing)} symbol(s): {', '.join(missing)}")
+    engine = Engine(initial_cash=job['initial_cash'], seed=job['seed'], execution=job['execution'])
+    merged = engine.merge_isolated([outputs[sym] for sym in job['symbols']], job['allocation'])
+    merged['shards'] = {r['id']: {'worker': r['worker'], 'seconds': r['seconds']} for r in results}
+    merged['symbol_metrics'] = {sym: m for r in results for sym, m in r['metrics'].items()}
+    return engine, merged
+
+
+def collect_sweep(directory, **kwargs) -> List[Dict[str, Any]]:
+    '''Ranked rows of a finished sweep job, as run_sweep returns them.'''
+    from sweep import rank_rows
+    _, results = wait_for_results(directory, **kwargs)
+    return rank_rows([row for r in results for row in r['rows']])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded backtests over a shared-directory work queue.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('submit', 'publish a job'), ('local', 'publish, run workers here and collect')):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--queue', required=True, help='queue directory (shared between nodes)')
+        p.add_argument('--data', required=True, help='tick store or CSV path readable by every worker')
+        p.add_argument('--shard-size', type=int, default=50, help='symbols per backtest shard')
+        p.add_argument('--grid', help='JSON {StrategyClass: {param: [values]}}: run a sweep instead of a backtest')
+        p.add_argument('--block-size', type=int, default=8, help='configurations per sweep shard')
+        p.add_argument('--cash', type=float, default=100_000)
+        p.add_argument('--seed', type=int, default=0)
+        if name == 'local':
+            p.add_argument('--workers', type=int, default=os.cpu_count())
+            p.add_argument('--report', help='write a performance report of a backtest here')
+    p = sub.add_parser('worker', help='claim and run shards until the queue is drained')
+    p.add_argument('--queue', required=True)
+    p.add_argument('--lease', type=float, default=LEASE_SECONDS, help='seconds before a silent claim is retried')
+    p.add_argument('--poll', type=float, default=0.5)
+    p = sub.add_parser('collect', help='wait for a job, merge and print its results')
+    p.add_argument('--queue', required=True)
+    p.add_argument('--timeout', type=float)
+    p.add_argument('--report', help='write a performance report of a backtest here')
+    args = parser.parse_args(argv)
+
+    if args.command in ('submit', 'local'):
+        if args.grid:
+            from sweep import STRATEGY_CLASSES
+            grids = {STRATEGY_CLASSES[name]: grid for name, grid in json.loads(args.grid).items()}
+            n = submit_sweep(args.queue, args.data, grids, args.block_size, args.cash, args.seed)
+        else:
+            n = submit_backtest(args.queue, args.data, shard_size=args.shard_size, initial_cash=args.cash,
+                                seed=args.seed)
+        print(f"Published {n} shards to {args.queue}")
+    if args.command == 'worker':
+        print(f"Completed {run_worker(args.queue, args.lease, args.poll)} shards")
+        return
+    if args.command == 'submit':
+        return
+    procs = start_local_workers(args.queue, args.workers) if args.command == 'local' else []
+    try:
+        if WorkQueue(args.queue).job()['kind'] == 'sweep':
+            from sweep import format_results_table
+            print(format_results_table(collect_sweep(args.queue, timeout=getattr(args, 'timeout', None)), top=20))
+            return
+        engine, results = collect_backtest(args.queue, timeout=getattr(args, 'timeout', None))
+    finally:
+        for p in procs:
+            p.join()
+    metrics = engine.performance_metrics()
+    print(f"Merged {len(results['shards'])} shards, {len(results['equity_curve'])} symbols: "
+          f"total return {metrics['total_return']:.2%}, Sharpe {metrics['sharpe']:.2f}")
+    if args.report:
+        from reporting import save_report
+        save_report(args.report, metrics, results['equity_curve'])
+        print(f"Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
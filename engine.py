@@ -1,125 +1,717 @@
 from models import *
+from ledger import BUY, SELL, PositionBook, SymbolTable, TradeLedger
+from execution import RandomFailure, UniformStream, simulate_fills, symbol_rng
+from metrics import StreamingMetrics, curve_metrics, curve_times, curve_values, sum_curves, traded_notional
 import logging
 from typing import List, Dict, Any
-from collections import defaultdict
+from collections import Counter, defaultdict
 import numpy as np
-import random
+from array import array
+import heapq
+import math
+import time
 
 logger = logging.getLogger("Engine")  
 
+# equity_curve key used when a run produces a single portfolio-level curve
+PORTFOLIO = "PORTFOLIO"
+
+# seed of Engine(seed=None), shared by the serial and isolated modes so
+# unseeded runs are reproducible and comparable (the data generator used to
+# seed the global random with 42, which made the original engine's fills
+# reproducible the same way)
+DEFAULT_SEED = 42
+
+# Order outcomes, as returned by _submit / _submit_signals. The first two
+# book a trade; the others are rejections, counted in Engine.order_counts
+# rather than raised.
+(FILLED, PARTIALLY_FILLED, INVALID_QUANTITY, INVALID_ACTION, EXECUTION_FAILED,
+ INSUFFICIENT_CASH, INSUFFICIENT_SHARES, SIGNAL_ERROR) = range(8)
+ORDER_STATUS = ('FILLED', 'PARTIALLY_FILLED', 'INVALID_QUANTITY', 'INVALID_ACTION', 'EXECUTION_FAILED',
+                'INSUFFICIENT_CASH', 'INSUFFICIENT_SHARES', 'SIGNAL_ERROR')
+_REJECTION_MESSAGES = {
+    INVALID_QUANTITY: 'Order quantity must be greater than zero!',
+    INVALID_ACTION: 'Unknown order action',
+    EXECUTION_FAILED: 'Simulating Execution Failure!',
+    INSUFFICIENT_CASH: 'Insufficient cash',
+    INSUFFICIENT_SHARES: 'Insufficient shares',
+}
+
 class Engine:
-    def __init__(self):
+    def __init__(self, initial_cash: float = 100_000, seed=None, failure_rate: float = 0.01, profiler=None,
+                 execution=None):
         # self.portfolio = {}
-        self.cash = 100_000
+        self.cash = initial_cash
+        # probability that the default execution model simulates a failed execution
+        self.failure_rate = failure_rate
+        # execution.ExecutionModel deciding fill quantity and price
+        self.execution = execution if execution is not None else RandomFailure(failure_rate)
+        # optional instrumentation.Profiler; None keeps the uninstrumented hot path
+        self.profiler = profiler
+        # fills draw from one Generator per symbol derived from the seed
+        # (DEFAULT_SEED when seed=None), independent of global random state
+        self.seed = seed
+        self._seed = seed if seed is not None else DEFAULT_SEED
+        self._rngs: Dict[str, UniformStream] = {}
         self.last_price: Dict[str, float] = {}
-        self.positions: Dict[str, Dict[str, Any]] = defaultdict(lambda: {'quantity': 0, 'avg_price': 0.0})  
+        # symbols are interned once; positions and trades are stored by symbol id
+        self.symbols = SymbolTable()
+        self.positions = PositionBook(self.symbols)
+        # running market value of open positions, kept as exact float partials
+        # (see _add_exact) and adjusted per symbol, so equity is O(1) per tick
+        self._mv_partials: List[float] = []
+        self._mv_by_symbol: Dict[str, float] = {}
         self.equity_curve = []
         self.equity_by_symbol = {}  # Store equity curves by symbol
-        self.trades: List[Dict[str, Any]] = []  
+        # per-symbol starting cash when the curves are isolated sub-portfolios
+        self._allocation = None
+        # (equity_by_symbol, metrics) of the last run_streaming, whose
+        # in-memory curve is at most a downsample of the run
+        self._streamed = None
+        self.trades = TradeLedger(self.symbols)
+        # orders placed from signals, by ORDER_STATUS code
+        self.order_counts = [0] * len(ORDER_STATUS)
+        # ticks of each symbol replayed by run_chronological so far; on an engine
+        # restored from a checkpoint (checkpoint.load_checkpoint) resume_from
+        # holds those counts and the next run_chronological skips that many
+        self.ticks_consumed: Dict[str, int] = {}
+        self.resume_from = None
     
-    def run(self, ticks, strategies):
+    def run(self, ticks, strategies, workers: int = None, vectorized: bool = False, cache=None):
+        '''
+        Backtest `ticks` with `strategies` ({symbol: [Strategy, ...]}).
+
+        By default every symbol is replayed in turn against one shared cash
+        balance. With `workers` set, each symbol instead runs as an isolated
+        sub-portfolio with an equal share of the cash, its own strategy
+        instances, spread over a pool of `workers` processes (workers=1 runs
+        the same isolated mode in-process). Fills draw from per-symbol RNG
+        streams, so the isolated results do not depend on the number of
+        workers.
+
+        With `vectorized=True` each symbol is backtested through the
+        strategies' generate_signals_batch instead of tick by tick, and its
+        orders are filled in one batch by the execution model; trades and
+        equity curves are identical to the tick-by-tick run.
+
+        With a `cache` (cache.ResultCache) the run is isolated as above
+        (in-process unless `workers` is given) and each symbol whose data,
+        strategies and settings are unchanged is loaded from the cache
+        instead of being backtested.
+        '''
         intial_cash = self.cash
-        ticks_by_symbol: Dict[str, List[MarketDataPoint]] = defaultdict(list)        
-        for t in ticks:
-            ticks_by_symbol[t.symbol].append(t)
+        if isinstance(ticks, dict):
+            # already grouped: {symbol: ticks or SymbolTicks}; lists are
+            # sorted into copies so the caller's data keeps its order
+            ticks_by_symbol = {sym: sorted(s, key=time_key(s)) if isinstance(s, list) else s
+                               for sym, s in ticks.items()}
+        elif hasattr(ticks, 'by_symbol'):
+            # columnar input and tick stores are already grouped and time-sorted per symbol
+            ticks_by_symbol = ticks.by_symbol()
+        else:
+            ticks_by_symbol: Dict[str, List[MarketDataPoint]] = defaultdict(list)
+            for t in ticks:
+                ticks_by_symbol[t.symbol].append(t)
         
+        if workers is not None or cache is not None:
+            return self.__run_isolated(ticks_by_symbol, strategies, workers or 1, vectorized, cache)
+
         results:Dict[str, Any]= {}
         for symbol, sym_ticks in ticks_by_symbol.items():
-            sym_ticks.sort(key= lambda x: x.timestamp)
+            if isinstance(sym_ticks, list):
+                sym_ticks.sort(key=time_key(sym_ticks))
 
             #run each strategy 
-            res = self.__run(sym_ticks, strategies[symbol])
+            if vectorized:
+                res = self.__run_vectorized(sym_ticks, strategies[symbol])
+            else:
+                res = self.__run(sym_ticks, strategies[symbol])
             results[symbol] = res
         return  {  
             "initial_cash": intial_cash,  
             "final_cash": self.cash,  
             "positions": self.positions,  
             "equity_curve": self.equity_by_symbol,  
+            "rejections": self.rejection_summary(),
         }  
     
+    def __run_isolated(self, ticks_by_symbol, strategies, workers: int, vectorized: bool, cache=None):
+        symbols = list(ticks_by_symbol)
+        if not symbols:
+            raise ExecutionError("No ticks were provided ")
+        allocation = self.cash / len(symbols)
+        # sub-engines derive the same per-symbol streams as a serial run would
+        jobs = [(sym, ticks_by_symbol[sym], strategies[sym], allocation, self._seed,
+                 self.execution, vectorized) for sym in symbols]
+
+        cached, keys = {}, {}
+        if cache is not None:
+            from cache import symbol_key
+            for sym, ticks, strat_list, cash, seed, execution, _ in jobs:
+                keys[sym] = symbol_key(sym, ticks, strat_list, cash, execution, seed)
+                hit = cache.get(keys[sym])
+                if hit is not None:
+                    cached[sym] = hit
+            jobs = [job for job in jobs if job[0] not in cached]
+
+        if workers <= 1 or len(jobs) <= 1:
+            # in-process sub-engines share this engine's profiler; pool workers run unprofiled
+            outputs = _run_symbol_shard(jobs, self.profiler)
+        else:
+            # several symbols per task keeps pickling overhead low while still load balancing
+            n_shards = min(len(jobs), workers * 4)
+            shards = [jobs[i::n_shards] for i in range(n_shards)]
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = [out for shard in pool.map(_run_symbol_shard, shards) for out in shard]
+        if cache is not None:
+            for out in outputs:
+                cache.put(keys[out['symbol']], out)
+        outputs.extend(cached.values())
+        order = {sym: i for i, sym in enumerate(symbols)}
+        outputs.sort(key=lambda out: order[out['symbol']])
+        results = self.merge_isolated(outputs, allocation)
+        results["cached_symbols"] = list(cached)
+        return results
+
+    def merge_isolated(self, outputs, allocation: float):
+        '''
+        Fold per-symbol sub-portfolio outputs (_run_symbol results, in
+        symbol order, each started with `allocation` cash) into this engine,
+        replacing its cash, and return the run's results dict. Used by
+        isolated runs and by distributed.collect_backtest for shards run elsewhere.
+        '''
+        intial_cash = self.cash
+        self._allocation = allocation
+        self.cash = 0.0
+        for out in outputs:
+            sym = out['symbol']
+            self.cash += out['cash']
+            self.positions.update(out['positions'])
+            self.last_price.update(out['last_price'])
+            for held in out['positions']:
+                self._revalue(held)
+            self.trades.extend(out['trades'])
+            self.order_counts = [a + b for a, b in zip(self.order_counts, out['order_counts'])]
+            if out['equity_curve']:
+                self.equity_by_symbol[sym] = out['equity_curve']
+                self.equity_curve = out['equity_curve']
+        return  {  
+            "initial_cash": intial_cash,  
+            "final_cash": self.cash,  
+            "positions": self.positions,  
+            "equity_curve": self.equity_by_symbol,  
+            "rejections": self.rejection_summary(),
+        }  
+
+    def _run_symbol(self, symbol, ticks, strat_list, vectorized=False):
+        '''Run one symbol on this engine and return its state as plain, picklable data.'''
+        if isinstance(ticks, list):
+            ticks.sort(key=time_key(ticks))
+        if vectorized:
+            self.__run_vectorized(ticks, strat_list)
+        else:
+            self.__run(ticks, strat_list)
+        return {
+            'symbol': symbol,
+            'cash': self.cash,
+            'positions': self.positions.to_dict(),
+            'last_price': dict(self.last_price),
+            'trades': self.trades,
+            'order_counts': self.order_counts,
+            'equity_curve': self.equity_by_symbol.get(symbol, []),
+        }
+
     def __run(self, ticks:List[MarketDataPoint], strat_list: List[Any]):
-        ticks = sorted(ticks, key= lambda t: t.timestamp)
-        if not ticks:
+        # callers hand over ticks already sorted by timestamp
+        if not len(ticks):
             raise ExecutionError("No ticks were provided ")
         
         # Reset equity curve for this symbol
         self.equity_curve = []
+        on_tick, read_equity = self._hot_path()
         
         for tick in ticks:
-            #update the last price
-            self.last_price[tick.symbol] = tick.price
-
-            #collect signals from strategies 
-            signals = []
-            
-            for strat in strat_list:
-                try:
-                    sigs = strat.generate_signals(tick)
-                    if sigs:
-                        signals.extend(sigs)
-                except Exception as e:
-                    logger.exception(f"Strategy {type(strat).__name__} error on tick {tick}: {e}")  
-                    continue
-            # convert signals to Orders and execute them
-            for sig in signals:
-                try:
-                    action, symbol, qty, price = sig  
-                    order = Order(symbol, qty, price, action)
-                    
-                    order.validate()
-                except OrderError as eE:
-                    logger.error(f"Order validation failed for signal {sig}: {eE}")
-                    continue
-                except Exception as e:
-                      logger.exception(f"Error creating order from signal {sig}: {e}")  
-                      continue
-
-                #execute the order (each order handled independently)
-                try: 
-                    self.execute_orders(order, tick.timestamp)
-                except ExecutionError as e:
-                    logger.error(f"Execution failed for order {order}: {e}")  
-                    continue  
-                except Exception as e:  
-                    logger.exception(f"Unexpected error executing order : {e}")  
-                    continue  
-        
+            on_tick(tick, strat_list)
             # record equity after processing this tick (regardless of whether there were signals)
-            equity = self._compute_equity()  
+            equity = read_equity()  
             self.equity_curve.append((tick.timestamp, equity))
+        if self.profiler is not None:
+            self.profiler.stop()
         
         # Store the equity curve for this symbol
         if self.equity_curve:
-            symbol = ticks[0].symbol if ticks else "unknown"
+            symbol = ticks.symbol if isinstance(ticks, SymbolTicks) else ticks[0].symbol
             self.equity_by_symbol[symbol] = self.equity_curve.copy()
-    def execute_orders(self, order: Order, timestamp)->None:
-        
-        #Simulate occasional execution failure with 5% chance
-        if random.random() < 0.01:
-            raise ExecutionError('Simulating Execution Failure!')
-        
-        symbol = order.symbol
-        qty = int(order.quantity)
-        if qty<=0:
-            raise OrderError('Order quantity must be greater than zero!')
+
+    def _on_tick(self, tick, strat_list: List[Any]) -> None:
+        '''Mark the tick's price, collect signals from `strat_list` and execute them.'''
+        #update the last price
+        self._mark(tick.symbol, tick.price)
+
+        #collect signals from strategies 
+        signals = []
         
-        fill_price = self.last_price.get(symbol,float(order.price))
-        pos = self.positions[symbol]
-        old_qty = int(pos.get('quantity', 0))
-        old_avg = float(pos.get('avg_price', 0.0))  
+        for strat in strat_list:
+            try:
+                sigs = strat.generate_signals(tick)
+                if sigs:
+                    signals.extend(sigs)
+            except Exception as e:
+                logger.exception("Strategy %s error on tick %s: %s", type(strat).__name__, tick, e)  
+                continue
+        if signals:
+            self._submit_signals(signals, tick.timestamp)
+
+    def _hot_path(self):
+        '''
+        The per-tick handler and equity reader for a run: the plain methods,
+        or their instrumented copies when a profiler is attached (whose
+        wall clock is started here; the caller stops it).
+        '''
+        if self.profiler is None:
+            return self._on_tick, self._equity
+        self.profiler.start()
+        return self._on_tick_profiled, self._equity_profiled
+
+    def _on_tick_profiled(self, tick, strat_list: List[Any]) -> None:
+        '''_on_tick with per-strategy and per-stage timing and counting.'''
+        prof = self.profiler
+        clock = time.perf_counter_ns
+        symbol = tick.symbol
+        counts = prof.symbol(symbol)
+        counts[0] += 1
+        self._mark(symbol, tick.price)
+
+        signals = []
+        start = clock()
+        for strat in strat_list:
+            t0 = clock()
+            try:
+                sigs = strat.generate_signals(tick)
+            except Exception as e:
+                logger.exception("Strategy %s error on tick %s: %s", type(strat).__name__, tick, e)
+                sigs = None
+            stats = prof.strategy(strat, symbol)
+            stats[0] += 1
+            stats[1] += clock() - t0
+            if sigs:
+                stats[2] += len(sigs)
+                signals.extend(sigs)
+        prof.stage('signals', clock() - start)
+        counts[1] += len(signals)
+        for sig in signals:
+            self._submit_profiled(sig, tick.timestamp, counts)
+
+    def _submit_profiled(self, sig, timestamp, counts, fill=None) -> int:
+        '''_submit with validation and booking timed as the 'orders' and 'execute' stages.'''
+        clock = time.perf_counter_ns
+        t0 = clock()
+        try:
+            action, symbol, qty, price = sig
+            status = _signal_rejection(action, qty)
+            t1 = clock()
+            self.profiler.stage('orders', t1 - t0)
+            if status is None:
+                status = self._book(BUY if action == 'BUY' else SELL, symbol, int(qty), price, timestamp, fill)
+                self.profiler.stage('execute', clock() - t1)
+        except _MALFORMED_SIGNAL:
+            logger.exception("Error placing signal %s", sig)
+            status = SIGNAL_ERROR
+        self.order_counts[status] += 1
+        counts[2 if status <= PARTIALLY_FILLED else 3] += 1
+        return status
+
+    def _equity_profiled(self) -> float:
+        t0 = time.perf_counter_ns()
+        value = self._equity()
+        self.profiler.stage('equity', time.perf_counter_ns() - t0)
+        return value
+
+    def run_chronological(self, ticks, strategies, presorted: bool = False, new_only: bool = False):
+        '''
+        Replay all symbols as one time-ordered stream against the shared cash,
+        dispatching each tick only to strategies[tick.symbol], and record one
+        portfolio equity point per tick.
+
+        Per-symbol sorted inputs (a {symbol: ticks} dict, MarketDataColumns or
+        a TickStore) are k-way merged lazily with a heap, holding one pending
+        tick per symbol. A flat iterable is used as-is when `presorted`,
+        otherwise it is sorted once. Ties keep symbol (or input) order.
+
+        On an engine restored from a checkpoint the restored equity curve is
+        extended. By default the data must be the checkpointed data with
+        ticks appended: the first ticks_consumed[s] ticks of each symbol s
+        are skipped, and a ValueError is raised if a symbol has fewer ticks
+        than were consumed (by a lazy iterator, once it is exhausted). Ticks appended with the same timestamp as the
+        last one replayed are still processed. Per-symbol inputs are cut by
+        slicing, so with a TickStore only the new ticks are touched; a CSV
+        or MarketDataColumns is still loaded and sorted whole.
+
+        With `new_only` the data holds only the ticks after the checkpoint
+        (e.g. a CSV of today's ticks) and is replayed in full, so a resume
+        costs O(new ticks) for any input. A ValueError is raised if it
+        starts before the last tick the checkpoint replayed.
+        '''
+        intial_cash = self.cash
+        skip = self.resume_from
+        if new_only:
+            if skip is None:
+                raise ValueError("new_only resumes an engine restored from a checkpoint")
+            # counts carry on from the checkpoint and nothing is skipped
+            since, skip = self.equity_curve[-1][0], {}
+        if isinstance(ticks, dict) or hasattr(ticks, 'by_symbol'):
+            by_symbol = ticks if isinstance(ticks, dict) else ticks.by_symbol()
+            streams = list(by_symbol.values())
+            key = time_key(streams[0] if streams else [])
+            consumed = {sym: len(s) for sym, s in by_symbol.items()}
+            if skip:
+                _check_extends(consumed, skip)
+                streams = [_drop_first(s, skip.get(sym, 0)) for sym, s in by_symbol.items()]
+            stream = heapq.merge(*streams, key=key)
+        else:
+            if presorted:
+                stream = ticks
+            else:
+                stream = sorted(ticks, key=time_key(ticks))
+            if isinstance(stream, list):
+                consumed = dict(Counter(t.symbol for t in stream))
+                if skip:
+                    _check_extends(consumed, skip)
+                    stream = _skip_consumed(stream, skip, {})
+            else:
+                # counted as it is consumed
+                consumed = {}
+                stream = _skip_consumed(stream, skip or {}, consumed)
+        if new_only:
+            stream = _starting_at(stream, since)
+            for sym, n in self.resume_from.items():
+                consumed[sym] = consumed.get(sym, 0) + n
+
+        no_strategies: List[Any] = []
+        if self.resume_from is None:
+            self.equity_curve = []
+        on_tick, read_equity = self._hot_path()
+        for tick in stream:
+            on_tick(tick, strategies.get(tick.symbol, no_strategies))
+            self.equity_curve.append((tick.timestamp, read_equity()))
+        self.resume_from = None
+        if self.profiler is not None:
+            self.profiler.stop()
+        if not self.equity_curve:
+            raise ExecutionError("No ticks were provided ")
+
+        self.ticks_consumed = consumed
+        self.equity_by_symbol = {PORTFOLIO: self.equity_curve}
+        return  {  
+            "initial_cash": intial_cash,  
+            "final_cash": self.cash,  
+            "positions": self.positions,  
+            "equity_curve": self.equity_by_symbol,  
+            "rejections": self.rejection_summary(),
+        }  
+
+    def run_streaming(self, source, strategies, spill_dir: str = None, downsample: int = None,
+                      chunk_rows: int = 1_000_000, spill_rows: int = 65_536):
+        '''
+        run_chronological for datasets larger than memory. Ticks stream from
+        a time-sorted CSV read `chunk_rows` rows at a time, or from a tick
+        store merged lazily across symbols (see streaming.stream_ticks).
+        Metrics are accumulated every `spill_rows` ticks with
+        StreamingMetrics.update_many, so memory does not grow with the
+        number of ticks.
+
+        With `spill_dir` the full equity curve and the trades are also
+        appended to column files there in `spill_rows` chunks (read them
+        back with streaming.load_spilled_equity / load_spilled_trades);
+        otherwise trades stay in self.trades. With `downsample` every
+        downsample-th equity point (and the last) is kept in memory as
+        equity_curve, e.g. for plotting.
+
+        The result carries 'metrics' (equal to performance_metrics of the
+        in-memory run up to float rounding), the number of 'ticks' and
+        'spill_dir'.
+        '''
+        from streaming import EquitySpill, TradeSpill, stream_ticks
+        intial_cash = self.cash
+        equity_spill = EquitySpill(spill_dir, spill_rows) if spill_dir else None
+        trade_spill = TradeSpill(spill_dir, self.trades, spill_rows) if spill_dir else None
+        live = StreamingMetrics()
+        pending = array('d')
+        kept = []
+        last = None
+        count = 0
+
+        no_strategies: List[Any] = []
+        on_tick, read_equity = self._hot_path()
+        try:
+            for tick in stream_ticks(source, chunk_rows):
+                on_tick(tick, strategies.get(tick.symbol, no_strategies))
+                equity = read_equity()
+                pending.append(equity)
+                if len(pending) >= spill_rows:
+                    live.update_many(np.array(pending))
+                    del pending[:]
+                if equity_spill is not None:
+                    equity_spill.append(tick.timestamp, equity)
+                    trade_spill.maybe_flush()
+                if downsample and count % downsample == 0:
+                    kept.append((tick.timestamp, equity))
+                last = (tick.timestamp, equity)
+                count += 1
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+            if equity_spill is not None:
+                equity_spill.close()
+                trade_spill.close()
+        if not count:
+            raise ExecutionError("No ticks were provided ")
+        live.update_many(np.array(pending))
+        live.notional = trade_spill.notional if trade_spill is not None else traded_notional(self.trades)
+        if downsample and (count - 1) % downsample:
+            # the last tick was not on a downsample boundary
+            kept.append(last)
+
+        self.equity_curve = kept
+        self.equity_by_symbol = {PORTFOLIO: kept}
+        self._streamed = (self.equity_by_symbol, live.summary())
+        return  {  
+            "initial_cash": intial_cash,  
+            "final_cash": self.cash,  
+            "positions": self.positions,  
+            "equity_curve": self.equity_by_symbol,  
+            "rejections": self.rejection_summary(),
+            "metrics": dict(self._streamed[1]),
+            "ticks": count,
+            "spill_dir": spill_dir,
+        }  
+
+    async def run_async(self, feed, strategies, max_ticks: int = None):
+        '''
+        Process ticks from an async feed (e.g. data_generator.fan_in) as they
+        arrive, dispatching like run_chronological and recording one
+        portfolio equity point per tick. The result dict also carries
+        'latency': per-tick processing time percentiles in microseconds.
+        '''
+        intial_cash = self.cash
+        latencies = array('d')
+        no_strategies: List[Any] = []
+        clock = time.perf_counter_ns
+        self.equity_curve = []
+        on_tick, read_equity = self._hot_path()
+        try:
+            async for tick in feed:
+                start = clock()
+                on_tick(tick, strategies.get(tick.symbol, no_strategies))
+                self.equity_curve.append((tick.timestamp, read_equity()))
+                latencies.append((clock() - start) / 1_000)
+                if max_ticks is not None and len(latencies) >= max_ticks:
+                    break
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+            if hasattr(feed, 'aclose'):
+                await feed.aclose()
+
+        self.equity_by_symbol = {PORTFOLIO: self.equity_curve}
+        lat = np.frombuffer(latencies, dtype=np.float64)
+        return  {  
+            "initial_cash": intial_cash,  
+            "final_cash": self.cash,  
+            "positions": self.positions,  
+            "equity_curve": self.equity_by_symbol,  
+            "rejections": self.rejection_summary(),
+            "latency": {
+                "ticks": len(lat),
+                "p50_us": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+                "p99_us": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+                "max_us": float(lat.max()) if len(lat) else 0.0,
+            },
+        }  
+
+    def _submit_signals(self, signals, timestamp) -> List[int]:
+        '''
+        Validate and execute one tick's (action, symbol, qty, price) signals
+        in order, independently of each other. Returns their ORDER_STATUS
+        codes; rejections are counted, not raised or logged.
+        '''
+        submit = self._submit
+        return [submit(sig, timestamp) for sig in signals]
+
+    def _submit(self, sig, timestamp, fill=None) -> int:
+        '''
+        Place one signal without building an Order: its ORDER_STATUS code.
+        A malformed signal (wrong shape or types) is logged and counted as
+        SIGNAL_ERROR; any other exception is a fault in the engine and
+        propagates.
+        '''
+        try:
+            action, symbol, qty, price = sig
+            status = _signal_rejection(action, qty)
+            if status is None:
+                status = self._book(BUY if action == 'BUY' else SELL, symbol, int(qty), price, timestamp, fill)
+        except _MALFORMED_SIGNAL:
+            logger.exception("Error placing signal %s", sig)
+            status = SIGNAL_ERROR
+        self.order_counts[status] += 1
+        if status > PARTIALLY_FILLED and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Rejected signal %s: %s", sig, ORDER_STATUS[status])
+        return status
+
+    def rejection_summary(self) -> Dict[str, int]:
+        '''{reason: count} of the signals rejected so far (see ORDER_STATUS).'''
+        return {ORDER_STATUS[code]: n for code, n in enumerate(self.order_counts)
+                if n and code > PARTIALLY_FILLED}
+
+    def __run_vectorized(self, ticks, strat_list: List[Any]):
+        '''
+        Batch equivalent of __run: signals come from each strategy's
+        generate_signals_batch over the whole price array, orders go through
+        the same _submit/execute_orders path, and the equity curve is built
+        with array operations. Trades, cash and equity match __run exactly;
+        the strategies' streaming state is left untouched.
+        '''
+        if isinstance(ticks, SymbolTicks):
+            symbol = ticks.symbol
+            prices = np.asarray(ticks.prices, dtype=np.float64)
+            times = ticks.timestamps.tolist()
+        else:
+            if not ticks:
+                raise ExecutionError("No ticks were provided ")
+            symbol = ticks[0].symbol
+            prices = np.array([t.price for t in ticks], dtype=np.float64)
+            times = [t.timestamp for t in ticks]
+        n = len(prices)
+        if not n:
+            raise ExecutionError("No ticks were provided ")
+
+        prof = self.profiler
+        if prof is None:
+            submit = self._submit
+            batches = [strat.generate_signals_batch(prices) for strat in strat_list]
+        else:
+            prof.start()
+            counts = prof.symbol(symbol)
+            counts[0] += n
+
+            def submit(sig, timestamp, fill):
+                self._submit_profiled(sig, timestamp, counts, fill)
+
+            batches = []
+            for strat in strat_list:
+                t0 = time.perf_counter_ns()
+                batches.append(strat.generate_signals_batch(prices))
+                elapsed = time.perf_counter_ns() - t0
+                stats = prof.strategy(strat, symbol)
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += len(batches[-1][0])
+                prof.stage('signals', elapsed)
+                counts[1] += len(batches[-1][0])
+
+        # merge every strategy's signals by tick, keeping strategy order within a tick
+        idx = np.concatenate([b[0] for b in batches]).astype(np.int64) if batches else np.empty(0, np.int64)
+        sides = np.concatenate([b[1] for b in batches]) if batches else np.empty(0, np.int8)
+        qtys = np.concatenate([b[2] for b in batches]) if batches else np.empty(0, np.int64)
+        strat_no = np.concatenate([np.full(len(b[0]), k) for k, b in enumerate(batches)]) if batches else np.empty(0)
+        order = np.lexsort((strat_no, idx))
+        idx, sides, qtys = idx[order], sides[order], qtys[order]
+
+        # fill every order the tick-by-tick path would send to the market in
+        # one batch, drawing from the symbol's RNG stream in the same order
+        fill_qty = np.zeros(len(idx), dtype=np.int64)
+        fill_price = np.zeros(len(idx), dtype=np.float64)
+        valid = qtys > 0
+        fill_qty[valid], fill_price[valid] = simulate_fills(
+            self.execution, self._symbol_rng(symbol), sides[valid], qtys[valid], prices[idx[valid]])
 
+        cash_before = self.cash
+        qty_before = self.positions.quantity_of(symbol)
+        ev_idx, ev_cash, ev_qty = [], [], []
+        for k, (i, side, q, fq, fp) in enumerate(zip(idx.tolist(), sides.tolist(), qtys.tolist(),
+                                                     fill_qty.tolist(), fill_price.tolist())):
+            price = float(prices[i])
+            self._mark(symbol, price)
+            action = "BUY" if side > 0 else "SELL"
+            submit((action, symbol, q, price), times[i], (fq, fp) if valid[k] else None)
+            ev_idx.append(i)
+            ev_cash.append(self.cash)
+            ev_qty.append(self.positions.quantity_of(symbol))
+
+        equity_start = time.perf_counter_ns()
+        # cash and position are step functions of the tick index, changing only on fills
+        last_event = np.searchsorted(np.asarray(ev_idx, dtype=np.int64), np.arange(n), side='right') - 1
+        has_event = last_event >= 0
+        cash = np.where(has_event, np.asarray(ev_cash + [0.0])[last_event], cash_before)
+        qty = np.where(has_event, np.asarray(ev_qty + [0], dtype=np.int64)[last_event], qty_before)
+
+        # other symbols' market value is constant while this symbol replays;
+        # round each tick exactly as _equity does so the floats agree bit for bit
+        others: List[float] = []
+        for sym, value in self._mv_by_symbol.items():
+            if sym != symbol:
+                _add_exact(others, value)
+        own = np.where(qty != 0, prices * qty, 0.0)
+        if not any(others):
+            # a two-term float sum is already correctly rounded
+            equity = cash + own
+        else:
+            equity = np.array([math.fsum(others + [mv, c]) for mv, c in zip(own.tolist(), cash.tolist())])
+
+        self._mark(symbol, float(prices[-1]))
+        self.equity_curve = list(zip(times, equity.tolist()))
+        self.equity_by_symbol[symbol] = self.equity_curve.copy()
+        if prof is not None:
+            prof.stage('equity', time.perf_counter_ns() - equity_start, n)
+            prof.stop()
+
+    def execute_orders(self, order: Order, timestamp, fill=None)->None:
+        '''
+        Fill `order` against the last price through the execution model and
+        book the trade, setting order.status to FILLED or PARTIALLY_FILLED.
+        `fill` is a precomputed (quantity, price) from a batch evaluation of
+        the model (see __run_vectorized). A rejection raises OrderError
+        (bad quantity) or ExecutionError; runs use the non-raising _submit.
+        '''
         action = order.status.upper()
-        if action == 'BUY':
-            cost = fill_price*qty
+        status = _signal_rejection(action, order.quantity)
+        if status is None:
+            status = self._book(BUY if action == 'BUY' else SELL, order.symbol, int(order.quantity),
+                                order.price, timestamp, fill)
+        if status > PARTIALLY_FILLED:
+            error = OrderError if status == INVALID_QUANTITY else ExecutionError
+            raise error(f"{_REJECTION_MESSAGES[status]}: {action} {order.quantity} {order.symbol}")
+        order.status = ORDER_STATUS[status]
+
+    def _book(self, side: int, symbol, qty: int, price, timestamp, fill=None) -> int:
+        '''
+        Fill a validated order of `qty` shares through the execution model
+        (or the precomputed `fill`) and book the trade. Returns FILLED,
+        PARTIALLY_FILLED, or the rejection code, leaving state untouched.
+        '''
+        if fill is None:
+            fill = self._fill(symbol, side, qty, self.last_price.get(symbol, float(price)))
+        filled, fill_price = fill
+        if filled <= 0:
+            return EXECUTION_FAILED
+
+        book = self.positions
+        sid = book.open(symbol)
+        old_qty = book.quantity[sid]
+        old_avg = book.avg_price[sid]
+
+        if side == BUY:
+            cost = fill_price*filled
             if cost > self.cash:
-                raise ExecutionError(f"Insufficient cash for BUY {qty} {symbol} @ {fill_price:.2f}: need {cost:.2f}, have {self.cash:.2f}")  
+                return INSUFFICIENT_CASH
 
-            new_qty = old_qty + qty
+            new_qty = old_qty + filled
 
             # average price calculations:
             if old_qty>0 and new_qty>0:
                 #add to existing position
-                new_avg = ((old_qty*old_avg) +(qty*fill_price))/new_qty
+                new_avg = ((old_qty*old_avg) +(filled*fill_price))/new_qty
             elif old_qty<0 and new_qty>=0:
                 if new_qty == 0:
                     new_avg = 0.0
@@ -127,93 +719,212 @@ class Engine:
                     new_avg = fill_price
             else:
                 new_avg = old_avg
-            
-            pos['quantity'] = new_qty
-            pos['avg_price'] = float(new_avg)
-            self.cash -= cost
-            order.status = 'FILLED'
-            self.trades.append({
-                'timestamp': timestamp,
-                'action': 'BUY',
-                'quantity': qty,  
-                'price': fill_price,  
-                'cash_after': self.cash  
-                })
-            logger.info(f"FILLED BUY {qty} {symbol} @ {fill_price:.2f}. Cash: {self.cash:.2f}")
-            
-        elif action == "SELL":
+            cash = self.cash - cost
+        else:
             # Check if we have enough shares to sell
-            if old_qty < qty:
-                raise ExecutionError(f"Insufficient shares for SELL {qty} {symbol}: have {old_qty}, need {qty}")
+            if old_qty < filled:
+                return INSUFFICIENT_SHARES
             
-            new_qty = old_qty - qty
-            proceeds = fill_price * qty
-
-            # Update position
-            pos['quantity'] = new_qty
+            new_qty = old_qty - filled
             # Update average price to zero if position is closed
-            if new_qty == 0:
-                pos['avg_price'] = 0.0
-
-            self.cash += proceeds  
-            order.status = "FILLED"  
-            self.trades.append({  
-                'timestamp': timestamp,  
-                'action': 'SELL',  
-                'symbol': symbol,  
-                'quantity': qty,  
-                'price': fill_price,  
-                'cash_after': self.cash  
-            })  
-            logger.info(f"FILLED SELL {qty} {symbol} @ {fill_price:.2f}. Cash: {self.cash:.2f}")  
+            new_avg = 0.0 if new_qty == 0 else old_avg
+            cash = self.cash + fill_price * filled
+
+        # record the trade first: if that fails, cash and positions are untouched
+        self.trades.append(timestamp, symbol, side, filled, fill_price, cash)
+        book.quantity[sid] = new_qty
+        book.avg_price[sid] = float(new_avg)
+        self.cash = cash
+        self._revalue(symbol)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("FILLED %s %d %s @ %.2f. Cash: %.2f", 'BUY' if side == BUY else 'SELL',
+                        filled, symbol, fill_price, self.cash)
+        return FILLED if filled == qty else PARTIALLY_FILLED
+
+    def _symbol_rng(self, symbol) -> UniformStream:
+        rng = self._rngs.get(symbol)
+        if rng is None:
+            rng = self._rngs[symbol] = UniformStream(symbol_rng(self._seed, symbol))
+        return rng
+
+    def _fill(self, symbol, side: int, qty: int, price: float):
+        '''(filled quantity, fill price) of one order from the execution model.'''
+        model = self.execution
+        draws = model.draws
+        if not draws:
+            return model.fill(side, qty, price, ())
+        stream = self._rngs.get(symbol) or self._symbol_rng(symbol)
+        if draws == 1:
+            return model.fill(side, qty, price, (stream.next(),))
+        return model.fill(side, qty, price, [stream.next() for _ in range(draws)])
+
+    def _mark(self, symbol, price) -> None:
+        '''Record a new last price and re-value only that symbol's position.'''
+        self.last_price[symbol] = price
+        if symbol in self._mv_by_symbol or symbol in self.positions:
+            self._revalue(symbol)
+
+    def _revalue(self, symbol) -> None:
+        '''Swap the symbol's old market value for its current one in the running total.'''
+        book = self.positions
+        qty = book.quantity_of(symbol)
+        value = self.last_price.get(symbol, book.avg_price_of(symbol)) * qty if qty else 0.0
+        old = self._mv_by_symbol.get(symbol, 0.0)
+        if value == old:
+            return
+        _add_exact(self._mv_partials, -old)
+        _add_exact(self._mv_partials, value)
+        if value:
+            self._mv_by_symbol[symbol] = value
         else:
-            raise ExecutionError(f"Unknown order action: {order.action}")  
+            self._mv_by_symbol.pop(symbol, None)
+
+    def _equity(self) -> float:
+        '''Equity from the running market value: O(1) in the number of symbols.'''
+        return math.fsum(self._mv_partials + [self.cash])
 
     def _compute_equity(self):
-        '''Compute equity = cash + sum(position_qty * last_price) for all symbols.'''
-        equity = self.cash
+        '''Compute equity = cash + sum(position_qty * last_price) for all symbols.
+
+        Full O(symbols) recomputation, summed exactly with fsum; _equity
+        returns the same value incrementally.
+        '''
+        values = [self.cash]
         for sym, pos in self.positions.items():
             qty = pos.get('quantity', 0)
             if qty == 0:
                 continue
             price = self.last_price.get(sym, pos.get('avg_price',0.0))
-            equity += price*qty
-        return float(equity)
+            values.append(price*qty)
+        return float(math.fsum(values))
+
+    def portfolio_curve(self):
+        '''
+        (timestamps, equity) arrays of the whole portfolio over the last run.
+
+        Chronological and async runs already record one portfolio curve.
+        Isolated runs (workers=...) are summed across the sub-portfolios on
+        their merged timestamps; a serial run's per-symbol curves are the
+        shared portfolio in replay order, so they are concatenated.
+        '''
+        curves = self.equity_by_symbol
+        if PORTFOLIO in curves:
+            curve = curves[PORTFOLIO]
+            return curve_times(curve), curve_values(curve)
+        if self._allocation is not None:
+            return sum_curves(curves, {sym: self._allocation for sym in curves})
+        if not curves:
+            return np.empty(0, dtype='datetime64[us]'), np.empty(0, dtype=np.float64)
+        return (np.concatenate([curve_times(c) for c in curves.values()]),
+                np.concatenate([curve_values(c) for c in curves.values()]))
 
     def performance_metrics(self):
-        if not self.equity_curve:
+        '''
+        Return, Sharpe, Sortino, max drawdown (and its duration in ticks)
+        and turnover for the portfolio curve, plus the same statistics for
+        every curve in equity_by_symbol under 'by_symbol'. After
+        run_streaming these are its running statistics over every tick, as
+        the kept curve is only a downsample and spilled trades have left
+        the ledger.
+        '''
+        if not self.equity_by_symbol:
             return {}
-        eq_val = [v for (_,v) in self.equity_curve]
-        intial_eq = eq_val[0]
-        final_eq = eq_val[-1]
-        total_return = (final_eq/intial_eq -1.0) if intial_eq!=0 else 0
-
-        period_returns = []
-        for i in range(1, len(eq_val)):
-            prev = eq_val[i-1]
-            curr = eq_val[i]
-            if prev == 0:
-                period_returns.append(0.0)
-            else:
-                period_returns.append(curr/prev-1.0)
-        avg_ret = sum(period_returns)/len(period_returns) if period_returns else 0.0
-        std_ret = np.std(period_returns) if len(period_returns) >=2 else 0.0
-        sharpe = (avg_ret / std_ret) * np.sqrt(252) if std_ret > 0 else 0.0
-
-        #max drawdown
-        peak = eq_val[0]
-        max_dd = 0.0
-        for v in eq_val:
-            if v> peak:
-                peak = v
-            dd = (peak-v)/ peak if peak>0 else 0.0
-            if dd > max_dd:
-                max_dd = dd
-        return {
-            'initial_equity': intial_eq,
-            'final_equity': final_eq,
-            'total_return': total_return,  
-            'period_returns': period_returns,  
-            'sharpe': sharpe,  
-            'max_drawdown': max_dd  
-        }
\ No newline at end of file
+        if self._streamed is not None and self._streamed[0] is self.equity_by_symbol:
+            metrics = dict(self._streamed[1])
+            metrics['by_symbol'] = {PORTFOLIO: dict(self._streamed[1])}
+            return metrics
+        curves = self.equity_by_symbol
+        if self._allocation is not None and PORTFOLIO not in curves:
+            _, values = self.portfolio_curve()
+        else:
+            # serial and portfolio curves need no timestamp alignment; skip converting them
+            values = np.concatenate([curve_values(c) for c in curves.values()])
+        metrics = curve_metrics(values, traded_notional(self.trades))
+        metrics['by_symbol'] = {
+            sym: curve_metrics(curve_values(curve),
+                               traded_notional(self.trades, None if sym == PORTFOLIO else sym))
+            for sym, curve in self.equity_by_symbol.items()
+        }
+        return metrics
+
+def _run_symbol_shard(jobs, profiler=None):
+    '''Worker entry point: run each (symbol, ticks, strategies, cash, seed, execution, vectorized) job on a fresh Engine.'''
+    return [Engine(initial_cash=cash, seed=seed, execution=execution, profiler=profiler)
+            ._run_symbol(symbol, ticks, strat_list, vectorized)
+            for symbol, ticks, strat_list, cash, seed, execution, vectorized in jobs]
+
+
+# what unpacking or placing a signal of the wrong shape or types raises
+_MALFORMED_SIGNAL = (TypeError, ValueError)
+
+
+def _signal_rejection(action, qty):
+    '''The rejection code for a signal's action and quantity, or None if it may be placed.'''
+    if not qty > 0:
+        return INVALID_QUANTITY
+    if action != 'BUY' and action != 'SELL':
+        return INVALID_ACTION
+    if int(qty) <= 0:
+        return INVALID_QUANTITY
+    return None
+
+
+def _drop_first(ticks, n: int):
+    '''One symbol's time-sorted ticks without the first n.'''
+    if isinstance(ticks, SymbolTicks):
+        return SymbolTicks(ticks.symbol, ticks.timestamps[n:], ticks.prices[n:])
+    return ticks[n:]
+
+
+def _skip_consumed(stream, skip: Dict[str, int], counts: Dict[str, int]):
+    '''
+    The ticks of a flat stream after the first skip[s] of each symbol s,
+    tallying every tick in counts. Raises _check_extends's ValueError once
+    the stream ends if it had fewer ticks of a symbol than skip.
+    '''
+    for tick in stream:
+        n = counts[tick.symbol] = counts.get(tick.symbol, 0) + 1
+        if n > skip.get(tick.symbol, 0):
+            yield tick
+    _check_extends(counts, skip)
+
+
+def _starting_at(stream, since):
+    '''A time-sorted stream, raising ValueError before its first tick if that is older than `since`.'''
+    stream = iter(stream)
+    for tick in stream:
+        if tick.timestamp < since:
+            raise ValueError(f"The new ticks start at {tick.timestamp}, before the checkpoint's last tick "
+                             f"at {since}")
+        yield tick
+        break
+    yield from stream
+
+
+def _check_extends(counts: Dict[str, int], skip: Dict[str, int]) -> None:
+    '''Raise ValueError unless every symbol has at least as many ticks as a checkpoint consumed.'''
+    short = sorted(sym for sym, n in skip.items() if counts.get(sym, 0) < n)
+    if short:
+        raise ValueError(f"The data has fewer ticks than the checkpoint consumed for {', '.join(short)}; "
+                         "resume with the checkpointed data plus the new ticks, or only the new ticks "
+                         "with new_only=True")
+
+
+def _add_exact(partials: List[float], x: float) -> None:
+    '''
+    Add x to a list of non-overlapping float partials whose exact sum is the
+    running total (Shewchuk's algorithm, as used by math.fsum). Additions and
+    removals are exact, so math.fsum(partials) never drifts.
+    '''
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x]
+
@@ -0,0 +1,237 @@
+"""
+Pluggable execution simulation: how an order that reached the market fills.
+
+An ExecutionModel turns (side, quantity, reference price) into a filled
+quantity and price, 0 filled meaning the execution failed. Models compose
+left to right with Chain:
+
+    Engine(execution=Chain(RandomFailure(0.01), Spread(2.0), Slippage(1.0),
+                           Latency(0.0005, delay=2), PartialFill(0.3)))
+
+Randomness comes from a NumPy Generator per (engine seed, symbol) stream
+(symbol_rng, read through a UniformStream) and every model consumes a fixed
+number of uniforms per order (`draws`), so the n-th order of a symbol sees
+the same draws whatever the run mode, symbol order or number of workers. Each model has a scalar
+`fill` for the tick-by-tick engine and a `fill_batch` evaluating many orders
+at once with NumPy; both use the same arithmetic, so they agree bit for bit.
+"""
+import hashlib
+import math
+from typing import Tuple
+
+import numpy as np
+
+
+def symbol_rng(seed, symbol: str) -> np.random.Generator:
+    '''Independent, reproducible Generator for one symbol of a run seeded with `seed`.'''
+    digest = hashlib.sha256(f"{seed}:{symbol}".encode()).digest()
+    return np.random.default_rng(int.from_bytes(digest[:16], 'little'))
+
+
+class UniformStream:
+    """
+    A Generator's uniforms handed out strictly in order, drawn `block` at a
+    time so one value costs a list index rather than a NumPy call. Scalar
+    `next` and array `take` share the buffer, so mixing them never skips
+    or reorders values. Pickles as the generator state the buffer was
+    drawn from and the read position, not the buffered values.
+    """
+    __slots__ = ('rng', 'block', '_buf', '_pos', '_refill_state')
+
+    def __init__(self, rng: np.random.Generator, block: int = 4096):
+        self.rng = rng
+        self.block = block
+        self._buf = []
+        self._pos = 0
+        self._refill_state = None
+
+    def __getstate__(self):
+        return self.rng, self.block, self._refill_state, self._pos
+
+    def __setstate__(self, state):
+        self.rng, self.block, self._refill_state, self._pos = state
+        self._buf = []
+        if self._refill_state is not None:
+            bit_generator = type(self.rng.bit_generator)()
+            bit_generator.state = self._refill_state
+            self._buf = np.random.Generator(bit_generator).random(self.block).tolist()
+
+    def next(self) -> float:
+        if self._pos == len(self._buf):
+            self._refill_state = self.rng.bit_generator.state
+            self._buf = self.rng.random(self.block).tolist()
+            self._pos = 0
+        self._pos += 1
+        return self._buf[self._pos - 1]
+
+    def take(self, n: int) -> np.ndarray:
+        buffered = self._buf[self._pos:self._pos + n]
+        self._pos += len(buffered)
+        if len(buffered) == n:
+            return np.array(buffered, dtype=np.float64)
+        return np.concatenate((np.array(buffered, dtype=np.float64), self.rng.random(n - len(buffered))))
+
+
+class ExecutionModel:
+    """Base model: fills everything at the reference price and draws nothing."""
+    # uniforms consumed per order
+    draws = 0
+
+    def fill(self, side: int, quantity: int, price: float, u) -> Tuple[int, float]:
+        '''Filled quantity and price of one order; `u` holds `draws` uniforms in [0, 1).'''
+        return quantity, price
+
+    def fill_batch(self, sides: np.ndarray, quantities: np.ndarray, prices: np.ndarray, u: np.ndarray):
+        '''
+        `fill` over arrays of orders: sides (+1 BUY / -1 SELL), int64
+        quantities, float64 prices and a (n, draws) array of uniforms.
+        Returns (filled quantities, fill prices).
+        '''
+        return quantities, prices
+
+    def params(self) -> dict:
+        '''Constructor parameters, used in cache keys.'''
+        return {}
+
+
+class RandomFailure(ExecutionModel):
+    """Each order fails outright with probability `rate`."""
+    draws = 1
+
+    def __init__(self, rate: float = 0.01):
+        self.rate = rate
+
+    def fill(self, side, quantity, price, u):
+        return (0 if u[0] < self.rate else quantity), price
+
+    def fill_batch(self, sides, quantities, prices, u):
+        return np.where(u[:, 0] < self.rate, 0, quantities), prices
+
+    def params(self):
+        return {'rate': self.rate}
+
+
+class Spread(ExecutionModel):
+    """Buys pay and sells receive half a quoted spread of `bps` basis points."""
+
+    def __init__(self, bps: float):
+        self.bps = bps
+        self._half = bps / 20_000
+
+    def fill(self, side, quantity, price, u):
+        return quantity, price * (1.0 + side * self._half)
+
+    def fill_batch(self, sides, quantities, prices, u):
+        return quantities, prices * (1.0 + sides * self._half)
+
+    def params(self):
+        return {'bps': self.bps}
+
+
+class Slippage(ExecutionModel):
+    """
+    Adverse price impact of `bps` basis points plus `impact_bps` per share
+    traded, so larger orders fill at worse prices.
+    """
+
+    def __init__(self, bps: float = 0.0, impact_bps: float = 0.0):
+        self.bps = bps
+        self.impact_bps = impact_bps
+
+    def fill(self, side, quantity, price, u):
+        return quantity, price * (1.0 + side * ((self.bps + self.impact_bps * quantity) / 10_000))
+
+    def fill_batch(self, sides, quantities, prices, u):
+        return quantities, prices * (1.0 + sides * ((self.bps + self.impact_bps * quantities) / 10_000))
+
+    def params(self):
+        return {'bps': self.bps, 'impact_bps': self.impact_bps}
+
+
+class Latency(ExecutionModel):
+    """
+    The price moves while the order is in flight: a zero-mean uniform return
+    with standard deviation `volatility` * sqrt(`delay`), `volatility` being
+    the per-tick return volatility and `delay` the latency in ticks.
+    """
+    draws = 1
+
+    def __init__(self, volatility: float, delay: float = 1.0):
+        self.volatility = volatility
+        self.delay = delay
+        # a uniform on [-a, a] has standard deviation a / sqrt(3)
+        self._width = volatility * math.sqrt(3.0 * delay)
+
+    def fill(self, side, quantity, price, u):
+        return quantity, price * (1.0 + self._width * (2.0 * u[0] - 1.0))
+
+    def fill_batch(self, sides, quantities, prices, u):
+        return quantities, prices * (1.0 + self._width * (2.0 * u[:, 0] - 1.0))
+
+    def params(self):
+        return {'volatility': self.volatility, 'delay': self.delay}
+
+
+class PartialFill(ExecutionModel):
+    """
+    With probability `probability` only a uniform fraction between
+    `min_ratio` and 1 of the order fills (at least one share).
+    """
+    draws = 2
+
+    def __init__(self, min_ratio: float = 0.5, probability: float = 1.0):
+        self.min_ratio = min_ratio
+        self.probability = probability
+
+    def fill(self, side, quantity, price, u):
+        if quantity and u[0] < self.probability:
+            quantity = max(1, math.floor(quantity * (self.min_ratio + (1.0 - self.min_ratio) * u[1])))
+        return quantity, price
+
+    def fill_batch(self, sides, quantities, prices, u):
+        partial = np.maximum(1, np.floor(quantities * (self.min_ratio + (1.0 - self.min_ratio) * u[:, 1])))
+        hit = (quantities != 0) & (u[:, 0] < self.probability)
+        return np.where(hit, partial.astype(np.int64), quantities), prices
+
+    def params(self):
+        return {'min_ratio': self.min_ratio, 'probability': self.probability}
+
+
+class Chain(ExecutionModel):
+    """Applies `models` in order, each to the previous one's fill; a failed order stays failed."""
+
+    def __init__(self, *models: ExecutionModel):
+        self.models = models
+        self.draws = sum(m.draws for m in models)
+
+    def fill(self, side, quantity, price, u):
+        pos = 0
+        for m in self.models:
+            quantity, price = m.fill(side, quantity, price, u[pos:pos + m.draws])
+            pos += m.draws
+        return quantity, price
+
+    def fill_batch(self, sides, quantities, prices, u):
+        pos = 0
+        for m in self.models:
+            quantities, prices = m.fill_batch(sides, quantities, prices, u[:, pos:pos + m.draws])
+            pos += m.draws
+        return quantities, prices
+
+    def params(self):
+        return {'models': [[type(m).__name__, m.params()] for m in self.models]}
+
+
+def simulate_fills(model: ExecutionModel, uniforms: UniformStream, sides, quantities, prices):
+    '''
+    Fill a batch of orders in one call: takes every order's uniforms from
+    `uniforms` at once, in the order the scalar path would, and returns
+    (filled quantities, fill prices) as arrays.
+    '''
+    sides = np.asarray(sides, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    u = uniforms.take(len(quantities) * model.draws).reshape(len(quantities), model.draws)
+    filled, fill_prices = model.fill_batch(sides, quantities, prices, u)
+    return (np.broadcast_to(np.asarray(filled, dtype=np.int64), quantities.shape),
+            np.broadcast_to(np.asarray(fill_prices, dtype=np.float64), prices.shape))
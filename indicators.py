@@ -0,0 +1,198 @@
+"""
+Incremental indicators for streaming strategies.
+
+Each indicator consumes one price per update and keeps only what it needs
+(the window's prices, a running sum, a monotonic deque), so per-tick cost
+does not grow with the window length. An IndicatorSet holds the indicators for
+one symbol and can be shared by several strategies: each tick is fed to
+every indicator exactly once, whichever strategy sees it first.
+"""
+from collections import deque
+from functools import reduce
+from operator import add
+from typing import Optional
+
+import numpy as np
+
+
+class SMA:
+    """
+    Simple moving average from a running sum: sum += new - evicted, re-summed
+    from the window's prices (oldest first) once every `window` updates so
+    rounding cannot drift. Amortized O(1); rolling_mean replays the same
+    float operations, so streaming and batch values agree exactly.
+    """
+    __slots__ = ('window', '_prices', '_sum', '_age', 'value')
+
+    def __init__(self, window: int):
+        if window <= 0:
+            raise ValueError("SMA window must be positive.")
+        self.window = window
+        self._prices = deque(maxlen=window)
+        self._sum = 0.0
+        self._age = 0  # updates since the sum was last re-summed
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        prices = self._prices
+        if len(prices) < self.window:
+            prices.append(price)
+            if len(prices) < self.window:
+                return None
+            self._sum = reduce(add, prices)
+        else:
+            evicted = prices[0]
+            prices.append(price)
+            self._age += 1
+            if self._age == self.window:
+                self._age = 0
+                self._sum = reduce(add, prices)
+            else:
+                self._sum += price - evicted
+        self.value = self._sum / self.window
+        return self.value
+
+
+def rolling_mean(prices: np.ndarray, window: int) -> np.ndarray:
+    '''
+    SMA over the last axis of `prices`, as if each row were fed to a fresh
+    SMA: the same anchor sums and running updates, so the floats match it
+    exactly. NaN until the window is full.
+    '''
+    n = prices.shape[-1]
+    out = np.full(prices.shape, np.nan)
+    if n < window:
+        return out
+    m = n - window + 1
+    blocks = -(-m // window)
+    # one row of `window` running sums per anchor, each step adding new - evicted
+    steps = np.zeros(prices.shape[:-1] + (blocks * window,))
+    steps[..., 1:m] = prices[..., window:] - prices[..., :m - 1]
+    anchor = prices[..., :m:window].copy()
+    for k in range(1, window):
+        anchor += prices[..., k:m + k:window]
+    steps[..., :m:window] = anchor
+    sums = np.add.accumulate(steps.reshape(prices.shape[:-1] + (blocks, window)), axis=-1)
+    out[..., window - 1:] = sums.reshape(steps.shape)[..., :m] / window
+    return out
+
+
+class EMA:
+    """Exponential moving average with alpha = 2 / (window + 1), seeded with the first price."""
+    __slots__ = ('window', 'alpha', 'value')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 2.0 / (window + 1)
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> float:
+        if self.value is None:
+            self.value = price
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class _RollingExtreme:
+    __slots__ = ('window', '_deque', '_count', 'value')
+
+    def __init__(self, window: int):
+        self.window = window
+        self._deque = deque()  # (tick number, price), monotonic in price
+        self._count = 0
+        self.value: Optional[float] = None
+
+    def _dominates(self, new: float, old: float) -> bool:
+        raise NotImplementedError
+
+    def update(self, price: float) -> float:
+        d = self._deque
+        while d and self._dominates(price, d[-1][1]):
+            d.pop()
+        d.append((self._count, price))
+        if d[0][0] <= self._count - self.window:
+            d.popleft()
+        self._count += 1
+        self.value = d[0][1]
+        return self.value
+
+
+class RollingMax(_RollingExtreme):
+    """Maximum of the last `window` prices via a monotonic deque (amortized O(1))."""
+    __slots__ = ()
+
+    def _dominates(self, new, old):
+        return new >= old
+
+
+class RollingMin(_RollingExtreme):
+    """Minimum of the last `window` prices via a monotonic deque (amortized O(1))."""
+    __slots__ = ()
+
+    def _dominates(self, new, old):
+        return new <= old
+
+
+class RunLength:
+    """
+    Length of the current run of non-decreasing (`up`) and non-increasing
+    (`down`) steps. A flat step extends both runs.
+    """
+    __slots__ = ('_prev', 'up', 'down')
+
+    def __init__(self):
+        self._prev: Optional[float] = None
+        self.up = 0
+        self.down = 0
+
+    def update(self, price: float) -> None:
+        prev = self._prev
+        if prev is not None:
+            self.up = self.up + 1 if prev <= price else 0
+            self.down = self.down + 1 if prev >= price else 0
+        self._prev = price
+
+
+class IndicatorSet:
+    """
+    The indicators for one symbol. Strategies ask for what they need
+    (`sma(10)` twice returns the same object) and call `update(tick)` on
+    every tick; repeated calls with the same tick are ignored.
+    """
+    __slots__ = ('_indicators', '_updates', '_last_tick')
+
+    def __init__(self):
+        self._indicators = {}
+        self._updates = []
+        self._last_tick = None
+
+    def _get(self, key, factory):
+        ind = self._indicators.get(key)
+        if ind is None:
+            ind = self._indicators[key] = factory()
+            self._updates.append(ind.update)
+        return ind
+
+    def sma(self, window: int) -> SMA:
+        return self._get(('sma', window), lambda: SMA(window))
+
+    def ema(self, window: int) -> EMA:
+        return self._get(('ema', window), lambda: EMA(window))
+
+    def rolling_max(self, window: int) -> RollingMax:
+        return self._get(('max', window), lambda: RollingMax(window))
+
+    def rolling_min(self, window: int) -> RollingMin:
+        return self._get(('min', window), lambda: RollingMin(window))
+
+    def run_length(self) -> RunLength:
+        return self._get(('run',), RunLength)
+
+    def update(self, tick) -> None:
+        if tick is self._last_tick:
+            return
+        self._last_tick = tick
+        price = tick.price
+        for update in self._updates:
+            update(price)
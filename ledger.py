@@ -0,0 +1,227 @@
+"""
+Compact, array-backed trade ledger and position book for the Engine.
+
+Symbols are interned once into integer ids (SymbolTable). The ledger keeps
+one growable array.array per field with a fixed schema, and the position
+book keeps quantity / average price arrays indexed by symbol id, so fills
+append a few machine words instead of allocating dicts.
+"""
+from array import array
+import datetime
+import numpy as np
+
+BUY = 1
+SELL = -1
+_SIDE_NAMES = {BUY: 'BUY', SELL: 'SELL'}
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def to_epoch_ns(ts) -> int:
+    '''Nanoseconds since the Unix epoch for a datetime, numpy datetime64 or int (already ns).'''
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    if isinstance(ts, datetime.datetime):
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        delta = ts - _EPOCH
+        return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+    if isinstance(ts, np.datetime64):
+        return int(ts.astype('datetime64[ns]').astype(np.int64))
+    raise TypeError(f"Unsupported timestamp type: {type(ts).__name__}")
+
+
+def from_epoch_ns(ns: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(microseconds=ns // 1_000)
+
+
+class SymbolTable:
+    """Interns symbol strings to dense integer ids, in order of first use."""
+    __slots__ = ('ids', 'names')
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def id(self, symbol: str) -> int:
+        sid = self.ids.get(symbol)
+        if sid is None:
+            sid = self.ids[symbol] = len(self.names)
+            self.names.append(symbol)
+        return sid
+
+    def __len__(self):
+        return len(self.names)
+
+
+class TradeLedger:
+    """
+    Append-only trade log with columns timestamp_ns, symbol_id, side
+    (+1 BUY / -1 SELL), quantity, price and cash_after.
+    """
+    __slots__ = ('symbols', 'timestamp_ns', 'symbol_id', 'side', 'quantity', 'price', 'cash_after',
+                 '_last_ts', '_last_ns')
+    COLUMNS = ('timestamp_ns', 'symbol_id', 'side', 'quantity', 'price', 'cash_after')
+
+    def __init__(self, symbols: SymbolTable = None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        # fills on the same tick share a timestamp object; convert it once
+        self._last_ts = None
+        self._last_ns = 0
+        self.timestamp_ns = array('q')
+        self.symbol_id = array('i')
+        self.side = array('b')
+        self.quantity = array('q')
+        self.price = array('d')
+        self.cash_after = array('d')
+
+    def append(self, timestamp, symbol: str, side: int, quantity: int, price: float, cash_after: float) -> None:
+        if timestamp is not self._last_ts:
+            self._last_ts = timestamp
+            self._last_ns = to_epoch_ns(timestamp)
+        self.timestamp_ns.append(self._last_ns)
+        self.symbol_id.append(self.symbols.id(symbol))
+        self.side.append(side)
+        self.quantity.append(quantity)
+        self.price.append(price)
+        self.cash_after.append(cash_after)
+
+    def extend(self, other: 'TradeLedger') -> None:
+        '''Append another ledger's trades, re-mapping its symbol ids into this ledger's table.'''
+        remap = [self.symbols.id(name) for name in other.symbols.names]
+        self.timestamp_ns.extend(other.timestamp_ns)
+        self.symbol_id.extend(remap[sid] for sid in other.symbol_id)
+        self.side.extend(other.side)
+        self.quantity.extend(other.quantity)
+        self.price.extend(other.price)
+        self.cash_after.extend(other.cash_after)
+
+    def __len__(self):
+        return len(self.side)
+
+    def __eq__(self, other):
+        if not isinstance(other, TradeLedger):
+            return NotImplemented
+        return list(self.records()) == list(other.records())
+
+    def __iter__(self):
+        return self.records()
+
+    def records(self):
+        '''Yield each trade as a dict (timestamp as datetime), e.g. for logging or JSON.'''
+        names = self.symbols.names
+        for ts, sid, side, qty, price, cash in zip(self.timestamp_ns, self.symbol_id, self.side,
+                                                    self.quantity, self.price, self.cash_after):
+            yield {'timestamp': from_epoch_ns(ts), 'action': _SIDE_NAMES[side], 'symbol': names[sid],
+                   'quantity': qty, 'price': price, 'cash_after': cash}
+
+    def to_numpy(self):
+        '''
+        NumPy copies of every column, plus the symbol lookup table. Views
+        would pin the growable arrays, so the next append would raise
+        BufferError while a caller holds them; one memcpy per column avoids that.
+        '''
+        return {
+            'timestamp': np.frombuffer(self.timestamp_ns, dtype=np.int64).astype('datetime64[ns]'),
+            'symbol_id': np.frombuffer(self.symbol_id, dtype=np.int32).copy(),
+            'side': np.frombuffer(self.side, dtype=np.int8).copy(),
+            'quantity': np.frombuffer(self.quantity, dtype=np.int64).copy(),
+            'price': np.frombuffer(self.price, dtype=np.float64).copy(),
+            'cash_after': np.frombuffer(self.cash_after, dtype=np.float64).copy(),
+            'symbols': np.array(self.symbols.names, dtype=object),
+        }
+
+    def to_dataframe(self):
+        '''pandas DataFrame over the columns, with the symbol column as a Categorical.'''
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("TradeLedger.to_dataframe requires pandas") from e
+        cols = self.to_numpy()
+        symbols = pd.Categorical.from_codes(cols.pop('symbol_id'), categories=list(cols.pop('symbols')))
+        return pd.DataFrame({'timestamp': cols['timestamp'], 'symbol': symbols, 'side': cols['side'],
+                             'quantity': cols['quantity'], 'price': cols['price'],
+                             'cash_after': cols['cash_after']})
+
+    def save(self, path) -> None:
+        '''Write the columns to an .npz file straight from their buffers.'''
+        cols = self.to_numpy()
+        cols['symbols'] = np.array(self.symbols.names, dtype=str)
+        np.savez(path, **cols)
+
+
+class PositionBook:
+    """
+    Quantity and average price per symbol, in arrays indexed by symbol id.
+    Read access mirrors the old {symbol: {'quantity', 'avg_price'}} dict.
+    """
+    __slots__ = ('symbols', 'quantity', 'avg_price', '_open')
+
+    def __init__(self, symbols: SymbolTable = None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.quantity = array('q')
+        self.avg_price = array('d')
+        self._open = bytearray()
+
+    def open(self, symbol: str) -> int:
+        '''Return the symbol's id, creating a flat position for it if needed.'''
+        sid = self.symbols.id(symbol)
+        while len(self._open) <= sid:
+            self.quantity.append(0)
+            self.avg_price.append(0.0)
+            self._open.append(0)
+        self._open[sid] = 1
+        return sid
+
+    def _sid(self, symbol):
+        sid = self.symbols.ids.get(symbol)
+        return sid if sid is not None and sid < len(self._open) and self._open[sid] else None
+
+    def __contains__(self, symbol):
+        return self._sid(symbol) is not None
+
+    def quantity_of(self, symbol) -> int:
+        sid = self._sid(symbol)
+        return self.quantity[sid] if sid is not None else 0
+
+    def avg_price_of(self, symbol) -> float:
+        sid = self._sid(symbol)
+        return self.avg_price[sid] if sid is not None else 0.0
+
+    def set(self, symbol, quantity: int, avg_price: float) -> None:
+        sid = self.open(symbol)
+        self.quantity[sid] = quantity
+        self.avg_price[sid] = avg_price
+
+    def __len__(self):
+        return sum(self._open)
+
+    def __iter__(self):
+        return (sym for sym, _ in self.items())
+
+    def __getitem__(self, symbol):
+        sid = self._sid(symbol)
+        if sid is None:
+            raise KeyError(symbol)
+        return {'quantity': self.quantity[sid], 'avg_price': self.avg_price[sid]}
+
+    def get(self, symbol, default=None):
+        return self[symbol] if symbol in self else default
+
+    def items(self):
+        names = self.symbols.names
+        for sid, is_open in enumerate(self._open):
+            if is_open:
+                yield names[sid], {'quantity': self.quantity[sid], 'avg_price': self.avg_price[sid]}
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def update(self, positions) -> None:
+        '''Merge {symbol: {'quantity', 'avg_price'}} (or another book) into this one.'''
+        for sym, pos in positions.items():
+            self.set(sym, pos['quantity'], pos['avg_price'])
+
+    def __eq__(self, other):
+        if isinstance(other, (PositionBook, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
@@ -1,21 +1,42 @@
+"""
+Backtest command line.
+
+    python main.py                        generate market_data.csv/.ticks and backtest them
+    python main.py --reuse-data --no-plot reuse the last generated data, skip the PNGs
+    python main.py --data ticks.csv --strategy MomentumStrategy --no-report
+    python main.py --reuse-data --bars 1s      backtest one-second OHLCV bars instead of ticks
+    python main.py --reuse-data --isolated     per-symbol sub-portfolios, unchanged symbols from the cache
+
+Heavy modules (the engine and NumPy, the data generator, reporting,
+matplotlib) are imported by the stage that needs them, so skipped stages
+cost nothing at start-up.
+"""
+import argparse
 import csv  
+import os
+import time
 from typing import List, Dict, Any
-from data_generator import market_data_generator  
-from models import load_market_data  
 from collections import defaultdict
-from strategies import MovingAverageStrategy, MomentumStrategy  
-from engine import Engine  
-import matplotlib.pyplot as plt
-from reporting import save_report
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA', 'META', 'AMC']
+START_PRICE = 150
+VOLATILITIES = [0.02, 0.002, .2, 1, 0.3]
+OUT_FILE = 'market_data.csv'
+STORE_FILE = 'market_data.ticks'
+STRATEGY_NAMES = ('MovingAverageStrategy', 'MomentumStrategy')
+
 def generate_merged_market_csv(symbols: List[str],  
                                start_price:  List[float],  
                                ticks_per_symbol: int,  
                                volatilities: float,  
-                               out_filename: str):  
+                               out_filename: str,
+                               store_filename: str = None):  
     """  
     Generate merged market_data.csv by round-robin polling per-symbol generators.  
     Writes CSV with header: timestamp, symbol, price  
+    If store_filename is given, the same ticks are also written as a binary tick store.
     """  
+    from data_generator import market_data_generator
     gens = {sym: market_data_generator(sym, start_price, volatility=volatility, interval=0.0)  
             for sym,volatility in zip(symbols,volatilities)}  
   
@@ -32,18 +53,36 @@ def generate_merged_market_csv(symbols: List[str],
         writer.writerow(['timestamp', 'symbol', 'price'])  
         for t in ticks:  
             writer.writerow([t.timestamp.isoformat(), t.symbol, f"{t.price:.2f}"])  
+    if store_filename:
+        from models import MarketDataColumns
+        from tickstore import write_tick_store
+        write_tick_store(store_filename, MarketDataColumns.from_ticks(ticks))
     print(f"Generated {len(ticks)} ticks across {len(symbols)} symbols to {out_filename}")  
   
-def build_strategies_for_symbols(symbols: List[str]):  
+def build_strategies_for_symbols(symbols: List[str], names=STRATEGY_NAMES):  
     """  
-    Create a list of strategy instances, one MA and one Momentum per symbol.  
-    Strategies are stateful and tied to the symbol passed in.  
+    Create a list of strategy instances per symbol, one per class in `names`
+    (by default one MA and one Momentum).
+    Strategies are stateful and tied to the symbol passed in; they share
+    the symbol's IndicatorSet so each price is folded into the indicators once.
     """  
+    import strategies as strategy_module
+    from indicators import IndicatorSet
     strategies:Dict[str,Any ] = defaultdict(list)
     for s in symbols:  
-        strategies[s].append(MovingAverageStrategy(symbol=s))
-        strategies[s].append(MomentumStrategy(symbol=s)) 
+        indicators = IndicatorSet()
+        for name in names:
+            strategies[s].append(getattr(strategy_module, name)(symbol=s, indicators=indicators))
     return strategies  
+
+
+def load_data(path):
+    '''Open a tick store (memory-mapped) or load a CSV into columns.'''
+    from tickstore import is_tick_store, open_tick_store
+    if is_tick_store(path):
+        return open_tick_store(path)
+    from models import load_market_data_columnar
+    return load_market_data_columnar(path)
   
 
 def try_plot_equity(equity_curve, outpath="equity_curve.png"):
@@ -51,6 +90,7 @@ def try_plot_equity(equity_curve, outpath="equity_curve.png"):
         import matplotlib.pyplot as plt
     except Exception:
         return None
+    from reporting import decimate_curve
 
     if not equity_curve:
         return None
@@ -62,16 +102,15 @@ def try_plot_equity(equity_curve, outpath="equity_curve.png"):
         for symbol, curve in equity_curve.items():
             if not curve:
                 continue
-            # unzip (datetime, value) pairs
-            times, values = zip(*curve)
+            # min/max decimation to the figure's resolution keeps every peak and trough
+            times, values = decimate_curve(curve)
             plt.plot(times, values, label=f"Equity {symbol}")
     else:
         # Fallback for old structure (list of curves)
         for i, curve in enumerate(equity_curve):
             if not curve:
                 continue
-            # unzip (datetime, value) pairs
-            times, values = zip(*curve)
+            times, values = decimate_curve(curve)
             plt.plot(times, values, label=f"Equity {i}")
 
     if not plt.gca().has_data():
@@ -87,36 +126,85 @@ def try_plot_equity(equity_curve, outpath="equity_curve.png"):
     return outpath
 
 
-def main():  
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a backtest and write a performance report.")
+    parser.add_argument('--data', help='CSV or tick store to backtest (default: generate market data)')
+    parser.add_argument('--strategy', nargs='+', choices=STRATEGY_NAMES, default=list(STRATEGY_NAMES),
+                        help='strategy classes to run on every symbol')
+    parser.add_argument('--bars', metavar='SPEC',
+                        help='aggregate ticks into bars first: <n>t for n-tick bars, <n>ms/s/m/h/d for time bars')
+    parser.add_argument('--ticks', type=int, default=500, help='ticks per symbol when generating data')
+    parser.add_argument('--reuse-data', action='store_true',
+                        help=f'backtest {STORE_FILE} from an earlier run instead of regenerating it')
+    parser.add_argument('--no-plot', action='store_true', help='skip the equity curve PNGs')
+    parser.add_argument('--no-report', action='store_true', help='skip performance.md')
+    parser.add_argument('--isolated', action='store_true',
+                        help='run each symbol as its own sub-portfolio with an equal share of the cash, '
+                             'reusing cached per-symbol results')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='with --isolated, do not read or write the result cache')
+    return parser.parse_args(argv)
 
-    
-    ticks_per_symbol = 500
-    symbols = ['AAPL', 'MSFT', 'NVDA', 'META', 'AMC']
-    #symbols = ['AAPL']
-    start_price = 150
-    volatilities = [0.02, 0.002, .2, 1, 0.3]
-    out_file = 'market_data.csv'
-    
-    
-    generate_merged_market_csv(symbols, start_price, ticks_per_symbol, volatilities, out_file)  
 
-  
-    # Load ticks from CSV into MarketDataPoint instances  
-    ticks = load_market_data(out_file)  
-    print(f"Loaded {len(ticks)} ticks from {out_file}")  
+def main(argv=None):  
+    args = parse_args(argv)
+
+    data_path = args.data
+    if data_path is None:
+        data_path = store_file = STORE_FILE
+        if args.reuse_data and os.path.exists(store_file):
+            print(f"Reusing {store_file}")
+        else:
+            generate_merged_market_csv(SYMBOLS, START_PRICE, args.ticks, VOLATILITIES, OUT_FILE, store_file)
+
+    ticks = load_data(data_path)
+    print(f"Loaded {len(ticks)} ticks from {data_path}")  
+    n_ticks, aggregate_s = len(ticks), 0.0
+    if args.bars:
+        from bars import resample
+        t0 = time.perf_counter()
+        ticks = resample(ticks, args.bars)
+        aggregate_s = time.perf_counter() - t0
+        print(f"Aggregated {n_ticks} ticks into {len(ticks)} {args.bars} bars in {aggregate_s:.3f}s")
 
-    
     # create strategy instances for each symbol and run them all on the merged time series  
-    strategies = build_strategies_for_symbols(symbols) 
-    
+    strategies = build_strategies_for_symbols(ticks.symbols, args.strategy) 
+
+    from engine import Engine
     engine = Engine()  
-    results = engine.run(ticks, strategies) 
+    t0 = time.perf_counter()
+    if not args.isolated:
+        # every symbol trades against one shared cash balance
+        results = engine.run(ticks, strategies)
+    elif args.no_cache:
+        results = engine.run(ticks, strategies, workers=1)
+    else:
+        # symbols whose ticks and strategies are unchanged since a previous run are served from the cache
+        from cache import ResultCache
+        results = engine.run(ticks, strategies, cache=ResultCache()) 
+        if results['cached_symbols']:
+            print(f"Reused cached results for {', '.join(results['cached_symbols'])}")
+    if args.bars:
+        # throughput of the bar size in use: raw ticks covered per second of aggregation plus backtest
+        elapsed = aggregate_s + time.perf_counter() - t0
+        print(f"Backtested {len(ticks)} {args.bars} bars covering {n_ticks} ticks at "
+              f"{n_ticks / elapsed:,.0f} ticks/s")
     metrics = engine.performance_metrics()  
+    print(f"Total return {metrics['total_return']:.2%}, Sharpe {metrics['sharpe']:.2f}, "
+          f"max drawdown {metrics['max_drawdown']:.2%}")
+    if results['rejections']:
+        print("Rejected orders: " + ", ".join(f"{reason} {n}" for reason, n in results['rejections'].items()))
     equity_curve = results.get("equity_curve", {})  
-    #print([j for i,j in equity_curve])
-    image = try_plot_equity(equity_curve, outpath="equity_curve.png")  
-    save_report("performance.md", metrics, equity_curve, image_path=image)  
-    print("Backtest complete (time mode). Report written to performance.md")  
+
+    image, symbol_images = None, None
+    if not args.no_plot:
+        from reporting import save_symbol_plots
+        image = try_plot_equity(equity_curve, outpath="equity_curve.png")  
+        symbol_images = save_symbol_plots(equity_curve, "plots", workers=os.cpu_count())
+    if not args.no_report:
+        from reporting import save_report
+        save_report("performance.md", metrics, equity_curve, image_path=image, symbol_images=symbol_images)  
+        print("Backtest complete (time mode). Report written to performance.md")  
 
 if __name__ == "__main__":  
-     main()  
\ No newline at end of file
+     main()  
@@ -0,0 +1,408 @@
+"""
+Vectorized performance metrics over equity curves.
+
+Every function takes a NumPy array of equity values (or of per-period
+returns) and runs in a handful of array passes, so a 10M-point curve takes
+milliseconds. `curve_values` converts the engine's [(timestamp, equity)]
+lists. Rolling versions return one value per point, and StreamingMetrics
+keeps the same statistics in O(1) per update for live feeds.
+
+Conventions match the original Engine.performance_metrics: simple
+returns (0 where the previous equity is 0), Sharpe as mean / population
+std of returns annualized with sqrt(252), drawdown relative to the running
+peak.
+"""
+import datetime
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+PERIODS_PER_YEAR = 252
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def curve_values(curve) -> np.ndarray:
+    '''Equity values of a [(timestamp, equity)] curve (or any 1-D array) as float64.'''
+    if isinstance(curve, np.ndarray):
+        return curve.astype(np.float64, copy=False)
+    return np.fromiter((v for _, v in curve), dtype=np.float64, count=len(curve))
+
+
+def curve_times(curve) -> np.ndarray:
+    '''Timestamps of a [(timestamp, equity)] curve as datetime64[us].'''
+    if len(curve) and isinstance(curve[0][0], datetime.datetime) and curve[0][0].tzinfo is None:
+        # microseconds since the epoch by timedelta arithmetic: several times
+        # faster than NumPy's conversion of datetime objects
+        try:
+            micros = np.fromiter(((t - _EPOCH) // _MICROSECOND for t, _ in curve), dtype=np.int64, count=len(curve))
+            return micros.view('datetime64[us]')
+        except TypeError:
+            pass
+    return np.array([t for t, _ in curve], dtype='datetime64[us]')
+
+
+def simple_returns(values: np.ndarray) -> np.ndarray:
+    '''Per-period returns v[i]/v[i-1] - 1, with 0.0 where v[i-1] is 0.'''
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return np.empty(0, dtype=np.float64)
+    prev, curr = values[:-1], values[1:]
+    out = np.zeros(len(curr), dtype=np.float64)
+    np.divide(curr, prev, out=out, where=prev != 0)
+    out -= prev != 0
+    return out
+
+
+def sharpe_ratio(returns: np.ndarray, periods_per_year: int = PERIODS_PER_YEAR) -> float:
+    if len(returns) < 2:
+        return 0.0
+    std = returns.std()
+    return float(returns.mean() / std * math.sqrt(periods_per_year)) if std > 0 else 0.0
+
+
+def sortino_ratio(returns: np.ndarray, periods_per_year: int = PERIODS_PER_YEAR) -> float:
+    '''Mean return over downside deviation (root mean square of the negative returns).'''
+    if len(returns) < 2:
+        return 0.0
+    downside = np.minimum(returns, 0.0)
+    dd = math.sqrt(float(np.dot(downside, downside)) / len(returns))
+    return float(returns.mean() / dd * math.sqrt(periods_per_year)) if dd > 0 else 0.0
+
+
+def drawdown(values: np.ndarray) -> np.ndarray:
+    '''Fractional drawdown from the running peak at every point (0 where the peak is not positive).'''
+    values = np.asarray(values, dtype=np.float64)
+    peak = np.maximum.accumulate(values)
+    out = np.zeros(len(values), dtype=np.float64)
+    np.divide(peak - values, peak, out=out, where=peak > 0)
+    return out
+
+
+def _drawdown_stats(values: np.ndarray) -> Tuple[float, int]:
+    '''(max drawdown, max drawdown duration) from a single running-peak pass.'''
+    if not len(values):
+        return 0.0, 0
+    peak = np.maximum.accumulate(values)
+    if peak[0] > 0:
+        # peak only grows, so it is positive everywhere
+        max_dd = float(np.max((peak - values) / peak))
+    else:
+        max_dd = float(drawdown(values).max())
+    # the longest gap between points at the running peak (or from the last one to the end)
+    highs = np.flatnonzero(values >= peak)
+    gaps = np.diff(highs, append=len(values))
+    return max(max_dd, 0.0), int(gaps.max()) - 1
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    return _drawdown_stats(np.asarray(values, dtype=np.float64))[0]
+
+
+def max_drawdown_duration(values: np.ndarray) -> int:
+    '''Longest number of periods spent below a previous peak before a new high (or the end).'''
+    return _drawdown_stats(np.asarray(values, dtype=np.float64))[1]
+
+
+def turnover(traded_notional: float, values: np.ndarray) -> float:
+    '''Total traded notional over mean equity.'''
+    mean = float(np.mean(values)) if len(values) else 0.0
+    return traded_notional / mean if mean else 0.0
+
+
+def traded_notional(trades, symbol: Optional[str] = None) -> float:
+    '''Sum of |quantity * price| over a TradeLedger, optionally for one symbol.'''
+    cols = trades.to_numpy()
+    notional = np.abs(cols['quantity'] * cols['price'])
+    if symbol is not None:
+        sid = trades.symbols.ids.get(symbol)
+        if sid is None:
+            return 0.0
+        notional = notional[cols['symbol_id'] == sid]
+    return float(notional.sum())
+
+
+def curve_metrics(values: np.ndarray, notional: float = 0.0,
+                  periods_per_year: int = PERIODS_PER_YEAR) -> Dict[str, Any]:
+    '''All summary statistics for one equity curve.'''
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {}
+    initial, final = float(values[0]), float(values[-1])
+    returns = simple_returns(values)
+    max_dd, duration = _drawdown_stats(values)
+    return {
+        'initial_equity': initial,
+        'final_equity': final,
+        'total_return': (final / initial - 1.0) if initial != 0 else 0.0,
+        'sharpe': sharpe_ratio(returns, periods_per_year),
+        'sortino': sortino_ratio(returns, periods_per_year),
+        'max_drawdown': max_dd,
+        'max_drawdown_duration': duration,
+        'turnover': turnover(notional, values),
+    }
+
+
+def path_metrics(values: np.ndarray, notional: Optional[np.ndarray] = None,
+                 periods_per_year: int = PERIODS_PER_YEAR) -> Dict[str, np.ndarray]:
+    '''
+    curve_metrics for every row of a (paths, points) equity matrix at once;
+    each key maps to an array with one value per path.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    paths, n = values.shape
+    initial, final = values[:, 0], values[:, -1]
+    prev, curr = values[:, :-1], values[:, 1:]
+    returns = np.zeros_like(curr)
+    np.divide(curr, prev, out=returns, where=prev != 0)
+    returns -= prev != 0
+
+    sharpe = np.zeros(paths)
+    sortino = np.zeros(paths)
+    if n > 2:
+        scale = math.sqrt(periods_per_year)
+        mean = returns.mean(axis=1)
+        std = returns.std(axis=1)
+        np.divide(mean * scale, std, out=sharpe, where=std > 0)
+        downside = np.minimum(returns, 0.0)
+        dd = np.sqrt(np.einsum('ij,ij->i', downside, downside) / (n - 1))
+        np.divide(mean * scale, dd, out=sortino, where=dd > 0)
+
+    peak = np.maximum.accumulate(values, axis=1)
+    draw = np.zeros_like(values)
+    np.divide(peak - values, peak, out=draw, where=peak > 0)
+    # points since the last running high; its maximum is the longest drawdown
+    idx = np.arange(n)
+    last_high = np.maximum.accumulate(np.where(values >= peak, idx, -1), axis=1)
+
+    total_return = np.zeros(paths)
+    np.divide(final, initial, out=total_return, where=initial != 0)
+    total_return -= initial != 0
+    mean_equity = values.mean(axis=1)
+    turnover = np.zeros(paths)
+    if notional is not None:
+        np.divide(np.asarray(notional, dtype=np.float64), mean_equity, out=turnover, where=mean_equity != 0)
+    return {
+        'initial_equity': initial.copy(),
+        'final_equity': final.copy(),
+        'total_return': total_return,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'max_drawdown': np.maximum(draw.max(axis=1), 0.0),
+        'max_drawdown_duration': (idx - last_high).max(axis=1),
+        'turnover': turnover,
+    }
+
+
+def sum_curves(curves: Dict[str, Any], starting_values: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Combine independent sub-portfolio curves into one: on the union of
+    their timestamps, each curve contributes its latest value (its starting
+    value before its first point). Returns (times, values).
+    '''
+    times = {sym: curve_times(c) for sym, c in curves.items()}
+    union = np.unique(np.concatenate(list(times.values()))) if times else np.empty(0, 'datetime64[us]')
+    total = np.zeros(len(union), dtype=np.float64)
+    for sym, curve in curves.items():
+        values = curve_values(curve)
+        last = np.searchsorted(times[sym], union, side='right') - 1
+        total += np.where(last >= 0, values[np.maximum(last, 0)], starting_values[sym])
+    return union, total
+
+
+def _rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    '''
+    Trailing max over `window` points (fewer at the start) in O(n) with the
+    van Herk/Gil-Werman block trick: each window spans at most two blocks,
+    covered by one block's suffix max and the next block's prefix max.
+    '''
+    n = len(values)
+    pad_end = -(n + window - 1) % window
+    padded = np.concatenate([np.full(window - 1, -np.inf), values, np.full(pad_end, -np.inf)])
+    blocks = padded.reshape(-1, window)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(suffix[:n], prefix[window - 1:window - 1 + n])
+
+
+def rolling_sharpe(values: np.ndarray, window: int, periods_per_year: int = PERIODS_PER_YEAR) -> np.ndarray:
+    '''
+    Sharpe over the trailing `window` returns at each point of the curve
+    (NaN until `window` returns exist, 0 where the window has no variance).
+    '''
+    if window < 2:
+        raise ValueError("rolling_sharpe window must be at least 2.")
+    returns = simple_returns(values)
+    out = np.full(len(values), np.nan)
+    if len(returns) < window:
+        return out
+    # centre first so the sum-of-squares variance does not cancel catastrophically
+    centred = returns - returns.mean()
+    c1 = np.concatenate([[0.0], np.cumsum(centred)])
+    c2 = np.concatenate([[0.0], np.cumsum(centred * centred)])
+    s1 = c1[window:] - c1[:-window]
+    s2 = c2[window:] - c2[:-window]
+    mean = s1 / window
+    var = s2 / window - mean * mean
+    # anything below the rounding error of the prefix sums is noise, not variance
+    var[var <= 64 * np.finfo(np.float64).eps * c2[window:] / window] = 0.0
+    std = np.sqrt(var)
+    # an all-zero window (no position) is flat exactly, whatever the rounding above
+    moving = np.concatenate([[0], np.cumsum(returns != 0)])
+    std[moving[window:] == moving[:-window]] = 0.0
+    sharpe = np.zeros(len(std))
+    np.divide(mean + returns.mean(), std, out=sharpe, where=std > 0)
+    out[window:] = sharpe * math.sqrt(periods_per_year)
+    return out
+
+
+def rolling_drawdown(values: np.ndarray, window: int) -> np.ndarray:
+    '''Drawdown from the peak of the trailing `window` points at each point.'''
+    if window < 1:
+        raise ValueError("rolling_drawdown window must be positive.")
+    values = np.asarray(values, dtype=np.float64)
+    peak = _rolling_max(values, window)
+    out = np.zeros(len(values), dtype=np.float64)
+    np.divide(peak - values, peak, out=out, where=peak > 0)
+    return out
+
+
+def rolling_max_drawdown(values: np.ndarray, window: int) -> np.ndarray:
+    '''Worst trailing-window drawdown seen within the last `window` points.'''
+    return _rolling_max(rolling_drawdown(values, window), window)
+
+
+class StreamingMetrics:
+    """
+    O(1)-per-update accumulator of the curve_metrics statistics, for live
+    runs where the curve is never held in memory. Feed it one equity value
+    per period; summary() agrees with curve_metrics up to float rounding.
+    """
+    __slots__ = ('periods_per_year', 'count', 'initial', 'last', '_n', '_mean', '_m2', '_down_sq',
+                 '_sum', 'peak', 'max_drawdown', '_since_peak', 'max_drawdown_duration', 'notional')
+
+    def __init__(self, periods_per_year: int = PERIODS_PER_YEAR):
+        self.periods_per_year = periods_per_year
+        self.count = 0
+        self.initial = None
+        self.last = None
+        self._n = 0          # number of returns
+        self._mean = 0.0     # Welford running mean / M2 of returns
+        self._m2 = 0.0
+        self._down_sq = 0.0
+        self._sum = 0.0      # of equity, for turnover over mean equity
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self._since_peak = 0
+        self.max_drawdown_duration = 0
+        self.notional = 0.0
+
+    def update(self, equity: float) -> None:
+        prev = self.last
+        if prev is None:
+            self.initial = equity
+        else:
+            r = equity / prev - 1.0 if prev != 0 else 0.0
+            self._n += 1
+            delta = r - self._mean
+            self._mean += delta / self._n
+            self._m2 += delta * (r - self._mean)
+            if r < 0:
+                self._down_sq += r * r
+        self.last = equity
+        self.count += 1
+        self._sum += equity
+
+        if equity >= self.peak:
+            self.peak = equity
+            self._since_peak = 0
+        else:
+            self._since_peak += 1
+            if self._since_peak > self.max_drawdown_duration:
+                self.max_drawdown_duration = self._since_peak
+        if self.peak > 0:
+            dd = (self.peak - equity) / self.peak
+            if dd > self.max_drawdown:
+                self.max_drawdown = dd
+
+    def update_many(self, values: np.ndarray) -> None:
+        '''
+        Vectorized equivalent of calling update() on each value in turn:
+        chunk statistics are merged into the running ones (Chan et al. for
+        the return variance), with the peak and drawdown run carried over.
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        if self.last is None:
+            self.initial = float(values[0])
+            returns = simple_returns(values)
+        else:
+            returns = simple_returns(np.concatenate(([self.last], values)))
+        if len(returns):
+            n_b = len(returns)
+            mean_b = float(returns.mean())
+            centred = returns - mean_b
+            m2_b = float(np.dot(centred, centred))
+            n = self._n + n_b
+            delta = mean_b - self._mean
+            self._mean += delta * n_b / n
+            self._m2 += m2_b + delta * delta * self._n * n_b / n
+            self._n = n
+            downside = np.minimum(returns, 0.0)
+            self._down_sq += float(np.dot(downside, downside))
+        self._sum += float(values.sum())
+        self.count += len(values)
+        self.last = float(values[-1])
+
+        peaks = np.maximum(np.maximum.accumulate(values), self.peak)
+        positive = peaks > 0
+        if positive.any():
+            dd = np.zeros(len(values))
+            np.divide(peaks - values, peaks, out=dd, where=positive)
+            self.max_drawdown = max(self.max_drawdown, float(dd.max()))
+        highs = np.flatnonzero(values >= peaks)
+        if not len(highs):
+            self._since_peak += len(values)
+            longest = self._since_peak
+        else:
+            longest = self._since_peak + int(highs[0])
+            if len(highs) > 1:
+                longest = max(longest, int(np.diff(highs).max()) - 1)
+            self._since_peak = len(values) - 1 - int(highs[-1])
+            longest = max(longest, self._since_peak)
+        self.max_drawdown_duration = max(self.max_drawdown_duration, longest)
+        self.peak = float(peaks[-1])
+
+    def add_trade(self, quantity: float, price: float) -> None:
+        self.notional += abs(quantity * price)
+
+    @property
+    def sharpe(self) -> float:
+        if self._n < 2:
+            return 0.0
+        std = math.sqrt(self._m2 / self._n)
+        return self._mean / std * math.sqrt(self.periods_per_year) if std > 0 else 0.0
+
+    @property
+    def sortino(self) -> float:
+        if self._n < 2:
+            return 0.0
+        dd = math.sqrt(self._down_sq / self._n)
+        return self._mean / dd * math.sqrt(self.periods_per_year) if dd > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            return {}
+        mean = self._sum / self.count
+        return {
+            'initial_equity': self.initial,
+            'final_equity': self.last,
+            'total_return': (self.last / self.initial - 1.0) if self.initial != 0 else 0.0,
+            'sharpe': self.sharpe,
+            'sortino': self.sortino,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_duration': self.max_drawdown_duration,
+            'turnover': self.notional / mean if mean else 0.0,
+        }
@@ -1,6 +1,12 @@
 from data_generator import MarketDataPoint
+from ledger import from_epoch_ns
+from dataclasses import FrozenInstanceError
+from operator import attrgetter, itemgetter
 import datetime
 import csv
+import itertools
+import sys
+import numpy as np
 
 class Order:
     def __init__(self, symbol, quantity, price, status):
@@ -28,6 +34,64 @@ class ExecutionError(Exception):
         self.__message = message
         super().__init__(self.__message)
 
+class Tick(tuple):
+    """
+    Memory-lean, immutable tick for the object path: a 3-tuple
+    (timestamp_ns, symbol, price) with no per-instance __dict__. The symbol
+    is interned, so all ticks of a symbol share one string, and the integer
+    epoch-nanosecond timestamp sorts natively (see time_key). `timestamp`
+    converts it back to a datetime on access, so a Tick can be used
+    wherever a MarketDataPoint is expected.
+    """
+    __slots__ = ()
+
+    def __new__(cls, timestamp_ns, symbol, price):
+        return tuple.__new__(cls, (int(timestamp_ns), sys.intern(symbol), float(price)))
+
+    timestamp_ns = property(itemgetter(0))
+    symbol = property(itemgetter(1))
+    price = property(itemgetter(2))
+
+    @property
+    def timestamp(self) -> datetime.datetime:
+        return from_epoch_ns(self[0])
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def __repr__(self):
+        return f"Tick(timestamp={self.timestamp!r}, symbol={self[1]!r}, price={self[2]!r})"
+
+
+_TICK_TIME = itemgetter(0)
+_POINT_TIME = attrgetter('timestamp')
+
+
+def time_key(ticks):
+    '''
+    Sort key ordering the ticks of `ticks` by time: the integer timestamp
+    of a list of Tick (judged by its first element), else `.timestamp`.
+    '''
+    if isinstance(ticks, list) and ticks and type(ticks[0]) is Tick:
+        return _TICK_TIME
+    return _POINT_TIME
+
+
+def load_ticks(path, symbol_width=16):
+    '''
+    Load a timestamp,symbol,price CSV as a list of Tick in file order: parsed
+    in bulk like load_market_data_columnar, then one tuple per row with the
+    symbol strings shared.
+    '''
+    return load_market_data_columnar(path, symbol_width).ticks()
+
+
 def load_market_data(path):
     l = []
     with open(path, newline='') as csvfile:
@@ -45,3 +109,135 @@ def load_market_data(path):
             l.append(temp)
     return l
 
+
+class SymbolTicks:
+    """
+    Read-only, time-sorted view over one symbol's columns.
+
+    Iterating yields MarketDataPoint instances built a chunk at a time, so
+    Engine.run can consume the view without a full list of tick objects.
+    """
+    __slots__ = ('symbol', 'timestamps', 'prices')
+    chunk_size = 65_536
+
+    def __init__(self, symbol, timestamps, prices):
+        self.symbol = symbol
+        self.timestamps = timestamps
+        self.prices = prices
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __iter__(self):
+        symbol = self.symbol
+        for start in range(0, len(self.prices), self.chunk_size):
+            stop = start + self.chunk_size
+            times = self.timestamps[start:stop].tolist()
+            prices = self.prices[start:stop].tolist()
+            for ts, price in zip(times, prices):
+                yield MarketDataPoint(ts, symbol, price)
+
+
+class MarketDataColumns:
+    """
+    Columnar market data: datetime64 timestamps, int-coded symbols and float64 prices.
+
+    :param timestamps: datetime64[us] array, one entry per tick.
+    :param symbol_ids: int32 codes into `symbols`.
+    :param symbols: lookup table of symbol names, in order of first appearance.
+    :param prices: float64 array of prices.
+    """
+    def __init__(self, timestamps, symbol_ids, symbols, prices):
+        self.timestamps = timestamps
+        self.symbol_ids = symbol_ids
+        self.symbols = list(symbols)
+        self.prices = prices
+
+    @classmethod
+    def from_ticks(cls, ticks):
+        '''Build columns from an iterable of MarketDataPoint.'''
+        codes: dict = {}
+        timestamps, symbol_ids, prices = [], [], []
+        for t in ticks:
+            timestamps.append(t.timestamp)
+            symbol_ids.append(codes.setdefault(t.symbol, len(codes)))
+            prices.append(t.price)
+        return cls(np.array(timestamps, dtype='datetime64[us]'),
+                   np.array(symbol_ids, dtype=np.int32),
+                   list(codes),
+                   np.array(prices, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def rows(self):
+        '''Yield every tick as a MarketDataPoint, in stored (file) order.'''
+        names = self.symbols
+        for ts, sid, price in zip(self.timestamps.tolist(), self.symbol_ids.tolist(), self.prices.tolist()):
+            yield MarketDataPoint(ts, names[sid], price)
+
+    def ticks(self):
+        '''Every row as a Tick, in stored (file) order.'''
+        names = [sys.intern(s) for s in self.symbols]
+        ns = self.timestamps.astype('datetime64[ns]').view(np.int64).tolist()
+        symbols = list(map(names.__getitem__, self.symbol_ids.tolist()))
+        return list(map(tuple.__new__, itertools.repeat(Tick), zip(ns, symbols, self.prices.tolist())))
+
+    def by_symbol(self):
+        '''Return {symbol: SymbolTicks} with each view sorted by timestamp (stable).'''
+        order = np.lexsort((self.timestamps, self.symbol_ids))
+        timestamps = self.timestamps[order]
+        prices = self.prices[order]
+        counts = np.bincount(self.symbol_ids, minlength=len(self.symbols))
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        views = {}
+        for code, symbol in enumerate(self.symbols):
+            lo, hi = bounds[code], bounds[code + 1]
+            views[symbol] = SymbolTicks(symbol, timestamps[lo:hi], prices[lo:hi])
+        return views
+
+
+def load_market_data_columnar(path, symbol_width=16):
+    '''
+    Load a timestamp,symbol,price CSV in bulk into a MarketDataColumns.
+
+    Symbols are read into fixed-width strings of `symbol_width` characters;
+    a ValueError is raised if any symbol could have been truncated.
+    '''
+    raw = np.loadtxt(path, delimiter=',', skiprows=1, dtype=_csv_dtype(symbol_width), ndmin=1)
+    return _columns_from_raw(raw, symbol_width)
+
+
+def iter_market_data_chunks(path, chunk_rows=1_000_000, symbol_width=16):
+    '''
+    Read a timestamp,symbol,price CSV `chunk_rows` rows at a time, yielding
+    one MarketDataColumns per chunk (rows in file order), so memory is
+    bounded by the chunk size rather than the file size.
+    '''
+    dtype = _csv_dtype(symbol_width)
+    with open(path) as f:
+        next(f, None)  # header
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            yield _columns_from_raw(np.loadtxt(lines, delimiter=',', dtype=dtype, ndmin=1), symbol_width)
+
+
+def _csv_dtype(symbol_width):
+    return [('timestamp', 'datetime64[us]'), ('symbol', f'U{symbol_width}'), ('price', 'float64')]
+
+
+def _columns_from_raw(raw, symbol_width) -> MarketDataColumns:
+    if raw.size and np.char.str_len(raw['symbol']).max() >= symbol_width:
+        raise ValueError(f"Symbol names may exceed symbol_width={symbol_width}; increase it.")
+
+    uniq, first, inverse = np.unique(raw['symbol'], return_index=True, return_inverse=True)
+    # re-code symbols by first appearance so views come out in file order
+    rank = np.argsort(first, kind='stable')
+    remap = np.empty_like(rank)
+    remap[rank] = np.arange(len(rank))
+    symbol_ids = remap[inverse].astype(np.int32)
+    timestamps = np.ascontiguousarray(raw['timestamp'])
+    prices = np.ascontiguousarray(raw['price'])
+    return MarketDataColumns(timestamps, symbol_ids, uniq[rank].tolist(), prices)
@@ -0,0 +1,149 @@
+"""
+Monte Carlo stress test: run the strategies over thousands of synthetic
+price paths at once.
+
+Every symbol gets a (paths, ticks) price matrix of Gaussian returns
+compounded with cumprod, and each strategy's signal_conditions and the
+flat/long state machine are evaluated along the tick axis for all paths
+together. Prices are rounded to cents after compounding. data_generator
+instead rounds every step before applying the next return, so these paths
+carry no per-step rounding drift and are not distributed exactly like its
+data; rounding per step would need a sequential pass over the ticks.
+Positions, cash and equity follow with cumulative sums, and
+metrics.path_metrics scores every path. Paths are processed `block_paths`
+at a time, so memory stays bounded whatever `n_paths` is, and path p
+is the same for any block size.
+
+Compared with Engine, fills happen at the tick price without simulated
+failures, cash is not checked (orders never exceed it at the default
+sizes), and symbols tick together, giving one equity point per tick.
+
+    python montecarlo.py --paths 10000 --ticks 500
+"""
+import argparse
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from metrics import path_metrics
+from strategies import MomentumStrategy, MovingAverageStrategy, _position_state
+
+PERCENTILES = (5, 25, 50, 75, 95)
+# elements of one (paths, ticks) block; a handful of float64 temporaries of
+# this size are live at once
+BLOCK_ELEMENTS = 1 << 21
+
+
+def simulate_prices(paths: Sequence[int], n_symbols: int, start_prices, volatilities,
+                    n_ticks: int, seed: int = 0) -> np.ndarray:
+    '''
+    (symbols, len(paths), n_ticks) prices, the compounded returns rounded
+    to cents. Path p draws all its returns from one Generator seeded with
+    [seed, p], so it is reproducible and independent of which other paths
+    are generated with it.
+    '''
+    returns = np.empty((n_symbols, len(paths), n_ticks), dtype=np.float64)
+    for row, p in enumerate(paths):
+        returns[:, row] = np.random.default_rng([seed, p]).standard_normal((n_symbols, n_ticks))
+    returns *= np.asarray(volatilities, dtype=np.float64)[:, None, None]
+    returns += 1.0
+    prices = np.cumprod(returns, axis=2, out=returns)
+    prices *= np.asarray(start_prices, dtype=np.float64)[:, None, None]
+    return np.round(prices, 2, out=prices)
+
+
+def equity_paths(prices: np.ndarray, strategies: Dict[str, List[Any]], symbols: Sequence[str],
+                 initial_cash: float):
+    '''
+    Equity after every tick and traded notional of each path, for
+    (symbols, paths, ticks) prices and {symbol: [Strategy, ...]}.
+    '''
+    _, paths, n = prices.shape
+    pnl = np.zeros((paths, n))
+    notional = np.zeros(paths)
+    for i, sym in enumerate(symbols):
+        p = prices[i]
+        for strat in strategies.get(sym, []):
+            position = _position_state(*strat.signal_conditions(p)) * strat.params()['quantity']
+            traded = np.diff(position, axis=1, prepend=0) * p
+            # cash spent so far (negative) plus the marked value of the position
+            pnl += position * p - np.cumsum(traded, axis=1)
+            notional += np.abs(traded).sum(axis=1)
+    return initial_cash + pnl, notional
+
+
+def run_monte_carlo(strategies: Dict[str, List[Any]], start_prices, volatilities, n_ticks: int,
+                    n_paths: int, seed: int = 0, initial_cash: float = 100_000,
+                    block_paths: int = None, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Any]:
+    '''
+    Backtest {symbol: [Strategy, ...]} over `n_paths` simulated paths of
+    `n_ticks` ticks per symbol. Strategy instances only supply parameters
+    and are not mutated.
+
+    Returns 'paths', 'ticks', 'metrics' ({name: array with one value per
+    path}, as in performance_metrics) and 'distribution' ({name: {'mean',
+    'std', 'p5', ...}}).
+    '''
+    symbols = list(strategies)
+    n = len(symbols)
+    start_prices = list(start_prices) if np.ndim(start_prices) else [start_prices] * n
+    volatilities = list(volatilities) if np.ndim(volatilities) else [volatilities] * n
+    if block_paths is None:
+        block_paths = max(1, BLOCK_ELEMENTS // (n_ticks * max(n, 1)))
+
+    blocks = []
+    for lo in range(0, n_paths, block_paths):
+        paths = range(lo, min(lo + block_paths, n_paths))
+        prices = simulate_prices(paths, n, start_prices, volatilities, n_ticks, seed)
+        equity, notional = equity_paths(prices, strategies, symbols, initial_cash)
+        blocks.append(path_metrics(equity, notional))
+        del prices, equity
+
+    metrics = {key: np.concatenate([b[key] for b in blocks]) for key in blocks[0]} if blocks else {}
+    return {
+        'paths': n_paths,
+        'ticks': n_ticks,
+        'metrics': metrics,
+        'distribution': {key: summarize(values, percentiles) for key, values in metrics.items()},
+    }
+
+
+def summarize(values: np.ndarray, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, float]:
+    '''Mean, standard deviation and percentiles of one metric across paths.'''
+    qs = np.percentile(values, percentiles)
+    out = {'mean': float(np.mean(values)), 'std': float(np.std(values))}
+    out.update({f"p{q:g}": float(v) for q, v in zip(percentiles, qs)})
+    return out
+
+
+def format_distribution(result: Dict[str, Any], keys=('total_return', 'sharpe', 'max_drawdown')) -> str:
+    '''Markdown table of the metric distributions.'''
+    dist = result['distribution']
+    columns = [c for c in next(iter(dist.values()))] if dist else []
+    lines = [f"{result['paths']:,} paths x {result['ticks']:,} ticks",
+             "| Metric | " + " | ".join(columns) + " |",
+             "|---|" + "---:|" * len(columns)]
+    for key in keys:
+        lines.append(f"| {key} | " + " | ".join(f"{dist[key][c]:.4f}" for c in columns) + " |")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo distribution of strategy performance.")
+    parser.add_argument('--paths', type=int, default=10_000)
+    parser.add_argument('--ticks', type=int, default=500, help='ticks per symbol and path')
+    parser.add_argument('--symbols', nargs='+', default=['AAPL', 'MSFT', 'NVDA', 'META', 'AMC'])
+    parser.add_argument('--start-price', type=float, default=150.0)
+    parser.add_argument('--volatility', type=float, default=0.02, help='std dev of returns per tick')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--block-paths', type=int, help='paths per block (default: fit BLOCK_ELEMENTS)')
+    args = parser.parse_args(argv)
+
+    strategies = {s: [MovingAverageStrategy(s), MomentumStrategy(s)] for s in args.symbols}
+    result = run_monte_carlo(strategies, args.start_price, args.volatility, args.ticks, args.paths,
+                             seed=args.seed, block_paths=args.block_paths)
+    print(format_distribution(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,118 @@
 from typing import Dict  
 import os  
-  
-def ascii_sparkline(values):  
-    if not values:  
+import numpy as np
+from metrics import curve_values
+
+SPARKLINE_WIDTH = 120
+# points per plotted line: about two per horizontal pixel of a 10in, 100dpi figure
+PLOT_POINTS = 2_000
+# fewer symbols than this are plotted in-process: starting a pool (and
+# importing matplotlib in every worker) costs more than a few PNGs
+PARALLEL_PLOT_SYMBOLS = 16
+_BARS = "▁▂▃▄▅▆▇█"
+
+
+def _bin_bounds(n, n_bins):
+    '''Start offsets of n_bins contiguous, near-equal bins over n points.'''
+    return (np.arange(n_bins) * n) // n_bins
+
+
+def minmax_indices(values, n_points):
+    '''
+    Indices of at most ~n_points points that keep the shape of a long series:
+    the first and last points plus each bin's minimum and maximum, so every
+    peak and trough (and hence every drawdown) survives decimation.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    n_bins = max(1, (n_points - 2) // 2)
+    if n <= n_points:
+        return np.arange(n)
+    size = -(-n // n_bins)
+    rows = -(-n // size)
+    offsets = np.arange(rows) * size
+    # pad the last bin so every bin is one row of a (rows, size) view
+    pad = rows * size - n
+    lows = np.concatenate((values, np.full(pad, np.inf))).reshape(rows, size).argmin(axis=1)
+    highs = np.concatenate((values, np.full(pad, -np.inf))).reshape(rows, size).argmax(axis=1)
+    return np.unique(np.concatenate(([0], offsets + lows, offsets + highs, [n - 1])))
+
+
+def ascii_sparkline(values, width=None):  
+    '''
+    One bar per value, or with `width` set and more values than that, one
+    bar per bin of consecutive values showing the bin's extreme furthest
+    from the previous bin (so sharp drops stay visible). Scaled to the
+    overall min and max.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):  
         return ""  
-    bars = "▁▂▃▄▅▆▇█"  
-    mn, mx = min(values), max(values)  
+    mn, mx = values.min(), values.max()
+    if width is not None and len(values) > width:
+        starts = _bin_bounds(len(values), width)
+        lows = np.minimum.reduceat(values, starts)
+        highs = np.maximum.reduceat(values, starts)
+        means = np.add.reduceat(values, starts) / np.diff(np.append(starts, len(values)))
+        prev = np.concatenate(([means[0]], means[:-1]))
+        values = np.where(np.abs(lows - prev) > np.abs(highs - prev), lows, highs)
     if mx == mn:  
-        return bars[0] * len(values)  
-    out = ""  
-    for v in values:  
-        idx = int((v - mn) / (mx - mn) * (len(bars) - 1))  
-        out += bars[idx]  
-    return out  
-  
-def save_report(filepath: str, metrics: Dict, equity_curve, image_path=None):  
+        return _BARS[0] * len(values)  
+    idx = ((values - mn) / (mx - mn) * (len(_BARS) - 1)).astype(np.int64)
+    return "".join(np.array(list(_BARS))[idx].tolist())
+
+
+def decimate_curve(curve, n_points=PLOT_POINTS):
+    '''(times, values) of a [(timestamp, equity)] curve reduced with minmax_indices.'''
+    values = curve_values(curve)
+    idx = minmax_indices(values, n_points)
+    return [curve[i][0] for i in idx.tolist()], values[idx]
+
+
+def _plot_one(job):
+    '''
+    Render one symbol's PNG on a standalone Agg figure. pyplot is not used,
+    so the caller's backend and open figures are left alone when this runs
+    in-process.
+    '''
+    symbol, times, values, outpath = job
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(10, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(times, values)
+    ax.set_title(f"Equity {symbol}")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Equity")
+    fig.tight_layout()
+    fig.savefig(outpath)
+    return outpath
+
+
+def save_symbol_plots(equity_curve, directory, workers=None, n_points=PLOT_POINTS):
+    '''
+    One PNG per symbol in `directory`, rendered from decimated curves in a
+    pool of `workers` processes (in-process for workers=1, or for fewer
+    than PARALLEL_PLOT_SYMBOLS symbols). Returns {symbol: path}; empty if
+    matplotlib is not installed.
+    '''
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        return {}
+    os.makedirs(directory, exist_ok=True)
+    jobs = [(sym, *decimate_curve(curve, n_points), os.path.join(directory, f"equity_{sym}.png"))
+            for sym, curve in equity_curve.items() if curve]
+    if workers == 1 or len(jobs) < PARALLEL_PLOT_SYMBOLS:
+        paths = [_plot_one(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(_plot_one, jobs))
+    return {job[0]: path for job, path in zip(jobs, paths)}
+
+def save_report(filepath: str, metrics: Dict, equity_curve, image_path=None, symbol_images=None):  
     lines = []  
     lines.append("# Backtest Performance Report\n")  
     lines.append("## Key Metrics\n")  
@@ -26,6 +124,10 @@ def save_report(filepath: str, metrics: Dict, equity_curve, image_path=None):
     sharpe = metrics.get('sharpe')  
     lines.append(f"| Sharpe (ann.) | {sharpe:.3f} |" if sharpe == sharpe else "| Sharpe (ann.) | N/A |")  
     lines.append(f"| Max drawdown | {metrics.get('max_drawdown'):.2%} |")  
+    if 'sortino' in metrics:
+        lines.append(f"| Sortino (ann.) | {metrics['sortino']:.3f} |")
+        lines.append(f"| Max drawdown duration (ticks) | {metrics['max_drawdown_duration']} |")
+        lines.append(f"| Turnover | {metrics['turnover']:.2f}x |")
   
     lines.append("\n## Equity Curve\n")  
     if image_path and os.path.exists(image_path):  
@@ -34,15 +136,19 @@ def save_report(filepath: str, metrics: Dict, equity_curve, image_path=None):
         # Handle new structure where equity_curve is a dict by symbol
         if isinstance(equity_curve, dict):
             for symbol, curve in equity_curve.items():
-                eq_values = [v for (_, v) in curve]  
                 lines.append(f"ASCII Sparkline for {symbol}:\n\n")  
-                lines.append("```\n" + ascii_sparkline(eq_values) + "\n```\n")
+                lines.append("```\n" + ascii_sparkline(curve_values(curve), SPARKLINE_WIDTH) + "\n```\n")
         else:
             # Fallback for old structure
-            eq_values = [v for (_, v) in equity_curve]  
             lines.append("ASCII Sparkline:\n\n")  
-            lines.append("```\n" + ascii_sparkline(eq_values) + "\n```\n")  
+            lines.append("```\n" + ascii_sparkline(curve_values(equity_curve), SPARKLINE_WIDTH) + "\n```\n")  
   
+    if symbol_images:
+        lines.append("\n## Equity by Symbol\n")
+        base = os.path.dirname(os.path.abspath(filepath))
+        for symbol, path in symbol_images.items():
+            lines.append(f"![Equity {symbol}]({os.path.relpath(os.path.abspath(path), base)})\n")
+
     lines.append("\n## Short interpretation\n")  
     lines.append("This report shows the basic metrics computed from the backtest. "  
                  "Sharpe ratio is a simple mean/std annualized assuming 252 periods/year. "  
@@ -1,24 +1,89 @@
 from abc import ABC, abstractmethod
-from collections import deque
+import logging
 from typing import Optional
+import numpy as np
 from data_generator import MarketDataPoint
+from indicators import IndicatorSet, rolling_mean
+
+logger = logging.getLogger("Strategy")
+
 
 class Strategy(ABC):
     @abstractmethod
     def generate_signals(self, tick: MarketDataPoint) -> list:
         pass
 
+    def generate_signals_batch(self, prices: np.ndarray):
+        '''
+        Signals for a whole, time-sorted price array of this strategy's symbol,
+        as if generate_signals had been fed every tick starting from a fresh
+        instance. Returns (indices, sides, quantities): tick index, +1 BUY /
+        -1 SELL, and order size. Does not touch the streaming state.
+        '''
+        raise NotImplementedError(f"{type(self).__name__} has no batch mode")
+
+    def signal_conditions(self, prices: np.ndarray):
+        '''
+        (buy, sell) boolean arrays of the shape of `prices`, computed along
+        the last axis, so a (paths, ticks) matrix is evaluated per row. The
+        flat/long state machine (_position_state) turns them into positions.
+        '''
+        raise NotImplementedError(f"{type(self).__name__} has no batch mode")
+
+    def params(self) -> dict:
+        '''Constructor parameters (besides the symbol) that define this strategy's behaviour.'''
+        return {}
+
+
+def _position_state(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    '''
+    Replay the flat/long state machine shared by the strategies below along
+    the last axis: go long on `buy` when flat, go flat on `sell` when long.
+    A tick where both hold flips the state. Returns 1 (long) / 0 (flat)
+    after every tick.
+    '''
+    n = buy.shape[-1]
+    # the last tick with exactly one condition sets the state outright;
+    # every two-sided tick after it flips it
+    last_pure = np.maximum.accumulate(np.where(buy ^ sell, np.arange(n), -1), axis=-1)
+    seen = last_pure >= 0
+    # gather through flat indices into the row-major data (rows without a
+    # pure tick yet point anywhere and are masked by `seen`)
+    anchor = last_pure + (np.arange(buy.size // n) * n).reshape(buy.shape[:-1] + (1,))
+    np.maximum(anchor, 0, out=anchor)
+    base = (buy.ravel()[anchor] & seen).astype(np.int64)
+    both = buy & sell
+    if not both.any():
+        return base
+    toggles = np.cumsum(both, axis=-1)
+    flips = toggles - np.where(seen, toggles.ravel()[anchor], 0)
+    return (base + flips) % 2
+
+
+def _signals_from_conditions(buy: np.ndarray, sell: np.ndarray):
+    '''Apply _position_state to 1-D conditions; returns (indices, sides) of the ticks where it changes.'''
+    state = _position_state(buy, sell)
+    changed = state != np.concatenate(([0], state[:-1]))
+    indices = np.flatnonzero(changed)
+    sides = np.where(state[indices] == 1, 1, -1).astype(np.int8)
+    return indices, sides
+
+
 class MovingAverageStrategy(Strategy):
     """
     Buy when short moving average crosses above long moving average
     Sell when short moving average crosses below long moving average
     """
-    def __init__(self, symbol):
-        self.__short_window = 5
+    def __init__(self, symbol, short_window: int = 5, long_window: int = 10, quantity: int = 10,
+                 indicators: Optional[IndicatorSet] = None):
+        self.__short_window = short_window
         self.__symbol = symbol
-        self.__long_window = 10
-        self.__prices =  deque(maxlen=self.__long_window)
-        self.__quantity = 10
+        self.__long_window = long_window
+        # pass the symbol's shared IndicatorSet to avoid duplicate price state
+        self.__indicators = indicators if indicators is not None else IndicatorSet()
+        self.__short_sma = self.__indicators.sma(self.__short_window)
+        self.__long_sma = self.__indicators.sma(self.__long_window)
+        self.__quantity = quantity
         self.__position = 0
         self.__last_signal = None       
         self.__prev_short_ma: Optional[float] = None
@@ -29,9 +94,9 @@ class MovingAverageStrategy(Strategy):
         if tick.symbol!=self.__symbol:
             return signals
         
-        self.__prices.append(tick.price)
-        short_ma = self.__moving_average(self.__short_window)
-        long_ma = self.__moving_average(self.__long_window)
+        self.__indicators.update(tick)
+        short_ma = self.__short_sma.value
+        long_ma = self.__long_sma.value
 
         if short_ma is None or long_ma is None:
             self.__prev_short_ma = short_ma
@@ -56,47 +121,97 @@ class MovingAverageStrategy(Strategy):
 
         self.__prev_long_ma = long_ma
         self.__prev_short_ma = short_ma
-        print(f'{self.__last_signal} for {tick.symbol} with a position of {self.__position} @ {tick.price}')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s for %s with a position of %s @ %s", self.__last_signal, tick.symbol, self.__position, tick.price)
         return signals
     def display(self):
         print(f'')
-    def __moving_average(self, window):
-        if len(self.__prices)<window:
-            return None
-        return sum(list(self.__prices)[-window:])/window
-    
+
+    def params(self) -> dict:
+        return {'short_window': self.__short_window, 'long_window': self.__long_window,
+                'quantity': self.__quantity}
+
+    def signal_conditions(self, prices: np.ndarray):
+        prices = np.asarray(prices, dtype=np.float64)
+        start = max(self.__short_window, self.__long_window)
+        buy = np.zeros(prices.shape, dtype=bool)
+        sell = np.zeros(prices.shape, dtype=bool)
+        if prices.shape[-1] <= start:
+            return buy, sell
+
+        short_ma = rolling_mean(prices, self.__short_window)
+        long_ma = rolling_mean(prices, self.__long_window)
+
+        # a crossover needs both averages on this tick and (non-zero) on the previous one
+        s, l = short_ma[..., start:], long_ma[..., start:]
+        ps, pl = short_ma[..., start - 1:-1], long_ma[..., start - 1:-1]
+        valid = (ps != 0) & (pl != 0)
+        buy[..., start:] = valid & (ps <= pl) & (s >= l)
+        sell[..., start:] = valid & ~buy[..., start:] & (ps >= pl) & (s < l)
+        return buy, sell
+
+    def generate_signals_batch(self, prices: np.ndarray):
+        indices, sides = _signals_from_conditions(*self.signal_conditions(prices))
+        return indices, sides, np.full(len(indices), self.__quantity, dtype=np.int64)
+
 
 class MomentumStrategy(Strategy):
     """ If the last N prices are increasing, BUY
         If the last N prices are decreasing SELL """
-    def __init__(self, symbol):
-        self.__lookback = 5
-        self.__quantity = 10
+    def __init__(self, symbol, lookback: int = 5, quantity: int = 10,
+                 indicators: Optional[IndicatorSet] = None):
+        self.__lookback = lookback
+        self.__quantity = quantity
         self.__symbol = symbol
-        self.__prices = deque(maxlen=self.__lookback)
+        self.__indicators = indicators if indicators is not None else IndicatorSet()
+        self.__runs = self.__indicators.run_length()
         self.__position = 0  # Track position
 
+    def params(self) -> dict:
+        return {'lookback': self.__lookback, 'quantity': self.__quantity}
+
     def generate_signals(self, tick : MarketDataPoint):
         signals = []
         if tick.symbol != self.__symbol:
             return signals
             
-        self.__prices.append(tick.price)
+        self.__indicators.update(tick)
 
-        if len(self.__prices) == self.__lookback:
+        # a run of lookback-1 steps means the last `lookback` prices are monotonic
+        increasing = self.__runs.up >= self.__lookback - 1
+        decreasing = self.__runs.down >= self.__lookback - 1
 
-            increasing = all(self.__prices[i]<=self.__prices[i+1] for i in range(len(self.__prices)-1))
-            decreasing = all(self.__prices[i]>=self.__prices[i+1] for i in range(len(self.__prices)-1))
-
-            if increasing and self.__position == 0:
-                # Only buy if we don't have a position
-                signals.append((("BUY", tick.symbol,self.__quantity, tick.price )))
-                self.__position = self.__quantity
-            elif decreasing and self.__position > 0:
-                # Only sell if we have a position to sell
-                signals.append((("SELL", tick.symbol,self.__position, tick.price )))
-                self.__position = 0  # Reset position after selling
+        if increasing and self.__position == 0:
+            # Only buy if we don't have a position
+            signals.append((("BUY", tick.symbol,self.__quantity, tick.price )))
+            self.__position = self.__quantity
+        elif decreasing and self.__position > 0:
+            # Only sell if we have a position to sell
+            signals.append((("SELL", tick.symbol,self.__position, tick.price )))
+            self.__position = 0  # Reset position after selling
         return signals
+
+    def signal_conditions(self, prices: np.ndarray):
+        prices = np.asarray(prices, dtype=np.float64)
+        n = prices.shape[-1]
+        lookback = self.__lookback
+        buy = np.zeros(prices.shape, dtype=bool)
+        sell = np.zeros(prices.shape, dtype=bool)
+        if n < lookback:
+            return buy, sell
+
+        # count the broken up/down steps in each window of lookback - 1 comparisons
+        zero = np.zeros(prices.shape[:-1] + (1,), dtype=np.int64)
+        not_up = np.concatenate((zero, np.cumsum(~(prices[..., :-1] <= prices[..., 1:]), axis=-1)), axis=-1)
+        not_down = np.concatenate((zero, np.cumsum(~(prices[..., :-1] >= prices[..., 1:]), axis=-1)), axis=-1)
+        span = lookback - 1
+        buy[..., span:] = (not_up[..., span:] - not_up[..., :n - span]) == 0
+        sell[..., span:] = (not_down[..., span:] - not_down[..., :n - span]) == 0
+        return buy, sell
+
+    def generate_signals_batch(self, prices: np.ndarray):
+        indices, sides = _signals_from_conditions(*self.signal_conditions(prices))
+        return indices, sides, np.full(len(indices), self.__quantity, dtype=np.int64)
         
         
         
\ No newline at end of file
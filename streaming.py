@@ -0,0 +1,155 @@
+"""
+Bounded-memory building blocks for Engine.run_streaming.
+
+`stream_ticks` yields one time-ordered stream of ticks from a CSV read in
+chunks, or from a tick store merged lazily across symbols, so at most one
+chunk is resident. EquitySpill and TradeSpill append the equity curve and
+the trade ledger to raw little-endian column files in a spill directory,
+flushing fixed-size buffers; the results are read back as memory maps.
+"""
+import heapq
+import json
+import os
+from array import array
+from typing import Dict
+
+import numpy as np
+
+from ledger import TradeLedger, to_epoch_ns
+from models import iter_market_data_chunks
+from tickstore import TickStore, is_tick_store, open_tick_store
+
+EQUITY_COLUMNS = (('timestamp_ns', 'q'), ('equity', 'd'))
+
+
+def stream_ticks(source, chunk_rows: int = 1_000_000):
+    '''
+    Time-ordered ticks from a CSV path (read `chunk_rows` rows at a time,
+    which must already be sorted by timestamp) or from a tick store path /
+    TickStore (per-symbol views merged with a heap). Ties keep file order,
+    as in Engine.run_chronological.
+    '''
+    if isinstance(source, TickStore) or is_tick_store(source):
+        store = source if isinstance(source, TickStore) else open_tick_store(source)
+        return heapq.merge(*store.by_symbol().values(), key=lambda t: t.timestamp)
+    return _stream_csv(source, chunk_rows)
+
+
+def _stream_csv(path, chunk_rows):
+    last = None
+    for chunk in iter_market_data_chunks(path, chunk_rows):
+        ts = chunk.timestamps
+        if not len(ts):
+            continue
+        if (last is not None and ts[0] < last) or (ts[1:] < ts[:-1]).any():
+            raise ValueError(f"{path} is not sorted by timestamp; "
+                             "convert it with tickstore.csv_to_tick_store to stream it")
+        last = ts[-1]
+        yield from chunk.rows()
+
+
+class _ColumnFiles:
+    """Raw column files `<name>.bin` in one directory, appended to from array.array buffers."""
+
+    def __init__(self, directory, prefix, columns):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = columns
+        self.files = {name: open(self._path(name), 'wb') for name, _ in columns}
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{self.prefix}{name}.bin")
+
+    def write(self, buffers: Dict[str, array]) -> None:
+        '''Append each column's buffer and empty it.'''
+        for name, _ in self.columns:
+            buf = buffers[name]
+            buf.tofile(self.files[name])
+            del buf[:]
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+
+
+def _read_column(path, typecode) -> np.ndarray:
+    dtype = np.dtype(typecode).newbyteorder('<')
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class EquitySpill:
+    """The equity curve as timestamp_ns / equity column files, buffered `buffer_rows` points at a time."""
+
+    def __init__(self, directory, buffer_rows: int = 65_536):
+        self._files = _ColumnFiles(directory, 'equity_', EQUITY_COLUMNS)
+        self._times = array('q')
+        self._values = array('d')
+        self._buffer_rows = buffer_rows
+        self.rows = 0
+
+    def append(self, timestamp, equity: float) -> None:
+        self._times.append(to_epoch_ns(timestamp))
+        self._values.append(equity)
+        self.rows += 1
+        if len(self._values) >= self._buffer_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        self._files.write({'timestamp_ns': self._times, 'equity': self._values})
+
+    def close(self) -> None:
+        self.flush()
+        self._files.close()
+
+
+class TradeSpill:
+    """Moves a TradeLedger's rows to column files whenever it holds `buffer_rows` trades."""
+
+    def __init__(self, directory, ledger: TradeLedger, buffer_rows: int = 65_536):
+        columns = [(name, getattr(ledger, name).typecode) for name in TradeLedger.COLUMNS]
+        self._files = _ColumnFiles(directory, 'trades_', columns)
+        self.ledger = ledger
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        # sum of |quantity * price| over everything flushed, for turnover
+        self.notional = 0.0
+
+    def maybe_flush(self) -> None:
+        if len(self.ledger) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        self.rows += len(self.ledger)
+        if len(self.ledger):
+            cols = self.ledger.to_numpy()
+            self.notional += float(np.abs(cols['quantity'] * cols['price']).sum())
+            del cols
+        self._files.write({name: getattr(self.ledger, name) for name in TradeLedger.COLUMNS})
+
+    def close(self) -> None:
+        self.flush()
+        self._files.close()
+        with open(os.path.join(self._files.directory, 'trades_symbols.json'), 'w') as f:
+            json.dump(self.ledger.symbols.names, f)
+
+
+def load_spilled_equity(directory):
+    '''(timestamps as datetime64[ns], equity) memory maps of a spilled equity curve.'''
+    times = _read_column(os.path.join(directory, 'equity_timestamp_ns.bin'), 'q')
+    values = _read_column(os.path.join(directory, 'equity_equity.bin'), 'd')
+    return times.view('<M8[ns]'), values
+
+
+def load_spilled_trades(directory):
+    '''Spilled trades as memory-mapped columns, laid out like TradeLedger.to_numpy().'''
+    with open(os.path.join(directory, 'trades_symbols.json')) as f:
+        symbols = json.load(f)
+    probe = TradeLedger()
+    cols = {name: _read_column(os.path.join(directory, f"trades_{name}.bin"), getattr(probe, name).typecode)
+            for name in TradeLedger.COLUMNS}
+    cols['timestamp'] = cols.pop('timestamp_ns').view('<M8[ns]')
+    cols['symbols'] = np.array(symbols, dtype=object)
+    return cols
@@ -0,0 +1,164 @@
+"""
+Parameter sweep / grid search over strategy configurations.
+
+The dataset is loaded and grouped per symbol once. Every configuration is
+then backtested with the vectorized engine, optionally across a process
+pool that shares the per-symbol price arrays read-only: a tick store is
+re-opened via mmap in each worker, other inputs are inherited by the
+forked workers rather than pickled per task.
+
+    python sweep.py --data market_data.ticks --workers 4 \
+        --grid '{"MovingAverageStrategy": {"short_window": [3, 5, 8], "long_window": [10, 20]}}'
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from engine import Engine
+from models import MarketDataColumns, load_market_data_columnar
+from strategies import MovingAverageStrategy, MomentumStrategy
+from tickstore import TickStore, is_tick_store, open_tick_store
+
+STRATEGY_CLASSES = {cls.__name__: cls for cls in (MovingAverageStrategy, MomentumStrategy)}
+
+# per-process dataset of a pool worker, set once by _init_worker
+_views = None
+
+
+def parameter_grid(grid: Dict[str, list]) -> List[Dict[str, Any]]:
+    '''Cartesian product of a {param: [values]} grid as a list of kwargs dicts.'''
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def expand_configurations(grids: Dict[type, Dict[str, list]]) -> List[Tuple[Tuple[type, dict], ...]]:
+    '''
+    Every combination across strategy classes: each configuration pairs one
+    parameter set per class, and each symbol gets one instance of every class.
+    '''
+    per_class = [[(cls, params) for params in parameter_grid(grid)] for cls, grid in grids.items()]
+    return list(itertools.product(*per_class))
+
+
+def load_sweep_data(data):
+    '''Accept a CSV path, tick-store path, MarketDataColumns or TickStore; return {symbol: SymbolTicks}.'''
+    if isinstance(data, str):
+        data = open_tick_store(data) if is_tick_store(data) else load_market_data_columnar(data)
+    if isinstance(data, (MarketDataColumns, TickStore)):
+        return data.by_symbol()
+    raise TypeError(f"Unsupported sweep data: {type(data).__name__}")
+
+
+def evaluate_configs(views, configs, initial_cash: float = 100_000, seed: int = 0,
+                     execution=None) -> List[Dict[str, Any]]:
+    '''
+    Backtest each (config_id, config) of `configs` on `views`
+    ({symbol: SymbolTicks}) with the vectorized engine and return one
+    unranked result row per configuration (see rank_rows).
+    '''
+    return [_evaluate(views, config_id, config, initial_cash, seed, execution) for config_id, config in configs]
+
+
+def _evaluate(views, config_id, config, initial_cash, seed, execution):
+    strategies = {sym: [cls(sym, **params) for cls, params in config] for sym in views}
+    engine = Engine(initial_cash=initial_cash, seed=seed, execution=execution)
+    engine.run(views, strategies, vectorized=True)
+    metrics = engine.performance_metrics()
+    return {
+        'config_id': config_id,
+        'config': [(cls.__name__, params) for cls, params in config],
+        'sharpe': float(metrics.get('sharpe', 0.0)),
+        'total_return': float(metrics.get('total_return', 0.0)),
+        'max_drawdown': float(metrics.get('max_drawdown', 0.0)),
+        'final_equity': float(metrics.get('final_equity', initial_cash)),
+    }
+
+
+def _init_worker(source):
+    global _views
+    # a tick store path is re-mapped here so all workers share the page cache
+    _views = load_sweep_data(source) if isinstance(source, str) else source
+
+
+def _evaluate_chunk(task):
+    configs, initial_cash, seed, execution = task
+    return evaluate_configs(_views, configs, initial_cash, seed, execution)
+
+
+def run_sweep(data, grids: Dict[type, Dict[str, list]], workers: int = 1,
+              initial_cash: float = 100_000, seed: int = 0, execution=None) -> List[Dict[str, Any]]:
+    '''
+    Backtest every configuration in `grids` ({StrategyClass: {param: [values]}})
+    and return one result row per configuration, ranked by Sharpe (then total
+    return). Every configuration runs with the same engine seed, so rows are
+    comparable and reproducible regardless of `workers`. `execution` is an
+    execution.ExecutionModel applied to every run (the engine default if None).
+    '''
+    configs = list(enumerate(expand_configurations(grids)))
+
+    if workers <= 1:
+        rows = evaluate_configs(load_sweep_data(data), configs, initial_cash, seed, execution)
+    else:
+        # a store path is re-opened per worker; anything else is loaded here once
+        source = data if isinstance(data, str) and is_tick_store(data) else load_sweep_data(data)
+        ctx = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        size = max(1, len(configs) // (workers * 8))
+        tasks = [(configs[i:i + size], initial_cash, seed, execution) for i in range(0, len(configs), size)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(source,)) as pool:
+            rows = [row for chunk in pool.map(_evaluate_chunk, tasks) for row in chunk]
+
+    return rank_rows(rows)
+
+
+def rank_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    '''Sort result rows by Sharpe, then total return, then configuration id, and number them.'''
+    rows.sort(key=lambda r: (-r['sharpe'], -r['total_return'], r['config_id']))
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+    return rows
+
+
+def _describe(config) -> str:
+    return "; ".join(f"{name}(" + ", ".join(f"{k}={v}" for k, v in params.items()) + ")"
+                     for name, params in config)
+
+
+def format_results_table(rows: List[Dict[str, Any]], top: int = None) -> str:
+    '''Markdown table of ranked sweep results.'''
+    lines = ["| Rank | Configuration | Sharpe | Total return | Max drawdown |",
+             "|---:|---|---:|---:|---:|"]
+    for row in rows[:top]:
+        lines.append(f"| {row['rank']} | {_describe(row['config'])} | {row['sharpe']:.3f} "
+                     f"| {row['total_return']:.2%} | {row['max_drawdown']:.2%} |")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid-search strategy parameters.")
+    parser.add_argument('--data', default='market_data.csv', help='CSV or tick store to backtest')
+    parser.add_argument('--grid', default=None,
+                        help='JSON {StrategyClass: {param: [values]}}; defaults to a small MA/Momentum grid')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--out', help='also write all rows as JSON')
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        grids = {STRATEGY_CLASSES[name]: grid for name, grid in json.loads(args.grid).items()}
+    else:
+        grids = {MovingAverageStrategy: {'short_window': [3, 5, 8], 'long_window': [10, 20, 30]},
+                 MomentumStrategy: {'lookback': [3, 5, 8]}}
+    rows = run_sweep(args.data, grids, workers=args.workers, seed=args.seed)
+    print(format_results_table(rows, top=args.top))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
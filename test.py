@@ -1,9 +1,85 @@
-import unittest
-from data_generator import MarketDataPoint
-from models import Order
+import asyncio
+import contextlib
 import datetime
+import io
+import logging
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import unittest.mock
 from dataclasses import FrozenInstanceError
 
+import numpy as np
+
+import benchmark
+import engine as engine_module
+import main as main_module
+import sweep as sweep_module
+import metrics
+import reporting
+from bars import BarAggregator, resample
+from cache import ResultCache
+from checkpoint import load_checkpoint, save_checkpoint
+from data_generator import MarketDataPoint, async_market_data_generator, fan_in, generate_bulk_market_data
+from distributed import (WorkQueue, build_strategies, collect_backtest, collect_sweep, run_worker, start_local_workers,
+                         submit_backtest, submit_sweep)
+from engine import Engine
+from execution import Chain, Latency, PartialFill, RandomFailure, Slippage, Spread
+from indicators import EMA, SMA, IndicatorSet, RollingMax, RollingMin, RunLength, rolling_mean
+from instrumentation import Profiler
+from models import (ExecutionError, MarketDataColumns, Order, OrderError, Tick, load_market_data,
+                    load_market_data_columnar, load_ticks)
+from montecarlo import run_monte_carlo, simulate_prices
+from strategies import MomentumStrategy, MovingAverageStrategy, Strategy
+from streaming import load_spilled_equity, load_spilled_trades
+from sweep import run_sweep
+from tickstore import csv_to_tick_store, is_tick_store, open_tick_store, write_tick_store
+
+
+# the sample data shipped with the repo
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_data.csv')
+
+
+def setUpModule():
+    # the engine logs every rejected order; keep test output readable
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def make_columns(seed=0, n_symbols=3, ticks_per_symbol=2000):
+    '''Random walk with many flat steps so ties and crossovers at equality occur.'''
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.02, (ticks_per_symbol, n_symbols))
+    returns[rng.random(returns.shape) < 0.3] = 0
+    prices = np.round(100 * np.cumprod(1 + returns, axis=0), 1).ravel()
+    timestamps = np.datetime64('2025-01-01T09:30', 'us') + np.arange(prices.size).astype('m8[us]')
+    symbol_ids = np.tile(np.arange(n_symbols, dtype=np.int32), ticks_per_symbol)
+    return MarketDataColumns(timestamps, symbol_ids, [f"S{i}" for i in range(n_symbols)], prices)
+
+
+def make_strategies(symbols):
+    return {s: [MovingAverageStrategy(s), MomentumStrategy(s)] for s in symbols}
+
+
+def run_engine(data, **kwargs):
+    engine = Engine(seed=1)
+    results = engine.run(data, make_strategies(data.symbols), **kwargs)
+    return engine, results
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
 
 class TestMutability(unittest.TestCase):
     def test_order_status_is_mutable(self):
@@ -16,5 +92,847 @@ class TestMutability(unittest.TestCase):
         with self.assertRaises(FrozenInstanceError):
             tick.price = 0  # modifying a frozen dataclass field should raise
 
+    def test_tick_is_immutable(self):
+        tick = Tick(1_735_723_800_000_000_000, "AAPL", 100.0)
+        self.assertEqual(tick.timestamp, datetime.datetime(2025, 1, 1, 9, 30))
+        with self.assertRaises(FrozenInstanceError):
+            tick.price = 0
+        self.assertIs(Tick(0, "".join(["AA", "PL"]), 1.0).symbol, tick.symbol)  # interned
+
+
+class TestColumnarLoader(unittest.TestCase):
+    def test_matches_row_loader(self):
+        points = load_market_data(SAMPLE_CSV)
+        columns = load_market_data_columnar(SAMPLE_CSV)
+        self.assertEqual(len(columns), len(points))
+        self.assertEqual(list(columns.rows()), points)
+        views = columns.by_symbol()
+        self.assertEqual(list(views), list(dict.fromkeys(p.symbol for p in points)))
+        for sym, view in views.items():
+            self.assertEqual(list(view), sorted((p for p in points if p.symbol == sym), key=lambda p: p.timestamp))
+
+
+class TestTickStore(TempDirTestCase):
+    def round_trip(self, columns):
+        path = write_tick_store(os.path.join(self.tmp.name, 'ticks.store'), columns)
+        self.assertTrue(is_tick_store(path))
+        store = open_tick_store(path)
+        self.assertEqual((len(store), store.symbols), (len(columns), columns.symbols))
+        for sym, view in columns.by_symbol().items():
+            np.testing.assert_array_equal(store.symbol(sym).timestamps, view.timestamps)
+            np.testing.assert_array_equal(store.symbol(sym).prices, view.prices)
+        return store
+
+    def test_round_trip(self):
+        self.round_trip(make_columns(n_symbols=4, ticks_per_symbol=500))
+        store = self.round_trip(make_columns(n_symbols=1, ticks_per_symbol=1))
+        self.assertEqual(list(store.symbol('S0')), list(make_columns(n_symbols=1, ticks_per_symbol=1).rows()))
+        empty = MarketDataColumns(np.empty(0, 'datetime64[us]'), np.empty(0, np.int32), [], np.empty(0))
+        self.assertEqual(self.round_trip(empty).by_symbol(), {})
+        self.assertFalse(is_tick_store(SAMPLE_CSV))
+
+    def test_csv_conversion_matches_columnar_loader(self):
+        store = open_tick_store(csv_to_tick_store(SAMPLE_CSV, os.path.join(self.tmp.name, 'm.store')))
+        for sym, view in load_market_data_columnar(SAMPLE_CSV).by_symbol().items():
+            self.assertEqual(list(store.symbol(sym)), list(view))
+
+
+class TestVectorizedEngine(unittest.TestCase):
+    def test_matches_tick_by_tick_engine(self):
+        data = make_columns()
+        tick_engine, tick_results = run_engine(data)
+        vec_engine, vec_results = run_engine(data, vectorized=True)
+        self.assertEqual(vec_engine.trades, tick_engine.trades)
+        self.assertEqual(vec_results['final_cash'], tick_results['final_cash'])
+        self.assertEqual(vec_results['equity_curve'], tick_results['equity_curve'])
+
+
+class TestIndicators(unittest.TestCase):
+    def test_moving_average_stream_matches_batch(self):
+        views = [v for seed in range(3) for v in make_columns(seed=seed).by_symbol().values()]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ticks.csv')
+            generate_bulk_market_data(path, ['S0', 'S1'], 77.1, [0.001, 0.01], 5000, seed=4)
+            views += list(load_market_data_columnar(path).by_symbol().values())
+        for view in views:
+            strat = MovingAverageStrategy(view.symbol)
+            streamed = [(i, sig[0][0]) for i, sig in enumerate(map(strat.generate_signals, view)) if sig]
+            self.assertTrue(streamed)
+            indices, sides, _ = MovingAverageStrategy(view.symbol).generate_signals_batch(view.prices)
+            self.assertEqual([(i, 'BUY' if side == 1 else 'SELL') for i, side in zip(indices.tolist(), sides)],
+                             streamed)
+
+    def test_sma_stream_matches_rolling_mean(self):
+        prices = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, (2, 2000)), axis=1)
+        for window in (1, 2, 7, 200, 500):
+            batch = rolling_mean(prices, window)
+            for row, expected in zip(prices, batch):
+                sma = SMA(window)
+                streamed = [sma.update(p) for p in row.tolist()]
+                self.assertEqual(streamed, [None if np.isnan(v) else v for v in expected.tolist()])
+        self.assertTrue(np.isnan(rolling_mean(prices[:, :3], 5)).all())
+
+    def test_match_brute_force(self):
+        prices = np.round(100 + np.cumsum(np.random.default_rng(9).normal(0, 1, 500)), 2).tolist()
+        for window in (1, 3, 10, 200):
+            sma, ema, hi, lo = SMA(window), EMA(window), RollingMax(window), RollingMin(window)
+            expected_ema = None
+            for i, price in enumerate(prices):
+                last = prices[max(0, i - window + 1):i + 1]
+                value = sma.update(price)
+                if i + 1 < window:
+                    self.assertIsNone(value)
+                else:
+                    self.assertAlmostEqual(value, sum(last) / window, places=9)
+                expected_ema = price if expected_ema is None else expected_ema + 2 / (window + 1) * (price - expected_ema)
+                self.assertEqual(ema.update(price), expected_ema)
+                self.assertEqual((hi.update(price), lo.update(price)), (max(last), min(last)))
+        with self.assertRaises(ValueError):
+            SMA(0)
+
+    def test_run_length_and_shared_set(self):
+        runs = RunLength()
+        steps = []
+        for price in (1.0, 2.0, 2.0, 3.0, 1.0, 1.0, 0.5):
+            runs.update(price)
+            steps.append((runs.up, runs.down))
+        self.assertEqual(steps, [(0, 0), (1, 0), (2, 1), (3, 0), (0, 1), (1, 2), (0, 3)])
+
+        shared = IndicatorSet()
+        self.assertIs(shared.sma(5), shared.sma(5))
+        tick = MarketDataPoint(datetime.datetime(2025, 1, 1), 'S0', 10.0)
+        for _ in range(3):
+            shared.update(tick)  # the same tick seen by three strategies counts once
+        self.assertEqual(shared.run_length().up, 0)
+        self.assertEqual(len(shared.sma(5)._prices), 1)
+
+
+class TestSweep(unittest.TestCase):
+    def test_rankings_independent_of_workers_and_reproducible(self):
+        data = make_columns(seed=7, n_symbols=2, ticks_per_symbol=1500)
+        grids = {MovingAverageStrategy: {'short_window': [3, 5], 'long_window': [10, 20]},
+                 MomentumStrategy: {'lookback': [3, 6]}}
+        serial = run_sweep(data, grids)
+        self.assertEqual(len(serial), 8)
+        self.assertEqual(run_sweep(data, grids, workers=2), serial)
+        self.assertEqual([row['rank'] for row in serial], list(range(1, 9)))
+
+        best = serial[0]
+        classes = {cls.__name__: cls for cls in grids}
+        engine = Engine(seed=0)
+        engine.run(data, {sym: [classes[name](sym, **params) for name, params in best['config']]
+                          for sym in data.symbols})
+        m = engine.performance_metrics()
+        self.assertEqual((best['sharpe'], best['total_return'], best['final_equity']),
+                         (m['sharpe'], m['total_return'], m['final_equity']))
+
+
+class CheckedEngine(Engine):
+    '''Compares the incremental equity with the full recomputation on every tick.'''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checks = 0
+        self.mismatches = []
+
+    def _equity(self):
+        value = super()._equity()
+        full = self._compute_equity()
+        self.checks += 1
+        if value != full:
+            self.mismatches.append((value, full))
+        return value
+
+
+class TestIncrementalEquity(unittest.TestCase):
+    def test_matches_full_recomputation_exactly(self):
+        data = make_columns(seed=3, n_symbols=6, ticks_per_symbol=1500)
+        engine = CheckedEngine(seed=2)
+        engine.run(data, make_strategies(data.symbols))
+        self.assertEqual(engine.checks, len(data))
+        self.assertEqual(engine.mismatches, [])
+        self.assertEqual(engine._equity(), engine._compute_equity())
+
+
+class Recorder(Strategy):
+    '''Appends every tick it is given to a shared list and never trades.'''
+    def __init__(self, seen):
+        self.seen = seen
+
+    def generate_signals(self, tick):
+        self.seen.append(tick)
+        return []
+
+
+class TestChronological(unittest.TestCase):
+    def test_interleaves_symbols_in_time_order(self):
+        rng = np.random.default_rng(10)
+        start = datetime.datetime(2025, 1, 1, 9, 30)
+        by_symbol = {}
+        for sym in ('S0', 'S1', 'S2'):
+            # coarse, independent clocks so symbols interleave irregularly and tie
+            times = np.cumsum(rng.integers(0, 4, 300))
+            by_symbol[sym] = [MarketDataPoint(start + datetime.timedelta(milliseconds=int(ms)), sym, 100.0 + i)
+                              for i, ms in enumerate(times)]
+        flat = [t for ticks in by_symbol.values() for t in ticks]
+        expected = sorted(flat, key=lambda t: t.timestamp)  # stable: ties keep symbol order
+        for data in (by_symbol, MarketDataColumns.from_ticks(flat), flat):
+            seen = []
+            engine = Engine(seed=1)
+            engine.run_chronological(data, {sym: [Recorder(seen)] for sym in by_symbol})
+            self.assertEqual(seen, expected)
+            self.assertEqual([ts for ts, _ in engine.equity_curve], [t.timestamp for t in expected])
+
+    def test_single_symbol_matches_run(self):
+        data = make_columns(seed=11, n_symbols=1, ticks_per_symbol=3000)
+        serial, chronological = Engine(seed=1), Engine(seed=1)
+        results = serial.run(data, make_strategies(data.symbols))
+        chrono_results = chronological.run_chronological(data, make_strategies(data.symbols))
+        self.assertGreater(len(serial.trades), 0)
+        self.assertEqual(chronological.trades, serial.trades)
+        self.assertEqual(chronological.equity_curve, serial.equity_by_symbol['S0'])
+        self.assertEqual(chrono_results['final_cash'], results['final_cash'])
+
+    def test_run_leaves_the_callers_lists_in_order(self):
+        ticks = list(make_columns(seed=11, n_symbols=1, ticks_per_symbol=500).by_symbol()['S0'])
+        shuffled = ticks[::-1]
+        given = {'S0': shuffled}
+        for kwargs in ({}, {'workers': 1}):
+            engine = Engine(seed=1)
+            engine.run(given, make_strategies(['S0']), **kwargs)
+            self.assertEqual(given['S0'], ticks[::-1])
+            expected = Engine(seed=1)
+            expected.run({'S0': ticks}, make_strategies(['S0']), **kwargs)
+            self.assertEqual(engine.trades, expected.trades)
+
+
+async def list_feed(ticks, produced=None, closed=None, fail_after=None):
+    '''Async feed of `ticks` that counts what it has handed out and records being closed.'''
+    try:
+        for i, tick in enumerate(ticks):
+            if i == fail_after:
+                raise RuntimeError("feed dropped")
+            if produced is not None:
+                produced.append(tick)
+            yield tick
+            await asyncio.sleep(0)
+    finally:
+        if closed is not None:
+            closed.append(ticks[0].symbol)
+
+
+def feed_ticks(symbol, n):
+    start = datetime.datetime(2025, 1, 1, 9, 30)
+    return [MarketDataPoint(start + datetime.timedelta(seconds=i), symbol, 100.0 + i % 7) for i in range(n)]
+
+
+class TestLiveFeed(unittest.TestCase):
+    def test_fan_in_bounds_the_backlog_and_keeps_feed_order(self):
+        async def consume():
+            produced, received, backlog = [], [], []
+            feeds = [list_feed(feed_ticks(sym, n), produced) for sym, n in (('S0', 200), ('S1', 3), ('S2', 120))]
+            async for tick in fan_in(feeds, maxsize=4):
+                received.append(tick)
+                backlog.append(len(produced) - len(received))
+                await asyncio.sleep(0)  # a slow consumer: producers get to run between ticks
+            return received, backlog
+        received, backlog = asyncio.run(asyncio.wait_for(consume(), 10))
+        # at most a full queue plus one tick in hand per producer
+        self.assertLessEqual(max(backlog), 4 + 3)
+        self.assertGreaterEqual(max(backlog), 4)
+        for sym, n in (('S0', 200), ('S1', 3), ('S2', 120)):
+            self.assertEqual([t for t in received if t.symbol == sym], feed_ticks(sym, n))  # S1 ends early
+
+    def test_unseeded_feeds_are_reproducible_and_private(self):
+        async def prices(symbol, n=50):
+            feed = async_market_data_generator(symbol, 100.0, interval=0.0)
+            return [(await feed.__anext__()).price for _ in range(n)]
+
+        state = random.getstate()
+        first = asyncio.run(prices('S0'))
+        self.assertEqual(random.getstate(), state)
+        self.assertEqual(asyncio.run(prices('S0')), first)
+        self.assertNotEqual(asyncio.run(prices('S1')), first)
+
+    def test_shutdown_closes_every_feed(self):
+        async def consume(fail_after=None, stop_after=None):
+            closed, received = [], []
+            feeds = [list_feed(feed_ticks('S0', 10_000), closed=closed),
+                     list_feed(feed_ticks('S1', 50), closed=closed, fail_after=fail_after)]
+            stream = fan_in(feeds, maxsize=8)
+            try:
+                async for tick in stream:
+                    received.append(tick)
+                    if len(received) == stop_after:
+                        break
+                    for _ in range(5):
+                        await asyncio.sleep(0)  # let the producers fill the queue and block on it
+            finally:
+                await stream.aclose()
+            return sorted(closed), received
+        closed, received = asyncio.run(asyncio.wait_for(consume(stop_after=25), 10))
+        self.assertEqual((closed, len(received)), (['S0', 'S1'], 25))
+        with self.assertRaisesRegex(RuntimeError, "feed dropped"):
+            asyncio.run(asyncio.wait_for(consume(fail_after=5), 10))
+
+    def test_run_async_matches_chronological_run(self):
+        ticks = make_columns(seed=12, ticks_per_symbol=800).ticks()
+        expected = Engine(seed=1)
+        expected.run_chronological(ticks, make_strategies(['S0', 'S1', 'S2']), presorted=True)
+        engine, closed = Engine(seed=1), []
+        results = asyncio.run(engine.run_async(list_feed(ticks, closed=closed), make_strategies(['S0', 'S1', 'S2'])))
+        self.assertEqual(engine.trades, expected.trades)
+        self.assertEqual(engine.equity_curve, expected.equity_curve)
+        self.assertEqual(results['latency']['ticks'], len(ticks))
+
+        engine = Engine(seed=1)
+        results = asyncio.run(engine.run_async(list_feed(ticks, closed=closed), make_strategies(['S0']), max_ticks=100))
+        self.assertEqual((len(engine.equity_curve), results['latency']['ticks'], closed), (100, 100, ['S0', 'S0']))
+
+
+class TestBulkGenerator(TempDirTestCase):
+    def test_identical_across_workers_chunks_and_formats(self):
+        def generate(name, **kwargs):
+            path = os.path.join(self.tmp.name, name)
+            generate_bulk_market_data(path, ['S0', 'S1', 'S2'], [100.0, 50.0, 20.0], [0.01, 0.02, 0.005], 2500,
+                                      seed=13, **kwargs)
+            with open(path, 'rb') as f:
+                return path, f.read()
+
+        store, store_bytes = generate('a.store', fmt='store')
+        for i, kwargs in enumerate(({'chunk_size': 333}, {'workers': 2}, {'workers': 2, 'chunk_size': 1000})):
+            self.assertEqual(generate(f'{i}.store', fmt='store', **kwargs)[1], store_bytes, kwargs)
+        csv, csv_bytes = generate('a.csv')
+        self.assertEqual(generate('b.csv', chunk_size=700)[1], csv_bytes)
+
+        rows = load_market_data_columnar(csv)
+        self.assertEqual(len(rows), 7500)
+        self.assertEqual(rows.symbol_ids[:6].tolist(), [0, 1, 2, 0, 1, 2])  # round-robin rows
+        stored = open_tick_store(store)
+        for sym, view in rows.by_symbol().items():
+            np.testing.assert_array_equal(stored.symbol(sym).timestamps, view.timestamps)
+            np.testing.assert_array_equal(stored.symbol(sym).prices, view.prices)
+
+    def test_import_leaves_global_random_alone(self):
+        code = ("import random; random.seed(7); a = random.random(); random.seed(7); "
+                "import data_generator; assert random.random() == a")
+        subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(SAMPLE_CSV), check=True)
+
+
+class TestLedger(unittest.TestCase):
+    def test_exported_columns_do_not_block_later_fills(self):
+        engine = Engine(initial_cash=10_000, failure_rate=0.0)
+        engine._mark('S0', 100.0)
+        ts = datetime.datetime(2025, 1, 1, 9, 30)
+        engine.execute_orders(Order('S0', 10, 100.0, 'BUY'), ts)
+        cols = engine.trades.to_numpy()
+        engine.execute_orders(Order('S0', 10, 100.0, 'BUY'), ts)
+        self.assertEqual((len(cols['price']), len(engine.trades)), (1, 2))
+        self.assertEqual((engine.cash, engine.positions['S0']['quantity']), (8_000, 20))
+        self.assertEqual(engine.trades.to_numpy()['cash_after'].tolist(), [9_000, 8_000])
+
+
+class TestMetrics(unittest.TestCase):
+    def test_matches_per_point_loops(self):
+        values = 100 * np.cumprod(1 + np.random.default_rng(4).normal(0, 0.01, 5000))
+        returns = [values[i] / values[i - 1] - 1.0 for i in range(1, len(values))]
+        peak, max_dd = values[0], 0.0
+        for v in values:
+            peak = max(peak, v)
+            max_dd = max(max_dd, (peak - v) / peak)
+        m = metrics.curve_metrics(values)
+        self.assertAlmostEqual(m['sharpe'], np.mean(returns) / np.std(returns) * np.sqrt(252), places=12)
+        self.assertEqual(m['max_drawdown'], max_dd)
+
+    def test_streaming_agrees_with_vectorized(self):
+        values = 100 * np.cumprod(1 + np.random.default_rng(5).normal(0, 0.01, 5000))
+        stream = metrics.StreamingMetrics()
+        for v in values:
+            stream.update(float(v))
+        expected = metrics.curve_metrics(values)
+        for key, value in stream.summary().items():
+            self.assertAlmostEqual(value, expected[key], places=9, msg=key)
+
+    def test_rolling_drawdown_matches_brute_force(self):
+        values = 100 * np.cumprod(1 + np.random.default_rng(6).normal(0, 0.01, 700))
+        window = 37
+        peaks = np.array([values[max(0, i - window + 1):i + 1].max() for i in range(len(values))])
+        np.testing.assert_array_equal(metrics.rolling_drawdown(values, window), (peaks - values) / peaks)
+
+    def test_engine_reports_portfolio_and_per_symbol_metrics(self):
+        data = make_columns()
+        engine, _ = run_engine(data, workers=1)
+        m = engine.performance_metrics()
+        self.assertEqual(set(m['by_symbol']), set(data.symbols))
+        self.assertNotIn('period_returns', m)
+        self.assertEqual(m['initial_equity'], 100_000)
+        self.assertAlmostEqual(m['final_equity'], sum(s['final_equity'] for s in m['by_symbol'].values()), places=6)
+
+
+class TestResultCache(TempDirTestCase):
+
+    def test_hit_matches_fresh_run_and_only_changed_symbol_reruns(self):
+        data = make_columns()
+        cache = ResultCache(self.tmp.name)
+        fresh, _ = run_engine(data, workers=1)
+        run_engine(data, cache=cache)
+        cached, results = run_engine(data, cache=cache)
+        self.assertEqual(results['cached_symbols'], data.symbols)
+        self.assertEqual(cached.trades, fresh.trades)
+        self.assertEqual(cached.equity_by_symbol, fresh.equity_by_symbol)
+        self.assertEqual(cached.performance_metrics(), fresh.performance_metrics())
+
+        strategies = make_strategies(data.symbols)
+        strategies['S1'] = [MovingAverageStrategy('S1', short_window=3, long_window=12)]
+        results = Engine(seed=1).run(data, strategies, cache=cache)
+        self.assertEqual(results['cached_symbols'], ['S0', 'S2'])
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(self.tmp.name)
+        entry = {'symbol': 'S0', 'equity_curve': [(datetime.datetime(2025, 1, 1), 1.0)] * 100}
+        for key in ('a', 'b', 'c'):
+            cache.put(key, entry)
+            os.utime(os.path.join(self.tmp.name, key + '.pkl'), ns=(0, {'a': 1, 'b': 2, 'c': 3}[key] * 10**9))
+        cache.get('a')  # refresh 'a', leaving 'b' as the oldest
+        cache.max_bytes = cache.size() - 1
+        cache.evict()
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_unreadable_entries_are_dropped_misses(self):
+        cache = ResultCache(self.tmp.name)
+        stale = {'truncated': b'\x80\x05\x95', 'module': b'cno_such_module\nResult\n.',
+                 'class': b'cdatetime\nNoSuchClass\n.', 'layout': pickle.dumps({'symbol': 'S0'})}
+        for key, blob in stale.items():
+            with open(os.path.join(self.tmp.name, key + '.pkl'), 'wb') as f:
+                f.write(blob)
+        for key in stale:
+            self.assertIsNone(cache.get(key))
+        self.assertEqual((cache.misses, len(cache)), (len(stale), 0))
+
+
+class TestProfiler(unittest.TestCase):
+    def test_counts_every_tick_and_fill_without_changing_results(self):
+        data = make_columns()
+        plain, _ = run_engine(data)
+        profiler = Profiler()
+        engine = Engine(seed=1, profiler=profiler)
+        engine.run(data, make_strategies(data.symbols))
+        self.assertEqual(engine.trades, plain.trades)
+        self.assertEqual(engine.equity_by_symbol, plain.equity_by_symbol)
+        report = profiler.report()
+        self.assertEqual(report['ticks'], len(data))
+        self.assertEqual(report['fills'], len(engine.trades))
+        self.assertEqual(report['signals'], report['fills'] + report['rejects'])
+        self.assertEqual(report['stages']['equity']['calls'], len(data))
+        self.assertEqual(sum(row['calls'] for row in report['by_strategy']), 2 * len(data))
+
+
+class TestStreamingRun(TempDirTestCase):
+
+    def test_matches_in_memory_chronological_run(self):
+        symbols = ['S0', 'S1', 'S2']
+        path = os.path.join(self.tmp.name, 'ticks.csv')
+        generate_bulk_market_data(path, symbols, 100.0, [0.01, 0.02, 0.005], 3000, seed=7)
+        memory = Engine(seed=1)
+        memory.run_chronological(load_market_data(path), make_strategies(symbols))
+        expected = memory.performance_metrics()
+
+        spill = os.path.join(self.tmp.name, 'spill')
+        engine = Engine(seed=1)
+        results = engine.run_streaming(path, make_strategies(symbols), spill_dir=spill, downsample=500,
+                                       chunk_rows=1000, spill_rows=256)
+        self.assertEqual(results['final_cash'], memory.cash)
+        self.assertEqual(results['ticks'], 9000)
+        self.assertEqual(len(results['equity_curve']['PORTFOLIO']), 19)
+        np.testing.assert_array_equal(load_spilled_equity(spill)[1], [v for _, v in memory.equity_curve])
+        trades = load_spilled_trades(spill)
+        for column, values in memory.trades.to_numpy().items():
+            np.testing.assert_array_equal(trades[column], values)
+        for key, value in results['metrics'].items():
+            self.assertAlmostEqual(value, expected[key], places=9, msg=key)
+        self.assertEqual({k: v for k, v in engine.performance_metrics().items() if k != 'by_symbol'},
+                         results['metrics'])
+        self.assertEqual(engine.performance_metrics()['by_symbol'], {'PORTFOLIO': results['metrics']})
+
+        # curves ending on a downsample boundary keep their last point once
+        for downsample, expected_curve in ((1, memory.equity_curve), (8999, memory.equity_curve[::8998])):
+            engine = Engine(seed=1)
+            engine.run_streaming(path, make_strategies(symbols), downsample=downsample, chunk_rows=1000)
+            self.assertEqual(engine.equity_curve, expected_curve)
+
+
+class TestReportDecimation(unittest.TestCase):
+    def test_minmax_decimation_keeps_extremes_and_drawdown(self):
+        values = 100 * np.cumprod(1 + np.random.default_rng(8).normal(0, 0.01, 100_000))
+        idx = reporting.minmax_indices(values, 500)
+        self.assertLessEqual(len(idx), 500)
+        self.assertEqual((idx[0], idx[-1]), (0, len(values) - 1))
+        self.assertEqual(values[idx].min(), values.min())
+        self.assertEqual(values[idx].max(), values.max())
+        self.assertEqual(metrics.max_drawdown(values[idx]), metrics.max_drawdown(values))
+
+    def test_sparkline_has_fixed_width(self):
+        values = np.concatenate([np.linspace(100, 200, 50_000), [50.0], np.linspace(200, 100, 49_999)])
+        line = reporting.ascii_sparkline(values, width=80)
+        self.assertEqual(len(line), 80)
+        self.assertIn("▁", line)  # the one-point crash is still visible
+        self.assertEqual(reporting.ascii_sparkline([1, 2, 3], width=80), "▁▄█")
+
+    def test_in_process_plots_keep_the_callers_backend(self):
+        import matplotlib
+        backend = matplotlib.get_backend()
+        self.addCleanup(matplotlib.use, backend)
+        matplotlib.use('svg')
+        curve = [(datetime.datetime(2025, 1, 1) + datetime.timedelta(seconds=i), 100.0 + i) for i in range(50)]
+        with tempfile.TemporaryDirectory() as tmp:
+            # a handful of symbols is plotted in-process even when workers are offered
+            with unittest.mock.patch('concurrent.futures.ProcessPoolExecutor', side_effect=AssertionError):
+                paths = reporting.save_symbol_plots({'S0': curve, 'S1': curve}, tmp, workers=4)
+            self.assertEqual(sorted(paths), ['S0', 'S1'])
+            self.assertTrue(all(os.path.getsize(p) for p in paths.values()))
+        self.assertEqual(matplotlib.get_backend(), 'svg')
+
+
+def fill_model():
+    return Chain(RandomFailure(0.1), Spread(2.0), Slippage(1.0, 0.05), Latency(0.001, 2), PartialFill(0.3, 0.5))
+
+
+class TestExecutionModels(unittest.TestCase):
+    def run_with_model(self, data, **kwargs):
+        engine = Engine(seed=5, execution=fill_model())
+        engine.run(data, make_strategies(data.symbols), **kwargs)
+        return engine
+
+    def test_batch_fills_match_per_order_fills(self):
+        data = make_columns(seed=2)
+        tick = self.run_with_model(data)
+        batch = self.run_with_model(data, vectorized=True)
+        self.assertEqual(batch.trades, tick.trades)
+        self.assertEqual(batch.equity_by_symbol, tick.equity_by_symbol)
+        cols = tick.trades.to_numpy()
+        self.assertTrue((cols['quantity'] < 10).any())  # some partial fills
+        self.assertFalse(np.isin(cols['price'], data.prices).any())  # every fill paid spread and slippage
+
+    def test_isolated_runs_reproducible_across_workers(self):
+        data = make_columns(seed=2)
+        random.seed(1)
+        one = self.run_with_model(data, workers=1)
+        random.seed(2)
+        two = self.run_with_model(data, workers=2, vectorized=True)
+        self.assertEqual(two.trades, one.trades)
+        self.assertEqual(two.equity_by_symbol, one.equity_by_symbol)
+
+    def test_unseeded_serial_and_isolated_runs_draw_the_same_fills(self):
+        data = make_columns(seed=2)
+        runs = []
+        for kwargs in ({}, {}, {'workers': 1}, {'workers': 2, 'vectorized': True}):
+            # enough cash that shared and per-symbol balances never bind
+            engine = Engine(initial_cash=10**7, execution=fill_model())
+            engine.run(data, make_strategies(data.symbols), **kwargs)
+            runs.append(engine.trades.to_numpy())
+        self.assertGreater(len(runs[0]['price']), 0)
+        for trades in runs[1:]:
+            # the same fills; only cash_after differs between shared and per-symbol balances
+            for column in ('timestamp', 'symbol_id', 'side', 'quantity', 'price'):
+                np.testing.assert_array_equal(trades[column], runs[0][column])
+
+
+class TestTicks(TempDirTestCase):
+
+    def test_engine_results_match_market_data_points(self):
+        symbols = ['S0', 'S1', 'S2']
+        path = os.path.join(self.tmp.name, 'ticks.csv')
+        generate_bulk_market_data(path, symbols, 100.0, [0.01, 0.02, 0.005], 2000, seed=3)
+        points, ticks = load_market_data(path), load_ticks(path)
+        self.assertEqual([(t.timestamp, t.symbol, t.price) for t in ticks],
+                         [(p.timestamp, p.symbol, p.price) for p in points])
+        for run in ('run', 'run_chronological'):
+            expected, lean = Engine(seed=1), Engine(seed=1)
+            getattr(expected, run)(points, make_strategies(symbols))
+            getattr(lean, run)(ticks, make_strategies(symbols))
+            self.assertEqual(lean.trades, expected.trades)
+            self.assertEqual(lean.equity_by_symbol, expected.equity_by_symbol)
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def test_path_matches_engine_run(self):
+        strategies = make_strategies(['S0'])
+        result = run_monte_carlo(strategies, 100.0, 0.01, 1000, 7, seed=3, block_paths=3)
+        self.assertEqual(len(result['metrics']['sharpe']), 7)
+        self.assertLessEqual(result['distribution']['sharpe']['p5'], result['distribution']['sharpe']['p95'])
+        prices = simulate_prices([4], 1, [100.0], [0.01], 1000, seed=3)[0, 0]
+        times = np.datetime64('2025-01-01T09:30', 'us') + np.arange(1000).astype('m8[us]')
+        engine = Engine(failure_rate=0.0)
+        engine.run_chronological(MarketDataColumns(times, np.zeros(1000, np.int32), ['S0'], prices),
+                                 make_strategies(['S0']))
+        expected = engine.performance_metrics()
+        for key in ('final_equity', 'total_return', 'sharpe', 'sortino', 'max_drawdown',
+                    'max_drawdown_duration', 'turnover'):
+            self.assertAlmostEqual(result['metrics'][key][4], expected[key], places=9, msg=key)
+
+    def test_block_size_and_row_independence(self):
+        strategies = make_strategies(['S0', 'S1'])
+        a = run_monte_carlo(strategies, 100.0, 0.02, 300, 10, block_paths=10)
+        b = run_monte_carlo(strategies, 100.0, 0.02, 300, 10, block_paths=3)
+        for key in a['metrics']:
+            np.testing.assert_array_equal(a['metrics'][key], b['metrics'][key])
+        prices = simulate_prices(range(10), 1, [100.0], [0.02], 300)[0]
+        for strat in strategies['S0']:
+            buy, sell = strat.signal_conditions(prices)
+            for row in range(10):
+                row_buy, row_sell = strat.signal_conditions(prices[row])
+                np.testing.assert_array_equal(buy[row], row_buy)
+                np.testing.assert_array_equal(sell[row], row_sell)
+
+
+class TestCheckpoint(TempDirTestCase):
+
+    def test_resumed_run_matches_full_replay(self):
+        full = make_columns(seed=5)
+        execution = Chain(RandomFailure(0.05), Latency(0.001, 2), PartialFill(0.5, 0.3))
+        expected = Engine(seed=1, execution=execution)
+        expected.run_chronological(full, make_strategies(full.symbols))
+
+        path = os.path.join(self.tmp.name, 'book.ckpt')
+        cut = full.timestamps[2500]
+        for data in (full, full.ticks()):
+            early = full.timestamps <= cut
+            engine, strategies = Engine(seed=1, execution=execution), make_strategies(full.symbols)
+            engine.run_chronological(MarketDataColumns(full.timestamps[early], full.symbol_ids[early],
+                                                       full.symbols, full.prices[early]), strategies)
+            save_checkpoint(path, engine, strategies)
+            engine, strategies = load_checkpoint(path)
+            engine.run_chronological(data, strategies)
+            self.assertEqual(engine.trades, expected.trades)
+            self.assertEqual(engine.equity_curve, expected.equity_curve)
+            self.assertEqual(engine.positions, expected.positions)
+            self.assertEqual(engine.performance_metrics(), expected.performance_metrics())
+
+    def test_resume_keeps_appended_ticks_tied_with_the_checkpoint(self):
+        full = make_columns(seed=5)
+        n = 2501
+        history = MarketDataColumns(full.timestamps[:n], full.symbol_ids[:n], full.symbols, full.prices[:n])
+        # a late tick stamped like the last replayed one, then the rest of the day
+        data = MarketDataColumns(np.concatenate((history.timestamps, full.timestamps[n - 1:])),
+                                 np.concatenate((history.symbol_ids, full.symbol_ids[n - 1:])), full.symbols,
+                                 np.concatenate((history.prices, [full.prices[n - 1] * 1.5], full.prices[n:])))
+        expected = Engine(seed=1)
+        expected.run_chronological(data, make_strategies(full.symbols))
+
+        path = os.path.join(self.tmp.name, 'book.ckpt')
+        engine, strategies = Engine(seed=1), make_strategies(full.symbols)
+        engine.run_chronological(history, strategies)
+        save_checkpoint(path, engine, strategies)
+        for ticks in (data, data.ticks()):
+            engine, strategies = load_checkpoint(path)
+            engine.run_chronological(ticks, strategies)
+            self.assertEqual(len(engine.equity_curve), len(data))
+            self.assertEqual(engine.trades, expected.trades)
+            self.assertEqual(engine.equity_curve, expected.equity_curve)
+
+        engine, strategies = load_checkpoint(path)
+        with self.assertRaises(ValueError):
+            engine.run_chronological(full.by_symbol() | {'S0': []}, strategies)
+        short = [t for t in history.ticks() if t.symbol != 'S0']
+        with self.assertRaisesRegex(ValueError, 'S0'):
+            engine.run_chronological(iter(short), strategies, presorted=True)
+        self.assertIsNotNone(engine.resume_from)
+
+    def test_resume_from_only_the_new_ticks(self):
+        full = make_columns(seed=5)
+        n = 2501
+        expected = Engine(seed=1)
+        expected.run_chronological(full, make_strategies(full.symbols))
+
+        path = os.path.join(self.tmp.name, 'book.ckpt')
+        engine, strategies = Engine(seed=1), make_strategies(full.symbols)
+        engine.run_chronological(MarketDataColumns(full.timestamps[:n], full.symbol_ids[:n], full.symbols,
+                                                   full.prices[:n]), strategies)
+        save_checkpoint(path, engine, strategies)
+        new = MarketDataColumns(full.timestamps[n:], full.symbol_ids[n:], full.symbols, full.prices[n:])
+        for ticks in (new, new.ticks(), iter(new.ticks())):
+            engine, strategies = load_checkpoint(path)
+            engine.run_chronological(ticks, strategies, presorted=True, new_only=True)
+            self.assertEqual(engine.trades, expected.trades)
+            self.assertEqual(engine.equity_curve, expected.equity_curve)
+            self.assertEqual(engine.ticks_consumed, expected.ticks_consumed)
+
+        engine, strategies = load_checkpoint(path)
+        stale = MarketDataColumns(full.timestamps[n - 2:], full.symbol_ids[n - 2:], full.symbols, full.prices[n - 2:])
+        with self.assertRaises(ValueError):
+            engine.run_chronological(stale, strategies, new_only=True)
+        with self.assertRaises(ValueError):
+            Engine().run_chronological(new, strategies, new_only=True)
+
+
+class TestBars(unittest.TestCase):
+    def test_batch_and_streaming_bars_agree(self):
+        data = make_columns(seed=2)
+        gaps = np.random.default_rng(0).integers(0, 3000, len(data))
+        data.timestamps = np.datetime64('2025-01-01T09:30', 'us') + np.cumsum(gaps).astype('m8[us]')
+        prices = data.by_symbol()['S1'].prices
+        for spec in ('1t', '7t', '13ms', '1s'):
+            bars = resample(data, spec)
+            aggregator = BarAggregator.from_spec(spec)
+            streamed = [bar for bar in map(aggregator.update, data.ticks()) if bar] + aggregator.flush()
+            for sym in data.symbols:
+                self.assertEqual(list(bars.by_symbol()[sym]), [b for b in streamed if b.symbol == sym], spec)
+            s1 = list(bars.by_symbol()['S1'])
+            self.assertEqual(sum(b.volume for b in s1), len(prices))
+            self.assertEqual((s1[0].open, s1[-1].close), (prices[0], prices[-1]))
+            self.assertEqual(max(b.high for b in s1), prices.max())
+            self.assertEqual(min(b.low for b in s1), prices.min())
+
+        bars = resample(data, '10t')
+        self.assertEqual(len(bars), len(data) // 10)
+        expected, vectorized = Engine(seed=1), Engine(seed=1)
+        expected.run(bars, make_strategies(bars.symbols))
+        vectorized.run(bars, make_strategies(bars.symbols), vectorized=True)
+        self.assertGreater(len(expected.trades), 0)
+        self.assertEqual(vectorized.trades, expected.trades)
+        self.assertEqual(vectorized.equity_by_symbol, expected.equity_by_symbol)
+
+
+class TestOrderStatus(unittest.TestCase):
+    def test_rejections_are_counted_not_raised(self):
+        engine = Engine(initial_cash=10_000, failure_rate=0.0)
+        engine._mark('S', 100.0)
+        signals = [('BUY', 'S', 10, 100.0), ('BUY', 'S', 0, 100.0), ('HOLD', 'S', 10, 100.0),
+                   ('BUY', 'S', 10**6, 100.0), ('SELL', 'S', 20, 100.0), ('SELL', 'S', 10, 100.0), ('BUY', 'S')]
+        statuses = engine._submit_signals(signals, datetime.datetime(2025, 1, 1))
+        e = engine_module
+        self.assertEqual(statuses, [e.FILLED, e.INVALID_QUANTITY, e.INVALID_ACTION, e.INSUFFICIENT_CASH,
+                                    e.INSUFFICIENT_SHARES, e.FILLED, e.SIGNAL_ERROR])
+        self.assertEqual(engine.rejection_summary(), {'INVALID_QUANTITY': 1, 'INVALID_ACTION': 1, 'INSUFFICIENT_CASH': 1,
+                                                      'INSUFFICIENT_SHARES': 1, 'SIGNAL_ERROR': 1})
+        self.assertEqual((len(engine.trades), engine.cash, engine.positions.quantity_of('S')), (2, 10_000, 0))
+
+        def fault(*args):
+            raise RuntimeError("engine fault")
+        engine._book = fault
+        with self.assertRaises(RuntimeError):
+            engine._submit(('BUY', 'S', 10, 100.0), datetime.datetime(2025, 1, 1))
+        del engine._book
+        self.assertEqual(engine.rejection_summary()['SIGNAL_ERROR'], 1)
+
+        order = Order('S', 10**6, 100.0, 'BUY')
+        with self.assertRaises(ExecutionError):
+            engine.execute_orders(order, datetime.datetime(2025, 1, 1))
+        with self.assertRaises(OrderError):
+            engine.execute_orders(Order('S', 0, 100.0, 'BUY'), datetime.datetime(2025, 1, 1))
+        order = Order('S', 10, 100.0, 'BUY')
+        engine.execute_orders(order, datetime.datetime(2025, 1, 1))
+        self.assertEqual(order.status, 'FILLED')
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_baseline_comparison_flags_regressions(self):
+        baseline = {'results': {'loader': {'seconds': 1.0}, 'engine': {'seconds': 2.0},
+                                'sweep': {'seconds': 1.0}, 'live': {'skipped': 'no feed'}}}
+        current = {'results': {'loader': {'seconds': 1.1}, 'engine': {'seconds': 3.0},
+                               'sweep': {'skipped': 'no pool'}, 'live': {'seconds': 1.0}, 'new': {'seconds': 9.0}}}
+        rows = benchmark.compare_to_baseline(current, baseline, 0.2)
+        self.assertEqual([(r['case'], r['regression']) for r in rows], [('loader', False), ('engine', True)])
+        self.assertAlmostEqual(rows[1]['ratio'], 1.5)
+        self.assertFalse(benchmark.compare_to_baseline(current, baseline, 0.6)[1]['regression'])
+
+    def test_ledger_bench_counts_rejections(self):
+        row = benchmark.bench_ledger(2000)[-1]
+        self.assertEqual(row['trades'] + row['rejected'], 2000)
+        self.assertGreater(row['rejected'], 0)
+
+
+class TestCommandLine(TempDirTestCase):
+    def test_parse_args(self):
+        args = main_module.parse_args([])
+        self.assertEqual((args.data, args.strategy, args.ticks), (None, list(main_module.STRATEGY_NAMES), 500))
+        self.assertFalse(args.reuse_data or args.no_plot or args.no_report)
+        args = main_module.parse_args(['--data', 'x.ticks', '--strategy', 'MomentumStrategy', '--ticks', '20',
+                                       '--reuse-data', '--no-plot', '--no-report'])
+        self.assertEqual((args.data, args.strategy, args.ticks), ('x.ticks', ['MomentumStrategy'], 20))
+        self.assertTrue(args.reuse_data and args.no_plot and args.no_report)
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            main_module.parse_args(['--strategy', 'NoSuchStrategy'])
+
+    def test_reuse_data_round_trip(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+        def run(*flags):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                main_module.main(['--ticks', '40', '--no-plot', '--no-report', *flags])
+            return out.getvalue()
+
+        first = run()
+        self.assertIn("Generated 200 ticks", first)
+        stamp = os.stat(main_module.STORE_FILE).st_mtime_ns
+        second = run('--reuse-data')
+        self.assertIn(f"Reusing {main_module.STORE_FILE}", second)
+        self.assertNotIn("Generated", second)
+        self.assertEqual(os.stat(main_module.STORE_FILE).st_mtime_ns, stamp)
+        # the same ticks give the same backtest
+        self.assertEqual(first.splitlines()[-2:], second.splitlines()[-2:])
+        store = main_module.load_data(main_module.STORE_FILE)
+        self.assertEqual((len(store), store.symbols), (200, main_module.SYMBOLS))
+        self.assertFalse(os.path.exists('performance.md'))
+
+
+class TestDistributed(TempDirTestCase):
+
+    def test_sharded_run_with_crashed_worker_matches_serial_run(self):
+        data = make_columns(seed=6, n_symbols=5, ticks_per_symbol=1000)
+        store = os.path.join(self.tmp.name, 'ticks.store')
+        write_tick_store(store, data)
+        queue = os.path.join(self.tmp.name, 'queue')
+        self.assertEqual(submit_backtest(queue, store, shard_size=2, seed=1), 3)
+
+        # a worker that claimed a shard and died: its claim stops being refreshed
+        crashed = WorkQueue(queue).claim()
+        stale = time.time() - 60
+        os.utime(os.path.join(queue, 'claimed', f"{crashed['id']}.json"), (stale, stale))
+
+        procs = start_local_workers(queue, 2, lease_seconds=1.0, poll_seconds=0.05)
+        engine, results = collect_backtest(queue, timeout=60, poll_seconds=0.05, lease_seconds=1.0)
+        for p in procs:
+            p.join(10)
+            self.assertEqual(p.exitcode, 0)
+        self.assertEqual(len(results['shards']), 3)
+        self.assertEqual(WorkQueue(queue).failures(), [])
+
+        expected = Engine(seed=1)
+        expected_results = expected.run(data, {s: build_strategies(s) for s in data.symbols}, workers=1)
+        self.assertEqual(engine.trades, expected.trades)
+        self.assertEqual(engine.equity_by_symbol, expected.equity_by_symbol)
+        self.assertEqual(results['final_cash'], expected_results['final_cash'])
+        self.assertEqual(results['rejections'], expected_results['rejections'])
+        self.assertEqual(engine.performance_metrics(), expected.performance_metrics())
+        self.assertEqual(set(results['symbol_metrics']), set(data.symbols))
+
+        # a shard result missing a symbol is reported, not merged without it
+        path = os.path.join(queue, 'done', os.listdir(os.path.join(queue, 'done'))[0])
+        with open(path, 'rb') as f:
+            result = pickle.load(f)
+        dropped = result['outputs'].pop()['symbol']
+        with open(path, 'wb') as f:
+            pickle.dump(result, f)
+        with self.assertRaisesRegex(RuntimeError, dropped):
+            collect_backtest(queue, timeout=10, poll_seconds=0.05)
+
+    def test_sharded_sweep_matches_run_sweep(self):
+        data = make_columns(seed=7, n_symbols=2, ticks_per_symbol=1000)
+        store = os.path.join(self.tmp.name, 'ticks.store')
+        write_tick_store(store, data)
+        grids = {MovingAverageStrategy: {'short_window': [3, 5], 'long_window': [10, 20]},
+                 MomentumStrategy: {'lookback': [3, 6]}}
+        queue = os.path.join(self.tmp.name, 'queue')
+        self.assertEqual(submit_sweep(queue, store, grids, block_size=3), 3)
+        self.assertEqual(run_worker(queue, poll_seconds=0.05), 3)
+        self.assertEqual(collect_sweep(queue, timeout=10, poll_seconds=0.05), run_sweep(data, grids))
+        self.assertIsNone(sweep_module._views)  # the queue worker does not use the pool's dataset
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
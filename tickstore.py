@@ -0,0 +1,108 @@
+"""
+Binary tick store with memory-mapped, per-symbol access.
+
+File layout:
+    magic        8 bytes   b'TICKS001'
+    header_len   uint64    length of the JSON header in bytes
+    header       JSON      {"count": N, "symbols": [{"symbol", "offset", "count"}, ...]}
+    padding      up to an 8-byte boundary
+    timestamps   int64[N]  microseconds since the epoch (datetime64[us])
+    prices       float64[N]
+
+Rows are grouped by symbol and sorted by time within each symbol, so one
+symbol's ticks are a contiguous slice of each column.
+"""
+import json
+import struct
+import numpy as np
+from models import MarketDataColumns, SymbolTicks, load_market_data_columnar
+
+MAGIC = b'TICKS001'
+
+
+class TickStore:
+    """
+    A tick store opened via mmap. Per-symbol views are zero-copy slices of
+    the mapped columns; nothing is parsed beyond the JSON header.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic = f.read(8)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a tick store (bad magic {magic!r})")
+            (header_len,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_len))
+        data_offset = _align8(16 + header_len)
+        self.count = header['count']
+        self.index = {e['symbol']: (e['offset'], e['count']) for e in header['symbols']}
+        if self.count:
+            self.timestamps = np.memmap(path, dtype='<M8[us]', mode='r', offset=data_offset, shape=(self.count,))
+            self.prices = np.memmap(path, dtype='<f8', mode='r', offset=data_offset + 8 * self.count, shape=(self.count,))
+        else:
+            self.timestamps = np.empty(0, dtype='M8[us]')
+            self.prices = np.empty(0, dtype=np.float64)
+
+    @property
+    def symbols(self):
+        return list(self.index)
+
+    def __len__(self):
+        return self.count
+
+    def symbol(self, symbol) -> SymbolTicks:
+        '''Zero-copy, time-sorted view over one symbol's ticks.'''
+        offset, count = self.index[symbol]
+        return SymbolTicks(symbol, self.timestamps[offset:offset + count], self.prices[offset:offset + count])
+
+    def by_symbol(self):
+        return {sym: self.symbol(sym) for sym in self.index}
+
+
+def _align8(n):
+    return (n + 7) & ~7
+
+
+def write_header(f, counts) -> int:
+    '''
+    Write the magic, header and padding for symbols with the given tick
+    counts ({symbol: count}, in file order). Returns the file offset of the
+    timestamp column; prices start 8 * total bytes after it.
+    '''
+    entries, offset = [], 0
+    for sym, count in counts.items():
+        entries.append({'symbol': sym, 'offset': offset, 'count': int(count)})
+        offset += int(count)
+    header = json.dumps({'count': offset, 'symbols': entries}).encode()
+    f.write(MAGIC)
+    f.write(struct.pack('<Q', len(header)))
+    f.write(header)
+    f.write(b'\0' * (_align8(16 + len(header)) - 16 - len(header)))
+    return _align8(16 + len(header))
+
+
+def write_tick_store(path, columns: MarketDataColumns):
+    '''Write columnar market data to `path` in tick-store format.'''
+    views = columns.by_symbol()
+    with open(path, 'wb') as f:
+        write_header(f, {sym: len(view) for sym, view in views.items()})
+        for view in views.values():
+            view.timestamps.astype('<M8[us]').view('<i8').tofile(f)
+        for view in views.values():
+            view.prices.astype('<f8').tofile(f)
+    return path
+
+
+def csv_to_tick_store(csv_path, store_path):
+    '''Convert an existing timestamp,symbol,price CSV into a tick store.'''
+    return write_tick_store(store_path, load_market_data_columnar(csv_path))
+
+
+def open_tick_store(path) -> TickStore:
+    return TickStore(path)
+
+
+def is_tick_store(path) -> bool:
+    '''Whether the file at `path` starts with the tick-store magic.'''
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC